@@ -0,0 +1,300 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import time
+from datetime import datetime
+
+import psycopg2
+
+import busqueda
+import conexiones
+import crearBaseDeDatos
+import instantaneas
+import obtenerDatosImportantes
+import rellenarDatos
+from generarDatos import SEMILLA_POR_DEFECTO
+
+# --- CONFIGURACIÓN DEL BENCHMARK ---
+# Cada análisis se ejecuta en todos los motores. funcionConjunta se mide con su
+# consulta por motor (la función completa abre sus propias conexiones).
+# Las variantes _sql miden las consultas originales frente al motor de ventana
+# (correlación) y a las tablas de resumen (el resto).
+ANALISIS = {
+    "analizar_postgresql":     obtenerDatosImportantes.analizar_postgresql,
+    "analizar_postgresql_sql": lambda conn: obtenerDatosImportantes.analizar_postgresql(conn, metodo="sql"),
+    "analizar_mysql":          obtenerDatosImportantes.analizar_mysql,
+    "analizar_mysql_sql":      lambda conn: obtenerDatosImportantes.analizar_mysql(conn, metodo="sql"),
+    "analizar_mariadb":        obtenerDatosImportantes.analizar_mariadb,
+    "analizar_mariadb_sql":    lambda conn: obtenerDatosImportantes.analizar_mariadb(conn, metodo="sql"),
+    "funcionConjunta":         None,
+    "funcionConjunta_sql":     None,
+}
+
+# Términos de la búsqueda de texto completo (--busqueda sin términos). Son palabras
+# del vocabulario de Faker es_ES; la última exige dos términos a la vez.
+TERMINOS_BUSQUEDA = ("hospital", "mercado", "presidente partido")
+METODOS_BUSQUEDA = ("indice", "like")
+
+# Una latencia p50 peor que la anterior en este factor se marca como regresión
+UMBRAL_REGRESION = 1.25
+
+
+def _percentil(valores, p):
+    """Percentil `p` (0-100) con interpolación lineal entre muestras ordenadas."""
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+def _sin_punto_y_coma(sql):
+    return sql.strip().rstrip(";")
+
+def _es_mariadb(cursor):
+    cursor.execute("SELECT VERSION()")
+    return "mariadb" in cursor.fetchall()[0][0].lower()
+
+# --- PLANES DE EJECUCIÓN ---
+
+def capturar_planes(conn, sql, parametros=None):
+    """Devuelve el plan estimado (EXPLAIN) y el real (EXPLAIN ANALYZE) de `sql`."""
+    sql = _sin_punto_y_coma(sql)
+    cursor = conn.cursor()
+    try:
+        if isinstance(conn, psycopg2.extensions.connection):
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", parametros)
+            plan = cursor.fetchall()[0][0]
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", parametros)
+            plan_analyze = cursor.fetchall()[0][0]
+            conn.rollback()
+        else:
+            cursor.execute(f"EXPLAIN FORMAT=JSON {sql}", parametros)
+            plan = json.loads(cursor.fetchall()[0][0])
+            if _es_mariadb(cursor):
+                cursor.execute(f"ANALYZE FORMAT=JSON {sql}", parametros)
+                plan_analyze = json.loads(cursor.fetchall()[0][0])
+            else:
+                # MySQL 8.0.18+: árbol de iteradores con tiempos reales, en texto
+                cursor.execute(f"EXPLAIN ANALYZE {sql}", parametros)
+                plan_analyze = cursor.fetchall()[0][0]
+    finally:
+        cursor.close()
+    return plan, plan_analyze
+
+def firma_plan(plan):
+    """Plan sin cifras (costes, filas, tiempos): si cambia la firma, cambió la forma del plan."""
+    return re.sub(r"\d+(\.\d+)?(e[+-]?\d+)?", "#", json.dumps(plan, sort_keys=True))
+
+# --- MEDICIÓN ---
+
+def _cronometrar(ejecutar, calentamiento, repeticiones):
+    """Llama a `ejecutar` `calentamiento` veces sin medir y `repeticiones` veces midiendo (ms)."""
+    tiempos = []
+    # Los análisis imprimen su progreso en cada llamada; aquí solo interesa el tiempo
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(calentamiento):
+            ejecutar()
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            ejecutar()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+def _medicion(tiempos, plan, plan_analyze):
+    return {
+        "repeticiones": len(tiempos),
+        "p50_ms": round(_percentil(tiempos, 50), 3),
+        "p95_ms": round(_percentil(tiempos, 95), 3),
+        "media_ms": round(statistics.fmean(tiempos), 3),
+        "min_ms": round(min(tiempos), 3),
+        "max_ms": round(max(tiempos), 3),
+        "firma_plan": firma_plan(plan),
+        "plan": plan,
+        "plan_analyze": plan_analyze,
+    }
+
+def medir_analisis(conn, nombre, calentamiento, repeticiones):
+    """Ejecuta el análisis `calentamiento` veces sin medir y `repeticiones` veces midiendo."""
+    funcion = ANALISIS[nombre]
+    sql = obtenerDatosImportantes.consulta_analisis(nombre, conn)
+
+    def ejecutar():
+        if funcion is not None:
+            funcion(conn)
+            return
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        cursor.fetchall()
+        cursor.close()
+
+    tiempos = _cronometrar(ejecutar, calentamiento, repeticiones)
+    return _medicion(tiempos, *capturar_planes(conn, sql))
+
+def medir_busqueda(conn, tabla, termino, metodo, calentamiento, repeticiones):
+    """Mide la búsqueda de `termino` en `tabla`. None si el término no es buscable en el motor."""
+    consulta = busqueda.sql_busqueda(tabla, conn, termino, metodo=metodo)
+    if consulta is None:
+        return None
+    filas = []
+
+    def ejecutar():
+        cursor = conn.cursor()
+        cursor.execute(*consulta)
+        filas[:] = cursor.fetchall()
+        cursor.close()
+
+    tiempos = _cronometrar(ejecutar, calentamiento, repeticiones)
+    return {**_medicion(tiempos, *capturar_planes(conn, *consulta)), "filas": len(filas)}
+
+def _medir_busquedas(conn, db_name, scale_factor, terminos, calentamiento, repeticiones):
+    """Mide cada término en cada tabla buscable, con el índice de texto completo y con LIKE."""
+    resultados = []
+    cursor = conn.cursor()
+    busqueda.crear_indices_busqueda(cursor, conn)
+    cursor.close()
+    for tabla in busqueda.CAMPOS_BUSQUEDA:
+        for termino in terminos:
+            for metodo in METODOS_BUSQUEDA:
+                nombre = f"busqueda_{metodo}[{tabla}] {termino}"
+                print(f"-> [sf={scale_factor:g}] {nombre} en {db_name}...")
+                try:
+                    medicion = medir_busqueda(conn, tabla, termino, metodo, calentamiento, repeticiones)
+                    if medicion is None:
+                        print("   término no buscable en este motor, se omite")
+                        continue
+                    print(f"   p50={medicion['p50_ms']} ms  p95={medicion['p95_ms']} ms  filas={medicion['filas']}")
+                except Exception as e:
+                    print(f"   ERROR: {e}")
+                    medicion = {"error": str(e).strip()}
+                    if isinstance(conn, psycopg2.extensions.connection):
+                        conn.rollback()
+                resultados.append({"scale_factor": scale_factor, "motor": db_name, "analisis": nombre, **medicion})
+    return resultados
+
+def preparar_datos(scale_factor, semilla, directorio_intermedios, usar_instantaneas=True):
+    """Deja cargado el scale factor indicado en los tres motores.
+    Si hay instantánea de (scale_factor, semilla) de la versión de datos actual en todos,
+    se restaura; si no, se recrea el esquema, se rellena y se captura la instantánea
+    para la próxima vez."""
+    motores = list(conexiones.DB_CONFIGS)
+    if usar_instantaneas and all(instantaneas.existe(db, scale_factor, semilla) for db in motores):
+        for db_name in motores:
+            instantaneas.restaurar(db_name, scale_factor, semilla)
+        return
+
+    crearBaseDeDatos.main(paralelo=True)
+    rellenarDatos.main(
+        paralelo=True, scale_factor=scale_factor, semilla=semilla,
+        intermedio=os.path.join(directorio_intermedios, f"sf_{scale_factor:g}_semilla_{semilla}"),
+    )
+    if usar_instantaneas:
+        for db_name in motores:
+            instantaneas.capturar(db_name, scale_factor, semilla)
+
+def ejecutar_benchmark(scale_factors, calentamiento=2, repeticiones=10, semilla=SEMILLA_POR_DEFECTO,
+                       preparar=True, directorio_intermedios="intermedios", usar_instantaneas=True,
+                       terminos_busqueda=None):
+    """Mide cada análisis en cada motor para cada scale factor. Devuelve el informe.
+    Con `terminos_busqueda`, mide además la búsqueda de texto completo de cada término."""
+    resultados = []
+    for scale_factor in scale_factors:
+        if preparar:
+            preparar_datos(scale_factor, semilla, directorio_intermedios, usar_instantaneas)
+            # Las bases se han recreado: las conexiones del pool ya no son válidas
+            conexiones.cerrar_pools()
+
+        for db_name in conexiones.DB_CONFIGS:
+            try:
+                with conexiones.conexion(db_name) as conn:
+                    for nombre in ANALISIS:
+                        print(f"-> [sf={scale_factor:g}] {nombre} en {db_name}...")
+                        try:
+                            medicion = medir_analisis(conn, nombre, calentamiento, repeticiones)
+                            print(f"   p50={medicion['p50_ms']} ms  p95={medicion['p95_ms']} ms")
+                        except Exception as e:
+                            print(f"   ERROR: {e}")
+                            medicion = {"error": str(e).strip()}
+                            if isinstance(conn, psycopg2.extensions.connection):
+                                conn.rollback()
+                        resultados.append({"scale_factor": scale_factor, "motor": db_name, "analisis": nombre, **medicion})
+                    if terminos_busqueda:
+                        resultados += _medir_busquedas(conn, db_name, scale_factor, terminos_busqueda,
+                                                       calentamiento, repeticiones)
+            except Exception as e:
+                print(f"ERROR al conectar con {db_name}: {e}")
+                resultados.append({"scale_factor": scale_factor, "motor": db_name, "error": str(e).strip()})
+
+    return {
+        "fecha_generacion": datetime.now().isoformat(),
+        "configuracion": {
+            "scale_factors": scale_factors,
+            "calentamiento": calentamiento,
+            "repeticiones": repeticiones,
+            "semilla": semilla,
+            "datos_preparados": preparar,
+            "instantaneas": usar_instantaneas,
+            "terminos_busqueda": list(terminos_busqueda or []),
+        },
+        "pool_conexiones": conexiones.estadisticas(),
+        "resultados": resultados,
+    }
+
+def comparar_informes(anterior, actual):
+    """Lista las mediciones cuyo plan cambió de forma o cuyo p50 empeoró más de UMBRAL_REGRESION."""
+    clave = lambda r: (r.get("scale_factor"), r.get("motor"), r.get("analisis"))
+    previos = {clave(r): r for r in anterior["resultados"] if "p50_ms" in r}
+    avisos = []
+    for r in actual["resultados"]:
+        previo = previos.get(clave(r))
+        if previo is None or "p50_ms" not in r:
+            continue
+        if r["firma_plan"] != previo["firma_plan"]:
+            avisos.append(f"{clave(r)}: el plan de ejecución ha cambiado")
+        if previo["p50_ms"] > 0 and r["p50_ms"] / previo["p50_ms"] > UMBRAL_REGRESION:
+            avisos.append(f"{clave(r)}: p50 {previo['p50_ms']} ms -> {r['p50_ms']} ms")
+    return avisos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los análisis en PostgreSQL, MySQL y MariaDB.")
+    parser.add_argument("--scale-factors", type=float, nargs="+", default=[1],
+                        help="Scale factors a medir; para cada uno se recrean y rellenan las bases.")
+    parser.add_argument("--calentamiento", type=int, default=2, help="Ejecuciones previas sin medir.")
+    parser.add_argument("--repeticiones", type=int, default=10, help="Ejecuciones medidas por análisis.")
+    parser.add_argument("--semilla", type=int, default=SEMILLA_POR_DEFECTO)
+    parser.add_argument("--sin-preparar", action="store_true",
+                        help="Mide los datos que ya hay cargados, sin recrear ni rellenar.")
+    parser.add_argument("--intermedios", default="intermedios",
+                        help="Directorio donde se guardan los datos generados por scale factor.")
+    parser.add_argument("--sin-instantaneas", action="store_true",
+                        help="Rellena siempre desde cero en vez de restaurar/capturar instantáneas.")
+    parser.add_argument("--busqueda", nargs="*", default=None, metavar="TERMINO",
+                        help="Mide también la búsqueda de texto completo (índice frente a LIKE) de estos "
+                             f"términos; sin términos usa {', '.join(TERMINOS_BUSQUEDA)}.")
+    parser.add_argument("--salida", default="benchmark.json", help="Fichero JSON del informe.")
+    parser.add_argument("--comparar", default=None, help="Informe anterior con el que buscar regresiones.")
+    args = parser.parse_args()
+
+    informe = ejecutar_benchmark(args.scale_factors, args.calentamiento, args.repeticiones,
+                                 args.semilla, not args.sin_preparar, args.intermedios,
+                                 not args.sin_instantaneas,
+                                 TERMINOS_BUSQUEDA if args.busqueda == [] else args.busqueda)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=4, default=str)
+    print(f"Informe del benchmark exportado a {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            avisos = comparar_informes(json.load(f), informe)
+        print(f"\n--- COMPARACIÓN CON {args.comparar} ---")
+        for aviso in avisos or ["Sin regresiones."]:
+            print(f"    {aviso}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# Búsqueda de texto completo en las descripciones de Reporte, los comentarios y
+# los mensajes de Alerta, con el índice nativo de cada motor:
+#   - PostgreSQL: índice GIN sobre to_tsvector('spanish', columna). Es un índice
+#     de expresión (no añade columnas): la consulta repite la misma expresión
+#     para que el planificador lo use. Lematiza en español ("reportes" encuentra
+#     "reporte") pero distingue tildes: la configuración spanish no las quita.
+#   - MySQL/MariaDB: índice FULLTEXT de InnoDB, en modo booleano con todos los
+#     términos obligatorios y como prefijo (+termino*), lo más parecido a la
+#     lematización que ofrece. Las palabras de menos de innodb_ft_min_token_size
+#     (3) letras no se indexan y se descartan de la búsqueda; la lista de
+#     palabras vacías por defecto es la inglesa.
+# En todos los motores una búsqueda exige todos los términos y ordena por
+# relevancia (ts_rank o MATCH ... AGAINST), así que los resultados son parecidos
+# pero no idénticos. metodo="like" hace la búsqueda ingenua (LIKE '%termino%' por
+# cada término, recorrido completo) como referencia para el benchmark.
+#
+# Los índices se crean después de la carga masiva (rellenarDatos, junto a los
+# índices secundarios) o con --crear-indices. En MySQL/MariaDB MATCH falla si no
+# existe el índice FULLTEXT.
+
+import argparse
+import re
+
+import mysql.connector
+import psycopg2
+
+from conexiones import DB_CONFIGS, conexion
+from crearBaseDeDatos import ER_DUP_KEYNAME
+
+# Tabla -> (columna de texto, expresión del reporte al que pertenece la fila)
+CAMPOS_BUSQUEDA = {
+    "Reporte": ("descripcion", "id"),
+    "Comentario": ("texto", "id_reporte"),
+    "Alerta": ("mensaje", "id_reporte"),
+}
+
+CONFIGURACION_PG = "spanish"
+
+# Longitud mínima de los términos en MySQL/MariaDB (innodb_ft_min_token_size por defecto)
+LONGITUD_MINIMA_MYSQL = 3
+
+LIMITE_POR_DEFECTO = 20
+
+# Caracteres de la columna de texto que se devuelven como fragmento
+LONGITUD_FRAGMENTO = 120
+
+
+def _driver(conn):
+    return "psycopg2" if isinstance(conn, psycopg2.extensions.connection) else "mysql"
+
+def _vector(columna):
+    return f"to_tsvector('{CONFIGURACION_PG}', COALESCE({columna}, ''))"
+
+def terminos(texto):
+    """Palabras de la búsqueda, sin operadores ni signos de puntuación."""
+    return re.findall(r"\w+", texto.lower())
+
+# --- ÍNDICES ---
+
+def indices_busqueda(driver):
+    """Sentencias CREATE INDEX de los índices de texto completo del motor."""
+    if driver == "psycopg2":
+        return [f"CREATE INDEX IF NOT EXISTS idx_fts_{tabla.lower()} ON {tabla} USING GIN ({_vector(columna)})"
+                for tabla, (columna, _) in CAMPOS_BUSQUEDA.items()]
+    # InnoDB reconstruye la tabla al crear su primer índice FULLTEXT (añade FTS_DOC_ID)
+    return [f"CREATE FULLTEXT INDEX idx_fts_{tabla.lower()} ON {tabla} ({columna})"
+            for tabla, (columna, _) in CAMPOS_BUSQUEDA.items()]
+
+def crear_indices_busqueda(cursor, conn):
+    """Crea los índices de texto completo que falten. Con la tabla ya cargada es
+    bastante más rápido que mantenerlos durante la carga."""
+    for sentencia in indices_busqueda(_driver(conn)):
+        try:
+            cursor.execute(sentencia)
+        except mysql.connector.Error as e:
+            if e.errno != ER_DUP_KEYNAME:
+                raise
+    conn.commit()
+
+# --- CONSULTAS ---
+
+def sql_busqueda(tabla, conn, texto, limite=LIMITE_POR_DEFECTO, metodo="indice"):
+    """(sql, parámetros) que devuelven (id, id_reporte, fragmento, relevancia) de las
+    filas de `tabla` que contienen todos los términos de `texto`, o None si no queda
+    ningún término buscable."""
+    if tabla not in CAMPOS_BUSQUEDA:
+        raise ValueError(f"No se puede buscar en {tabla}. Opciones: {', '.join(CAMPOS_BUSQUEDA)}")
+    columna, id_reporte = CAMPOS_BUSQUEDA[tabla]
+    driver = _driver(conn)
+    palabras = terminos(texto)
+    fragmento = f"SUBSTRING({columna}, 1, {LONGITUD_FRAGMENTO})"
+
+    if metodo == "like":
+        if not palabras:
+            return None
+        condiciones = " AND ".join(f"LOWER({columna}) LIKE %s" for _ in palabras)
+        sql = (f"SELECT id, {id_reporte}, {fragmento}, 1 FROM {tabla} "
+               f"WHERE {condiciones} ORDER BY id LIMIT {int(limite)}")
+        return sql, [f"%{p}%" for p in palabras]
+    if metodo != "indice":
+        raise ValueError(f"Método de búsqueda desconocido: {metodo}")
+
+    if driver == "psycopg2":
+        if not palabras:
+            return None
+        sql = (f"SELECT id, {id_reporte}, {fragmento}, ts_rank({_vector(columna)}, Q.consulta) "
+               f"FROM {tabla}, plainto_tsquery('{CONFIGURACION_PG}', %s) AS Q(consulta) "
+               f"WHERE {_vector(columna)} @@ Q.consulta "
+               f"ORDER BY 4 DESC, id LIMIT {int(limite)}")
+        return sql, [" ".join(palabras)]
+
+    palabras = [p for p in palabras if len(p) >= LONGITUD_MINIMA_MYSQL]
+    if not palabras:
+        return None
+    consulta = " ".join(f"+{p}*" for p in palabras)
+    sql = (f"SELECT id, {id_reporte}, {fragmento}, MATCH({columna}) AGAINST (%s IN BOOLEAN MODE) "
+           f"FROM {tabla} WHERE MATCH({columna}) AGAINST (%s IN BOOLEAN MODE) "
+           f"ORDER BY 4 DESC, id LIMIT {int(limite)}")
+    return sql, [consulta, consulta]
+
+def buscar(conn, texto, tablas=None, limite=LIMITE_POR_DEFECTO, metodo="indice"):
+    """Busca `texto` en las tablas indicadas (por defecto, todas).
+    Devuelve [(tabla, id, id_reporte, fragmento, relevancia), ...], hasta `limite` por tabla,
+    ordenado por relevancia dentro de cada tabla."""
+    resultados = []
+    cursor = conn.cursor()
+    try:
+        for tabla in tablas or CAMPOS_BUSQUEDA:
+            consulta = sql_busqueda(tabla, conn, texto, limite, metodo)
+            if consulta is None:
+                continue
+            cursor.execute(*consulta)
+            resultados += [(tabla, id_fila, id_reporte, fragmento, float(relevancia or 0))
+                           for id_fila, id_reporte, fragmento, relevancia in cursor.fetchall()]
+    finally:
+        cursor.close()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda de texto completo en reportes, comentarios y alertas.")
+    parser.add_argument("texto", nargs="?", default=None, help="Términos a buscar (todos obligatorios).")
+    parser.add_argument("--motores", nargs="+", choices=list(DB_CONFIGS), default=list(DB_CONFIGS))
+    parser.add_argument("--tablas", nargs="+", choices=list(CAMPOS_BUSQUEDA), default=None)
+    parser.add_argument("--limite", type=int, default=LIMITE_POR_DEFECTO, help="Resultados por tabla.")
+    parser.add_argument("--like", action="store_true", help="Busca con LIKE, sin los índices de texto completo.")
+    parser.add_argument("--crear-indices", action="store_true", help="Crea antes los índices de texto completo.")
+    args = parser.parse_args()
+    if args.texto is None and not args.crear_indices:
+        parser.error("indica un texto a buscar o --crear-indices")
+
+    for db_name in args.motores:
+        try:
+            with conexion(db_name) as conn:
+                if args.crear_indices:
+                    cursor = conn.cursor()
+                    crear_indices_busqueda(cursor, conn)
+                    cursor.close()
+                    print(f"{db_name}: índices de texto completo creados.")
+                if args.texto is None:
+                    continue
+                resultados = buscar(conn, args.texto, args.tablas, args.limite, "like" if args.like else "indice")
+            print(f"\n--- {db_name}: {len(resultados)} resultados para '{args.texto}' ---")
+            for tabla, id_fila, id_reporte, fragmento, relevancia in resultados:
+                print(f"    [{tabla} {id_fila}, reporte {id_reporte}] ({relevancia:.3f}) {fragmento}")
+        except Exception as e:
+            print(f"ERROR al buscar en {db_name}: {e}")
+
+if __name__ == "__main__":
+    main()
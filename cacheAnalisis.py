@@ -0,0 +1,83 @@
+# Caché de resultados de los análisis, indexada por marca de agua.
+#
+# La marca de agua de una tabla es (COUNT(*), MAX(id)): detecta inserciones y
+# borrados con una sola consulta barata por motor. Las actualizaciones en sitio
+# (p. ej. un Reporte que pasa a 'Cerrado') no cambian la marca, por eso cada
+# entrada caduca además a los TTL_CACHE segundos.
+
+import json
+import os
+import time
+
+# Tablas de las que depende cada análisis (si cambia alguna, se recalcula)
+TABLAS_ANALISIS = {
+    "analizar_postgresql": ("Zona", "Reporte"),
+    "analizar_mysql":      ("Usuario", "Reporte", "Comentario"),
+    "analizar_mariadb":    ("Zona", "Sensor", "RegistroSensor", "Reporte", "Alerta"),
+    "funcionConjunta":     ("Zona", "Reporte"),
+}
+
+RUTA_CACHE = ".cache_analisis.json"
+TTL_CACHE = 3600
+MAX_ENTRADAS_CACHE = 64
+
+
+def marca_agua(conn, tablas):
+    """Devuelve {tabla: [filas, id máximo]} con una única consulta."""
+    sql = " UNION ALL ".join(
+        f"SELECT '{tabla}', COUNT(*), MAX(id) FROM {tabla}" for tabla in tablas
+    )
+    cursor = conn.cursor()
+    cursor.execute(sql)
+    marca = {tabla: [filas, maximo] for tabla, filas, maximo in cursor.fetchall()}
+    cursor.close()
+    return marca
+
+
+class CacheAnalisis:
+    """Caché persistente en un fichero JSON.
+    Cada entrada guarda la marca de agua con la que se calculó el resultado."""
+
+    def __init__(self, ruta=RUTA_CACHE, ttl=TTL_CACHE, max_entradas=MAX_ENTRADAS_CACHE):
+        self.ruta = ruta
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.entradas = {}
+        if os.path.exists(ruta):
+            try:
+                with open(ruta, encoding="utf-8") as f:
+                    self.entradas = json.load(f)
+            except (OSError, ValueError):
+                # Una caché ilegible se descarta: solo cuesta recalcular
+                self.entradas = {}
+
+    def obtener(self, clave, marca):
+        """Resultado guardado para `clave` si sigue vigente con `marca`; si no, None."""
+        entrada = self.entradas.get(clave)
+        if entrada is None:
+            return None
+        if entrada["marca"] != marca or time.time() - entrada["creado"] > self.ttl:
+            del self.entradas[clave]
+            return None
+        entrada["usado"] = time.time()
+        return entrada["resultado"]
+
+    def guardar(self, clave, marca, resultado):
+        ahora = time.time()
+        self.entradas[clave] = {"marca": marca, "creado": ahora, "usado": ahora, "resultado": resultado}
+
+    def purgar(self):
+        """Elimina las entradas caducadas y, si sobran, las usadas hace más tiempo."""
+        ahora = time.time()
+        self.entradas = {c: e for c, e in self.entradas.items() if ahora - e["creado"] <= self.ttl}
+        if len(self.entradas) > self.max_entradas:
+            recientes = sorted(self.entradas.items(), key=lambda item: item[1]["usado"], reverse=True)
+            self.entradas = dict(recientes[:self.max_entradas])
+
+    def persistir(self):
+        """Purga y escribe la caché de forma atómica (fichero temporal + rename)."""
+        self.purgar()
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self.entradas, f, ensure_ascii=False, default=str)
+        os.replace(temporal, self.ruta)
@@ -0,0 +1,352 @@
+import contextlib
+import csv
+import itertools
+import mmap
+import os
+import tempfile
+
+import mysql.connector
+import psycopg2
+import psycopg2.extras
+
+# --- CONFIGURACIÓN DE LA CARGA MASIVA ---
+# Modos de carga disponibles:
+#   - "executemany": la ruta original (en psycopg2 supone un INSERT por fila).
+#   - "nativo": COPY ... FROM STDIN en PostgreSQL y LOAD DATA LOCAL INFILE en MySQL/MariaDB.
+#   - "valores": INSERT multi-fila por páginas; en psycopg2 con execute_values,
+#     en mysql-connector con executemany (que ya lo reescribe así).
+MODOS_CARGA = ("executemany", "nativo", "valores")
+
+# Filas por fichero temporal de LOAD DATA (y por lote del INSERT multi-fila de respaldo)
+TAM_LOTE_CARGA = 50000
+
+# Filas por sentencia INSERT multi-fila del modo "valores"
+TAM_PAGINA_VALORES = 1000
+
+# Tamaño de bloque (caracteres) que psycopg2 pide en cada lectura durante el COPY
+TAM_BLOQUE_COPY = 1 << 16
+
+# Errores de MySQL que indican que LOAD DATA LOCAL está desactivado en cliente o servidor
+ERRORES_LOCAL_INFILE = (1148, 2068, 3948)
+
+
+def es_postgresql(conn):
+    """Indica si la conexión es de psycopg2 (PostgreSQL)."""
+    return isinstance(conn, psycopg2.extensions.connection)
+
+# --- SERIALIZACIÓN CSV ---
+
+def _valor_csv_pg(valor):
+    """Formatea un valor para COPY ... WITH (FORMAT csv). NULL es el campo vacío sin comillas."""
+    if valor is None:
+        return ""
+    if isinstance(valor, str):
+        return '"' + valor.replace('"', '""') + '"'
+    return str(valor)
+
+def _valor_csv_mysql(valor):
+    """Formatea un valor para LOAD DATA con ENCLOSED BY '"' y ESCAPED BY '\\'."""
+    if valor is None:
+        return "\\N"
+    if isinstance(valor, str):
+        escapado = (valor.replace("\\", "\\\\").replace('"', '\\"')
+                         .replace("\n", "\\n").replace("\r", "\\r"))
+        return '"' + escapado + '"'
+    return str(valor)
+
+
+class _FlujoCSV:
+    """Objeto tipo fichero que serializa las filas a CSV a medida que COPY las lee."""
+
+    def __init__(self, filas, formatear):
+        self._lineas = (",".join(map(formatear, fila)) + "\n" for fila in filas)
+        self._pendiente = ""
+        self.bytes = 0
+
+    def read(self, size=-1):
+        partes = [self._pendiente]
+        total = len(self._pendiente)
+        while size < 0 or total < size:
+            linea = next(self._lineas, None)
+            if linea is None:
+                break
+            partes.append(linea)
+            total += len(linea)
+            self.bytes += len(linea.encode("utf-8"))
+        datos = "".join(partes)
+        if size < 0:
+            self._pendiente = ""
+            return datos
+        self._pendiente = datos[size:]
+        return datos[:size]
+
+def _bytes_estimados(lote):
+    """Bytes de los valores de `lote` escritos como literales SQL: "(v1,v2,...),".
+    Estimación de lo que envían las rutas basadas en INSERT, sin el texto de la sentencia."""
+    return sum(len(",".join(map(_valor_csv_pg, fila)).encode("utf-8")) + 3 for fila in lote)
+
+# --- RUTAS DE CARGA ---
+
+def _insertar_executemany(cursor, tabla, columnas, filas):
+    """executemany en lotes de TAM_LOTE_CARGA para no materializar todas las filas.
+    Devuelve los bytes estimados de los valores enviados."""
+    marcadores = ", ".join(["%s"] * len(columnas))
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores})"
+    iterador = iter(filas)
+    enviados = 0
+    while True:
+        lote = list(itertools.islice(iterador, TAM_LOTE_CARGA))
+        if not lote:
+            return enviados
+        cursor.executemany(sql, lote)
+        enviados += _bytes_estimados(lote)
+
+def _insertar_valores(cursor, conn, tabla, columnas, filas, tam_pagina=TAM_PAGINA_VALORES):
+    """INSERT multi-fila de `tam_pagina` filas por sentencia. Devuelve los bytes estimados enviados."""
+    if es_postgresql(conn):
+        sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES %s"
+        ejecutar = lambda lote: psycopg2.extras.execute_values(cursor, sql, lote, page_size=tam_pagina)
+    else:
+        marcadores = ", ".join(["%s"] * len(columnas))
+        sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores})"
+        ejecutar = lambda lote: cursor.executemany(sql, lote)
+    enviados = 0
+    iterador = iter(filas)
+    while True:
+        lote = list(itertools.islice(iterador, tam_pagina))
+        if not lote:
+            return enviados
+        ejecutar(lote)
+        enviados += _bytes_estimados(lote)
+
+def _copy_postgresql(cursor, tabla, columnas, filas):
+    sql = f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)"
+    flujo = _FlujoCSV(filas, _valor_csv_pg)
+    cursor.copy_expert(sql, flujo, size=TAM_BLOQUE_COPY)
+    return flujo.bytes
+
+def _load_data_mysql(cursor, tabla, columnas, filas):
+    """LOAD DATA LOCAL INFILE por lotes de ficheros temporales.
+    Si el servidor no admite local_infile se recurre a INSERT multi-fila.
+    Devuelve los bytes de los ficheros enviados por LOAD DATA (estimados en el respaldo)."""
+    iterador = iter(filas)
+    usar_load_data = True
+    enviados = 0
+    while True:
+        lote = list(itertools.islice(iterador, TAM_LOTE_CARGA))
+        if not lote:
+            return enviados
+
+        if not usar_load_data:
+            # mysql-connector reescribe executemany como un único INSERT multi-fila
+            enviados += _insertar_executemany(cursor, tabla, columnas, lote)
+            continue
+
+        fd, ruta = tempfile.mkstemp(suffix=".csv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                for fila in lote:
+                    f.write(",".join(map(_valor_csv_mysql, fila)) + "\n")
+            sql = (
+                f"LOAD DATA LOCAL INFILE '{ruta.replace(os.sep, '/')}' INTO TABLE {tabla} "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '\\\\' "
+                "LINES TERMINATED BY '\\n' "
+                f"({', '.join(columnas)})"
+            )
+            try:
+                cursor.execute(sql)
+            except mysql.connector.Error as e:
+                if e.errno not in ERRORES_LOCAL_INFILE:
+                    raise
+                print(f"    AVISO: LOAD DATA LOCAL no disponible en {tabla} ({e.msg}); se usan INSERT multi-fila.")
+                usar_load_data = False
+                enviados += _insertar_executemany(cursor, tabla, columnas, lote)
+                continue
+            enviados += os.path.getsize(ruta)
+            # Con LOCAL, los duplicados y errores de conversión se degradan a avisos
+            if cursor.rowcount != len(lote):
+                print(f"    AVISO: LOAD DATA en {tabla} cargó {cursor.rowcount} de {len(lote)} filas.")
+        finally:
+            os.remove(ruta)
+
+
+def insertar_filas(cursor, conn, tabla, columnas, filas, modo="executemany"):
+    """Inserta `filas` (iterable de tuplas en el orden de `columnas`) en `tabla`.
+    No hace commit: la transacción la gestiona quien llama.
+    Devuelve los bytes enviados: exactos en la vía nativa (CSV de COPY/LOAD DATA) y
+    estimados a partir de los valores con executemany y valores."""
+    if modo == "executemany":
+        return _insertar_executemany(cursor, tabla, columnas, filas)
+    if modo == "nativo":
+        if es_postgresql(conn):
+            return _copy_postgresql(cursor, tabla, columnas, filas)
+        return _load_data_mysql(cursor, tabla, columnas, filas)
+    if modo == "valores":
+        return _insertar_valores(cursor, conn, tabla, columnas, filas)
+    raise ValueError(f"Modo de carga desconocido: {modo}. Opciones: {', '.join(MODOS_CARGA)}")
+
+
+# --- FICHEROS CSV INTERMEDIOS ---
+# Formato común que leen tanto COPY (FORMAT csv, NULL 'NULL') como LOAD DATA
+# (OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''): los textos van siempre entre
+# comillas dobles, duplicándolas dentro; NULL es la palabra NULL sin comillas.
+
+def _valor_csv_intermedio(valor):
+    if valor is None:
+        return "NULL"
+    if isinstance(valor, str):
+        return '"' + valor.replace('"', '""') + '"'
+    return str(valor)
+
+def escribir_csv(ruta, filas):
+    """Escribe `filas` en `ruta` en el formato intermedio. Devuelve cuántas escribió."""
+    total = 0
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        for fila in filas:
+            f.write(",".join(map(_valor_csv_intermedio, fila)) + "\n")
+            total += 1
+    return total
+
+def cargar_csv(cursor, conn, tabla, columnas, ruta):
+    """Carga un fichero en formato intermedio con la vía nativa del motor.
+    En PostgreSQL el fichero se mapea en memoria y se envía por COPY ... FROM STDIN.
+    Devuelve el tamaño del fichero en bytes."""
+    tamano = os.path.getsize(ruta)
+    if tamano == 0:
+        return 0
+    if es_postgresql(conn):
+        sql = f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv, NULL 'NULL')"
+        with open(ruta, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            cursor.copy_expert(sql, datos, size=TAM_BLOQUE_COPY)
+        return tamano
+
+    sql = (
+        f"LOAD DATA LOCAL INFILE '{os.path.abspath(ruta).replace(os.sep, '/')}' INTO TABLE {tabla} "
+        "CHARACTER SET utf8mb4 "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+        "LINES TERMINATED BY '\\n' "
+        f"({', '.join(columnas)})"
+    )
+    try:
+        cursor.execute(sql)
+    except mysql.connector.Error as e:
+        if e.errno not in ERRORES_LOCAL_INFILE:
+            raise
+        print(f"    AVISO: LOAD DATA LOCAL no disponible en {tabla} ({e.msg}); se usan INSERT multi-fila.")
+        with open(ruta, encoding="utf-8", newline="") as f:
+            _insertar_executemany(cursor, tabla, columnas, csv.reader(f))
+    return tamano
+
+
+# --- MODO DE CARGA RÁPIDA ---
+# Relaja las comprobaciones del motor mientras dura la carga y las restaura y
+# valida al terminar, de modo que el esquema nunca queda más débil:
+#   - MySQL/MariaDB: foreign_key_checks=0 y unique_checks=0 en la sesión. Al
+#     salir se reactivan y se buscan huérfanos de cada FK y duplicados de cada
+#     índice único (InnoDB no revisa lo cargado mientras estaban desactivadas).
+#   - PostgreSQL: synchronous_commit=off, se eliminan las FKs y las tablas pasan
+#     a UNLOGGED. Al salir vuelven a LOGGED y las FKs se recrean con su
+#     definición original (pg_get_constraintdef), lo que valida todas las filas.
+# Las FKs y el modo UNLOGGED son cambios de esquema: usar solo sobre una base
+# que nadie más esté escribiendo, como durante el relleno inicial.
+
+def _violaciones_mysql(cursor):
+    """Huérfanos por FK y duplicados por índice único de la base actual."""
+    violaciones = []
+    cursor.execute(
+        "SELECT TABLE_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME "
+        "FROM information_schema.KEY_COLUMN_USAGE "
+        "WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL"
+    )
+    for tabla, columna, tabla_ref, columna_ref in cursor.fetchall():
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {tabla} H LEFT JOIN {tabla_ref} P ON H.{columna} = P.{columna_ref} "
+            f"WHERE H.{columna} IS NOT NULL AND P.{columna_ref} IS NULL"
+        )
+        huerfanos = cursor.fetchall()[0][0]
+        if huerfanos:
+            violaciones.append(f"{tabla}.{columna}: {huerfanos} filas sin {tabla_ref}.{columna_ref}")
+
+    cursor.execute(
+        "SELECT TABLE_NAME, INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) "
+        "FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND NON_UNIQUE = 0 AND INDEX_NAME <> 'PRIMARY' "
+        "GROUP BY TABLE_NAME, INDEX_NAME"
+    )
+    for tabla, indice, columnas in cursor.fetchall():
+        cursor.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM {tabla} GROUP BY {columnas} HAVING COUNT(*) > 1) D")
+        duplicados = cursor.fetchall()[0][0]
+        if duplicados:
+            violaciones.append(f"{tabla}.{indice}: {duplicados} valores duplicados")
+    return violaciones
+
+def _fks_postgresql(cursor):
+    """(tabla, nombre, definición) de cada FK del esquema public."""
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) "
+        "FROM pg_constraint WHERE contype = 'f' AND connamespace = 'public'::regnamespace "
+        # Las FKs heredadas por las particiones se eliminan y recrean con la del padre
+        "AND conparentid = 0 "
+        "ORDER BY conrelid::regclass::text, conname"
+    )
+    return cursor.fetchall()
+
+def _tablas_postgresql(cursor):
+    """Tablas con datos del esquema public (las particionadas, a través de sus particiones)."""
+    cursor.execute(
+        "SELECT c.oid::regclass::text FROM pg_class c "
+        "WHERE c.relnamespace = 'public'::regnamespace AND c.relkind = 'r' ORDER BY 1"
+    )
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+@contextlib.contextmanager
+def sesion_carga_rapida(conn):
+    """Ejecuta el bloque con las comprobaciones relajadas; al salir las restaura y valida.
+    Si la validación encuentra filas inválidas se lanza ValueError."""
+    cursor = conn.cursor()
+    if not es_postgresql(conn):
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        cursor.execute("SET SESSION unique_checks = 0")
+        try:
+            yield
+        finally:
+            cursor.execute("SET SESSION foreign_key_checks = 1")
+            cursor.execute("SET SESSION unique_checks = 1")
+        violaciones = _violaciones_mysql(cursor)
+        cursor.close()
+        if violaciones:
+            raise ValueError("restricciones incumplidas tras la carga rápida: " + "; ".join(violaciones))
+        return
+
+    cursor.execute("SET synchronous_commit = off")
+    fks = _fks_postgresql(cursor)
+    tablas = _tablas_postgresql(cursor)
+    for tabla, nombre, _ in fks:
+        cursor.execute(f'ALTER TABLE {tabla} DROP CONSTRAINT "{nombre}"')
+    for tabla in tablas:
+        cursor.execute(f"ALTER TABLE {tabla} SET UNLOGGED")
+    conn.commit()
+    try:
+        yield
+    finally:
+        # Si el bloque falló, la transacción puede estar abortada
+        conn.rollback()
+        for tabla in tablas:
+            cursor.execute(f"ALTER TABLE {tabla} SET LOGGED")
+        conn.commit()
+        violaciones = []
+        for tabla, nombre, definicion in fks:
+            try:
+                # Recrear la FK comprueba todas las filas existentes
+                cursor.execute(f'ALTER TABLE {tabla} ADD CONSTRAINT "{nombre}" {definicion}')
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                violaciones.append(f"{tabla}.{nombre}: {str(e).strip()}")
+        cursor.execute("SET synchronous_commit = DEFAULT")
+        conn.commit()
+        cursor.close()
+    if violaciones:
+        raise ValueError("restricciones incumplidas tras la carga rápida: " + "; ".join(violaciones))
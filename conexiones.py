@@ -0,0 +1,359 @@
+# Capa de conexión común a crearBaseDeDatos, rellenarDatos y obtenerDatosImportantes.
+#
+# Mantiene un pool acotado por motor (psycopg2.pool en PostgreSQL,
+# mysql.connector.pooling en MySQL/MariaDB). Los pools se crean al primer uso
+# y por proceso: un proceso hijo nunca reutiliza los sockets heredados del padre.
+# Cada préstamo se cronometra para poder consultar latencia y ocupación.
+# Con sentencias_cronometradas, además, cada sentencia que ejecute una conexión
+# se observa en el histograma sentencia_segundos de metricas.
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+import mysql.connector.pooling
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+import metricas
+
+# --- CONFIGURACIÓN DE CONEXIÓN ---
+DB_CREDS = {
+    "host": "localhost",
+    "user": "user",
+    "password": "user123",
+    "database": "negocio"
+}
+
+# Puertos configurados en Docker para cada motor.
+# initial_db: base a la que conectarse para crear/eliminar "negocio".
+DB_CONFIGS = {
+    "PostgreSQL": {"port": 5432, "driver": "psycopg2", "initial_db": "postgres"},
+    "MySQL":      {"port": 3306, "driver": "mysql", "initial_db": None},
+    "MariaDB":    {"port": 3308, "driver": "mysql", "initial_db": None},
+}
+
+# Conexiones máximas por motor y proceso (mysql.connector admite hasta 32)
+TAM_POOL = 4
+
+# Filas por viaje al servidor al leer en streaming
+TAM_LOTE_STREAMING = 10000
+
+_pools = {}
+_cerrojo = threading.Lock()
+
+
+def conectar_servidor(config):
+    """Conexión directa (sin pool) a la base inicial del servidor, para crear o borrar la base."""
+    credenciales = {c: v for c, v in DB_CREDS.items() if c != "database"}
+    if config["driver"] == "psycopg2":
+        return psycopg2.connect(**credenciales, port=config["port"], database=config["initial_db"])
+    return mysql.connector.connect(**credenciales, port=config["port"])
+
+
+class _PoolMotor:
+    """Pool acotado de un motor: si todas las conexiones están prestadas, se espera."""
+
+    def __init__(self, db_name, config, tam):
+        self.db_name = db_name
+        self.tam = tam
+        self.es_postgresql = config["driver"] == "psycopg2"
+        self._libres = threading.BoundedSemaphore(tam)
+        if self.es_postgresql:
+            self._pool = psycopg2.pool.ThreadedConnectionPool(0, tam, **DB_CREDS, port=config["port"])
+        else:
+            # allow_local_infile habilita LOAD DATA LOCAL en el modo de carga nativo
+            self._pool = mysql.connector.pooling.MySQLConnectionPool(
+                pool_name=f"negocio_{db_name}_{os.getpid()}", pool_size=tam,
+                **DB_CREDS, port=config["port"], allow_local_infile=True,
+            )
+        # Estadísticas de préstamo
+        self.prestamos = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.en_uso = 0
+        self.pico_en_uso = 0
+        self.descartadas = 0
+
+    def _conexion_sana_postgresql(self):
+        """Saca una conexión del pool comprobando que sigue viva (SELECT 1)."""
+        while True:
+            conn = self._pool.getconn()
+            try:
+                if not conn.closed:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT 1")
+                    cursor.close()
+                    conn.rollback()
+                    return conn
+            except psycopg2.Error:
+                pass
+            # Conexión muerta (p. ej. tras DROP DATABASE ... WITH (FORCE)): se descarta
+            self.descartadas += 1
+            self._pool.putconn(conn, close=True)
+
+    def prestar(self):
+        inicio = time.perf_counter()
+        self._libres.acquire()
+        try:
+            if self.es_postgresql:
+                conn = self._conexion_sana_postgresql()
+            else:
+                # get_connection ya comprueba is_connected() y reconecta si hace falta
+                conn = self._pool.get_connection()
+        except BaseException:
+            self._libres.release()
+            raise
+        espera = time.perf_counter() - inicio
+        with _cerrojo:
+            self.prestamos += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+            self.en_uso += 1
+            self.pico_en_uso = max(self.pico_en_uso, self.en_uso)
+        return conn
+
+    def devolver(self, conn):
+        try:
+            if self.es_postgresql:
+                # putconn hace rollback de la transacción abierta, si la hay
+                if conn.autocommit:
+                    conn.autocommit = False
+                self._pool.putconn(conn, close=bool(conn.closed))
+            else:
+                # En una conexión del pool, close() la devuelve al pool
+                conn.close()
+        finally:
+            with _cerrojo:
+                self.en_uso -= 1
+            self._libres.release()
+
+    def cerrar(self):
+        if self.es_postgresql:
+            self._pool.closeall()
+            return
+        # mysql.connector no expone un cierre del pool. _remove_connections (privado)
+        # desconecta las de la cola; si una versión futura lo quita, se sacan con la API
+        # pública y se desconectan una a una (disconnect llega a la conexión real).
+        quitar = getattr(self._pool, "_remove_connections", None)
+        if callable(quitar):
+            quitar()
+            return
+        for _ in range(self.tam):
+            try:
+                conn = self._pool.get_connection()
+            except mysql.connector.Error:
+                # Cola vacía (PoolError) o conexión que ya no puede reconectar
+                break
+            try:
+                conn.disconnect()
+            except mysql.connector.Error:
+                pass
+
+    def estadisticas(self):
+        return {
+            "tam_pool": self.tam,
+            "prestamos": self.prestamos,
+            "espera_media_ms": round(self.espera_total / self.prestamos * 1000, 3) if self.prestamos else 0.0,
+            "espera_maxima_ms": round(self.espera_maxima * 1000, 3),
+            "en_uso": self.en_uso,
+            "pico_en_uso": self.pico_en_uso,
+            "utilizacion_pico": round(self.pico_en_uso / self.tam, 2),
+            "descartadas": self.descartadas,
+        }
+
+
+def _pool(db_name):
+    clave = (os.getpid(), db_name)
+    with _cerrojo:
+        if clave not in _pools:
+            _pools[clave] = _PoolMotor(db_name, DB_CONFIGS[db_name], TAM_POOL)
+        return _pools[clave]
+
+
+@contextmanager
+def conexion(db_name):
+    """Presta una conexión del pool de `db_name` y la devuelve al salir del bloque."""
+    pool = _pool(db_name)
+    conn = pool.prestar()
+    try:
+        yield conn
+    finally:
+        pool.devolver(conn)
+
+
+def estadisticas():
+    """Estadísticas de los pools de este proceso, por motor."""
+    return {db_name: pool.estadisticas() for (pid, db_name), pool in _pools.items() if pid == os.getpid()}
+
+
+def cerrar_pools(db_name=None):
+    """Cierra los pools de este proceso (todos o el de `db_name`).
+    Necesario tras recrear la base: las conexiones existentes apuntan a la anterior."""
+    with _cerrojo:
+        for clave in [c for c in _pools if c[0] == os.getpid() and db_name in (None, c[1])]:
+            _pools.pop(clave).cerrar()
+
+
+# --- CRONOMETRADO DE SENTENCIAS ---
+# Una observación por sentencia: desde execute hasta la siguiente sentencia o el
+# cierre del cursor, sumando solo el tiempo pasado dentro de execute y fetch*
+# (lo que tarda quien consume las filas no cuenta). La etiqueta "sentencia" es
+# el verbo y la primera tabla (p. ej. "INSERT ResumenZona"): acotada aunque el
+# SQL lleve ids incrustados.
+
+_TABLA_SENTENCIA = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE|TABLES)\s+([A-Za-z_]\w*)", re.I)
+
+def tipo_sentencia(sql):
+    """Verbo y primera tabla de `sql`, como etiqueta del histograma."""
+    palabras = sql.split(None, 1)
+    if not palabras:
+        return ""
+    tabla = _TABLA_SENTENCIA.search(sql)
+    return palabras[0].upper() + (f" {tabla.group(1)}" if tabla else "")
+
+
+class _Medida:
+    """Acumula el tiempo de la sentencia en curso de un cursor y lo observa al acabar."""
+
+    def _empezar(self, sql):
+        self._terminar()
+        self._sentencia = tipo_sentencia(sql if isinstance(sql, str) else sql.decode())
+        self._segundos = 0.0
+
+    def _sumar(self, inicio):
+        self._segundos += time.perf_counter() - inicio
+
+    def _terminar(self):
+        if getattr(self, "_sentencia", None) is not None:
+            metricas.observar("sentencia_segundos", self._segundos, sentencia=self._sentencia, **self.etiquetas)
+            self._sentencia = None
+
+
+class _CursorCronometradoPG(_Medida, psycopg2.extensions.cursor):
+    etiquetas = {}
+
+    def execute(self, sql, parametros=None):
+        self._empezar(sql)
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            self._sumar(inicio)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._sumar(inicio)
+
+    def fetchmany(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return super().fetchmany(*args, **kwargs)
+        finally:
+            self._sumar(inicio)
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._sumar(inicio)
+
+    def close(self):
+        self._terminar()
+        super().close()
+
+
+class _CursorCronometradoMySQL(_Medida):
+    """Envoltorio de un cursor de mysql-connector (su clase depende de la extensión C)."""
+
+    def __init__(self, cursor, etiquetas):
+        self._cursor = cursor
+        self.etiquetas = etiquetas
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def execute(self, sql, parametros=None):
+        self._empezar(sql)
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, parametros)
+        finally:
+            self._sumar(inicio)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.fetchone()
+        finally:
+            self._sumar(inicio)
+
+    def fetchmany(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.fetchmany(*args, **kwargs)
+        finally:
+            self._sumar(inicio)
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.fetchall()
+        finally:
+            self._sumar(inicio)
+
+    def close(self):
+        self._terminar()
+        return self._cursor.close()
+
+
+@contextmanager
+def sentencias_cronometradas(conn, **etiquetas):
+    """Durante el bloque, los cursores que se abran en `conn` observan cada sentencia
+    en sentencia_segundos con estas etiquetas (p. ej. analisis=..., motor=...).
+    La conexión sigue siendo la misma: las comprobaciones de tipo del driver no cambian."""
+    if isinstance(conn, psycopg2.extensions.connection):
+        anterior = conn.cursor_factory
+        conn.cursor_factory = type("CursorCronometrado", (_CursorCronometradoPG,), {"etiquetas": etiquetas})
+        try:
+            yield conn
+        finally:
+            conn.cursor_factory = anterior
+        return
+    # mysql-connector no tiene fábrica de cursores por conexión: se tapa cursor() en la instancia
+    original = conn.cursor
+    conn.cursor = lambda *args, **kwargs: _CursorCronometradoMySQL(original(*args, **kwargs), etiquetas)
+    try:
+        yield conn
+    finally:
+        del conn.cursor
+
+
+# --- LECTURA EN STREAMING ---
+
+def filas_en_streaming(conn, sql, nombre_cursor, lote=TAM_LOTE_STREAMING):
+    """Itera el resultado de `sql` sin cargarlo entero en memoria.
+    En PostgreSQL usa un cursor con nombre (del lado del servidor)."""
+    if isinstance(conn, psycopg2.extensions.connection):
+        cursor = conn.cursor(name=nombre_cursor)
+        cursor.itersize = lote
+    else:
+        # El cursor por defecto de mysql-connector no almacena el resultado
+        cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
+        while True:
+            filas = cursor.fetchmany(lote)
+            if not filas:
+                break
+            yield from filas
+    finally:
+        cursor.close()
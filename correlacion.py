@@ -0,0 +1,96 @@
+# Motor de correlación Sensor-Reporte por ventana temporal.
+#
+# Calcula lo mismo que la consulta original de analizar_mariadb (reportes
+# distintos con alguna alerta cuya fechaHora cae en los 2 días anteriores a
+# algún registro de un sensor de su misma zona, agrupados por nombre de zona y
+# tipo de sensor) sin el join RegistroSensor x Reporte, que crece de forma
+# cuadrática con el número de registros.
+#
+# Algoritmo (sort-merge con ventana deslizante):
+#   1. Se leen los reportes con alerta, ordenados por zona y fecha.
+#   2. Se recorren en streaming los registros ordenados por (zona, tipo, fecha).
+#   3. Para cada grupo (zona, tipo), un puntero avanza sobre los reportes de la
+#      zona: un registro en r cubre los reportes con fecha en [r - 2 días, r].
+#      Como r solo crece, cada reporte se visita una vez por grupo.
+# Coste: O(registros + reportes x tipos de sensor) tras la ordenación en el servidor.
+
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from conexiones import filas_en_streaming
+
+VENTANA_CORRELACION = timedelta(days=2)
+
+# Los JOIN Zona y los IS NOT NULL reproducen los filtros implícitos del join
+# original: zonas NULL o inexistentes y fechas NULL nunca emparejan.
+SQL_REPORTES_CON_ALERTA = """
+    SELECT R.id_zona, R.fechaHora
+    FROM Reporte R
+    JOIN Zona Z ON Z.id = R.id_zona
+    WHERE R.fechaHora IS NOT NULL
+      AND EXISTS (SELECT 1 FROM Alerta A WHERE A.id_reporte = R.id)
+    ORDER BY R.id_zona, R.fechaHora
+"""
+
+SQL_REGISTROS_ORDENADOS = """
+    SELECT S.id_zona, S.tipo, RS.fecha
+    FROM RegistroSensor RS
+    JOIN Sensor S ON RS.id_sensor = S.id
+    JOIN Zona Z ON Z.id = S.id_zona
+    WHERE RS.fecha IS NOT NULL
+    ORDER BY S.id_zona, S.tipo, RS.fecha
+"""
+
+SQL_NOMBRES_ZONA = "SELECT id, nombre FROM Zona"
+
+
+def _contar_cubiertos(fechas_reportes, fechas_registros, ventana):
+    """Cuántas fechas de reporte tienen algún registro en [fecha, fecha + ventana].
+    Ambas secuencias deben venir ordenadas."""
+    cubiertos = 0
+    j, m = 0, len(fechas_reportes)
+    for r in fechas_registros:
+        if j == m:
+            break
+        desde = r - ventana
+        while j < m and fechas_reportes[j] < desde:
+            j += 1
+        while j < m and fechas_reportes[j] <= r:
+            cubiertos += 1
+            j += 1
+    return cubiertos
+
+
+def correlacion_ventana(conn, limite=5, ventana=VENTANA_CORRELACION):
+    """Devuelve [(zona, tipo_sensor, reportes_cercanos), ...] con los `limite` mayores."""
+    # 1. Reportes con alerta agrupados por zona (ya ordenados por fecha)
+    reportes_por_zona = defaultdict(list)
+    for id_zona, fecha in filas_en_streaming(conn, SQL_REPORTES_CON_ALERTA, "correlacion_reportes"):
+        reportes_por_zona[id_zona].append(fecha)
+
+    # 2. Registros en streaming, un grupo (zona, tipo) cada vez
+    conteos = defaultdict(int)
+    registros = filas_en_streaming(conn, SQL_REGISTROS_ORDENADOS, "correlacion_registros")
+    for (id_zona, tipo), grupo in groupby(registros, key=itemgetter(0, 1)):
+        fechas_reportes = reportes_por_zona.get(id_zona)
+        if not fechas_reportes:
+            continue
+        cubiertos = _contar_cubiertos(fechas_reportes, map(itemgetter(2), grupo), ventana)
+        if cubiertos:
+            conteos[(id_zona, tipo)] += cubiertos
+
+    # 3. La consulta original agrupa por nombre de zona, no por id
+    cursor = conn.cursor()
+    cursor.execute(SQL_NOMBRES_ZONA)
+    nombres = dict(cursor.fetchall())
+    cursor.close()
+
+    por_nombre = defaultdict(int)
+    for (id_zona, tipo), cubiertos in conteos.items():
+        por_nombre[(nombres.get(id_zona), tipo)] += cubiertos
+
+    mejores = heapq.nlargest(limite, por_nombre.items(), key=itemgetter(1))
+    return [(zona, tipo, total) for (zona, tipo), total in mejores]
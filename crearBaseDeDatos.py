@@ -1,21 +1,16 @@
+import argparse
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
 import mysql.connector
 import psycopg2
 
-# --- CONFIGURACIÓN DE CONEXIÓN ÚNICA ---
-# Usuario y contraseña definidos por el usuario, asumimos permisos de creación de DB.
-SERVER_CREDS = {
-    "host": "localhost",
-    "user": "user",
-    "password": "user123",
-    "db_name": "negocio"
-}
+from conexiones import DB_CONFIGS, DB_CREDS, cerrar_pools, conectar_servidor, conexion
 
-# Puertos configurados en Docker para cada motor
-SERVER_CONFIGS = {
-    "PostgreSQL": {"port": 5432, "driver": "psycopg2", "initial_db": "postgres"},
-    "MySQL":      {"port": 3306, "driver": "mysql", "initial_db": None}, 
-    "MariaDB":    {"port": 3308, "driver": "mysql", "initial_db": None},
-}
+# --- CONFIGURACIÓN DE CONEXIÓN ÚNICA ---
+# Credenciales y puertos en conexiones.py; asumimos permisos de creación de DB.
+DB_NAME = DB_CREDS["database"]
 
 # --- SENTENCIAS SQL (MySQL / MariaDB) ---
 # Usadas en los puertos 3306 y 3308.
@@ -122,6 +117,42 @@ CREATE TABLE IF NOT EXISTS Informe (
     fuentes TEXT,
     FOREIGN KEY (id_indicador) REFERENCES Indicador(id) ON DELETE CASCADE
 );
+-- Resúmenes de RegistroSensor por sensor y hora/día (los mantiene rollupSensores.py)
+CREATE TABLE IF NOT EXISTS RegistroSensorHora (
+    id_sensor INT NOT NULL,
+    periodo DATETIME NOT NULL,
+    minimo DECIMAL(10,2),
+    maximo DECIMAL(10,2),
+    suma DECIMAL(20,2),
+    cuenta BIGINT,
+    PRIMARY KEY (id_sensor, periodo)
+);
+CREATE TABLE IF NOT EXISTS RegistroSensorDia (
+    id_sensor INT NOT NULL,
+    periodo DATETIME NOT NULL,
+    minimo DECIMAL(10,2),
+    maximo DECIMAL(10,2),
+    suma DECIMAL(20,2),
+    cuenta BIGINT,
+    PRIMARY KEY (id_sensor, periodo)
+);
+-- Último id de cada tabla de origen (RegistroSensor, Reporte, Comentario) incorporado a los resúmenes
+CREATE TABLE IF NOT EXISTS MarcaRollup (
+    tabla VARCHAR(50) PRIMARY KEY,
+    ultimo_id INT NOT NULL
+);
+-- Conteos por zona y por usuario de los análisis de Reporte (los mantiene resumenReportes.py)
+CREATE TABLE IF NOT EXISTS ResumenZona (
+    id_zona INT PRIMARY KEY,
+    reportes_criticos BIGINT NOT NULL DEFAULT 0,
+    reportes_alta BIGINT NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS ResumenUsuario (
+    id_usuario INT PRIMARY KEY,
+    reportes_resueltos BIGINT NOT NULL DEFAULT 0,
+    reportes_comentados BIGINT NOT NULL DEFAULT 0,
+    comentarios BIGINT NOT NULL DEFAULT 0
+);
 """
 
 # --- SENTENCIAS SQL (PostgreSQL) ---
@@ -229,94 +260,274 @@ CREATE TABLE IF NOT EXISTS Informe (
     fuentes TEXT,
     FOREIGN KEY (id_indicador) REFERENCES Indicador(id) ON DELETE CASCADE
 );
+-- Resúmenes de RegistroSensor por sensor y hora/día (los mantiene rollupSensores.py)
+CREATE TABLE IF NOT EXISTS RegistroSensorHora (
+    id_sensor INT NOT NULL,
+    periodo TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    minimo DECIMAL(10,2),
+    maximo DECIMAL(10,2),
+    suma DECIMAL(20,2),
+    cuenta BIGINT,
+    PRIMARY KEY (id_sensor, periodo)
+);
+CREATE TABLE IF NOT EXISTS RegistroSensorDia (
+    id_sensor INT NOT NULL,
+    periodo TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    minimo DECIMAL(10,2),
+    maximo DECIMAL(10,2),
+    suma DECIMAL(20,2),
+    cuenta BIGINT,
+    PRIMARY KEY (id_sensor, periodo)
+);
+-- Último id de cada tabla de origen (RegistroSensor, Reporte, Comentario) incorporado a los resúmenes
+CREATE TABLE IF NOT EXISTS MarcaRollup (
+    tabla VARCHAR(50) PRIMARY KEY,
+    ultimo_id INT NOT NULL
+);
+-- Conteos por zona y por usuario de los análisis de Reporte (los mantiene resumenReportes.py)
+CREATE TABLE IF NOT EXISTS ResumenZona (
+    id_zona INT PRIMARY KEY,
+    reportes_criticos BIGINT NOT NULL DEFAULT 0,
+    reportes_alta BIGINT NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS ResumenUsuario (
+    id_usuario INT PRIMARY KEY,
+    reportes_resueltos BIGINT NOT NULL DEFAULT 0,
+    reportes_comentados BIGINT NOT NULL DEFAULT 0,
+    comentarios BIGINT NOT NULL DEFAULT 0
+);
+"""
+
+# --- ÍNDICES SECUNDARIOS ---
+# No forman parte del esquema inicial: se crean después de la carga masiva
+# (rellenarDatos.py llama a crear_indices) para que los inserts no tengan que
+# mantenerlos. Están pensados para las consultas de obtenerDatosImportantes.py:
+#   - Reporte (prioridad, id_zona): zonas críticas y funcionConjunta.
+#   - Reporte (estado, id_usuario): eficiencia de cierre por usuario.
+#   - Reporte (id_zona, fechaHora) y RegistroSensor (id_sensor, fecha): correlación sensor-reporte.
+#   - Sensor (id_zona, tipo), Comentario (id_reporte), Alerta (id_reporte).
+
+# PostgreSQL no indexa las FKs automáticamente: se indexan todas, además de las compuestas.
+INDICES_PG = """
+CREATE INDEX IF NOT EXISTS idx_reporte_prioridad_zona ON Reporte (prioridad, id_zona);
+CREATE INDEX IF NOT EXISTS idx_reporte_estado_usuario ON Reporte (estado, id_usuario);
+CREATE INDEX IF NOT EXISTS idx_reporte_zona_fecha ON Reporte (id_zona, fechaHora);
+CREATE INDEX IF NOT EXISTS idx_reporte_usuario ON Reporte (id_usuario);
+CREATE INDEX IF NOT EXISTS idx_comentario_reporte ON Comentario (id_reporte);
+CREATE INDEX IF NOT EXISTS idx_comentario_usuario ON Comentario (id_usuario);
+CREATE INDEX IF NOT EXISTS idx_multimedia_reporte ON Multimedia (id_reporte);
+CREATE INDEX IF NOT EXISTS idx_alerta_reporte ON Alerta (id_reporte);
+CREATE INDEX IF NOT EXISTS idx_sensor_zona_tipo ON Sensor (id_zona, tipo);
+CREATE INDEX IF NOT EXISTS idx_registro_sensor_fecha ON RegistroSensor (id_sensor, fecha);
+CREATE INDEX IF NOT EXISTS idx_indicador_zona ON Indicador (id_zona);
+CREATE INDEX IF NOT EXISTS idx_indicador_registro ON Indicador (id_registro_sensor);
+CREATE INDEX IF NOT EXISTS idx_informe_indicador ON Informe (id_indicador);
 """
+
+# InnoDB ya crea un índice por cada FK; solo faltan los compuestos.
+# MySQL 8.0 no admite CREATE INDEX IF NOT EXISTS: los duplicados se ignoran en crear_indices.
+INDICES_MYSQL = """
+CREATE INDEX idx_reporte_prioridad_zona ON Reporte (prioridad, id_zona);
+CREATE INDEX idx_reporte_estado_usuario ON Reporte (estado, id_usuario);
+CREATE INDEX idx_reporte_zona_fecha ON Reporte (id_zona, fechaHora);
+CREATE INDEX idx_sensor_zona_tipo ON Sensor (id_zona, tipo);
+CREATE INDEX idx_registro_sensor_fecha ON RegistroSensor (id_sensor, fecha);
+"""
+
+TABLAS = ["Usuario", "Zona", "Reporte", "Comentario", "Multimedia", "Alerta",
+          "Sensor", "RegistroSensor", "Indicador", "Informe"]
+
+# Error de MySQL/MariaDB al crear un índice cuyo nombre ya existe
+ER_DUP_KEYNAME = 1061
+
+# --- PARTICIONADO OPCIONAL DE RegistroSensor ---
+# Con --particionar, RegistroSensor se crea particionada por rango de fecha, un
+# mes por partición (desde enero del año en curso hasta MESES_PARTICION_FUTUROS
+# meses después de hoy, más una partición final para el resto). Restricciones:
+#   - La clave primaria debe incluir la columna de partición: pasa a ser (id, fecha).
+#   - Ninguna tabla puede referenciar RegistroSensor(id): se quita la FK de Indicador.
+#   - MySQL/MariaDB no admiten FKs en tablas particionadas: tampoco hay FK a Sensor.
+MESES_PARTICION_FUTUROS = 12
+
+REGISTRO_PARTICIONADO_MYSQL = """CREATE TABLE IF NOT EXISTS RegistroSensor (
+    id INT AUTO_INCREMENT,
+    id_sensor INT,
+    fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valor DECIMAL(10,2),
+    unidad VARCHAR(20),
+    PRIMARY KEY (id, fecha)
+) PARTITION BY RANGE COLUMNS (fecha) (
+{particiones}
+);"""
+
+REGISTRO_PARTICIONADO_PG = """CREATE TABLE IF NOT EXISTS RegistroSensor (
+    id SERIAL,
+    id_sensor INT,
+    fecha TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valor DECIMAL(10,2),
+    unidad VARCHAR(20),
+    PRIMARY KEY (id, fecha),
+    FOREIGN KEY (id_sensor) REFERENCES Sensor(id) ON DELETE CASCADE
+) PARTITION BY RANGE (fecha);
+{particiones}"""
+
+FK_INDICADOR_REGISTRO = ",\n    FOREIGN KEY (id_registro_sensor) REFERENCES RegistroSensor(id) ON DELETE CASCADE"
+
+
+def _limites_mensuales(hoy):
+    """Inicios de mes desde enero de este año hasta MESES_PARTICION_FUTUROS meses después de hoy."""
+    total = hoy.month + MESES_PARTICION_FUTUROS
+    return [date(hoy.year + m // 12, m % 12 + 1, 1) for m in range(total + 1)]
+
+def esquema_particionado(sql, driver, hoy=None):
+    """Devuelve el esquema `sql` con RegistroSensor particionada por mes."""
+    limites = _limites_mensuales(hoy or date.today())
+    tramos = list(zip(limites, limites[1:]))
+    if driver == "psycopg2":
+        particiones = "\n".join(
+            f"CREATE TABLE IF NOT EXISTS RegistroSensor_{desde:%Y_%m} PARTITION OF RegistroSensor "
+            f"FOR VALUES FROM ('{desde}') TO ('{hasta}');"
+            for desde, hasta in tramos
+        ) + "\nCREATE TABLE IF NOT EXISTS RegistroSensor_resto PARTITION OF RegistroSensor DEFAULT;"
+        tabla = REGISTRO_PARTICIONADO_PG.format(particiones=particiones)
+    else:
+        particiones = ",\n".join(
+            f"    PARTITION p{desde:%Y_%m} VALUES LESS THAN ('{hasta}')" for desde, hasta in tramos
+        ) + ",\n    PARTITION presto VALUES LESS THAN (MAXVALUE)"
+        tabla = REGISTRO_PARTICIONADO_MYSQL.format(particiones=particiones)
+
+    original = re.search(r"CREATE TABLE IF NOT EXISTS RegistroSensor \(.*?\n\);", sql, re.S).group(0)
+    return sql.replace(original, tabla).replace(FK_INDICADOR_REGISTRO, "")
+
 # --- FUNCIONES DE CONEXIÓN Y CREACIÓN ---
 
-def create_db_and_schema(db_name, config):
-    """Crea la base de datos y su esquema para un motor específico."""
+def crear_indices(cursor, conn):
+    """Crea los índices secundarios y actualiza las estadísticas del planificador.
+    Se llama una vez terminada la carga masiva."""
+    if isinstance(conn, psycopg2.extensions.connection):
+        cursor.execute(INDICES_PG)
+        cursor.execute("ANALYZE")
+    else:
+        for statement in INDICES_MYSQL.split(';'):
+            if not statement.strip():
+                continue
+            try:
+                cursor.execute(statement)
+            except mysql.connector.Error as e:
+                if e.errno != ER_DUP_KEYNAME:
+                    raise
+        cursor.execute(f"ANALYZE TABLE {', '.join(TABLAS)}")
+        cursor.fetchall()
+    conn.commit()
+
+
+def create_db_and_schema(db_name, config, particionar=False):
+    """Crea la base de datos y su esquema para un motor específico.
+    Con particionar=True, RegistroSensor se crea particionada por fecha.
+    Devuelve True si terminó sin errores."""
     
     print(f"\n--- Procesando {db_name} (Puerto {config['port']}) ---")
     conn = None
+    # Las conexiones del pool de este proceso apuntan a la base que se va a eliminar
+    cerrar_pools(db_name)
     
     try:
         if config["driver"] == "psycopg2":
             # Lógica para PostgreSQL
             # Conexión inicial al servidor (usando la DB 'postgres' por defecto)
-            conn = psycopg2.connect(
-                host=SERVER_CREDS["host"], port=config["port"],
-                user=SERVER_CREDS["user"], password=SERVER_CREDS["password"],
-                database=config["initial_db"]
-            )
+            conn = conectar_servidor(config)
             conn.autocommit = True
             cursor = conn.cursor()
 
-            print(f"    1. Eliminando y creando DB '{SERVER_CREDS['db_name']}'...")
+            print(f"    1. Eliminando y creando DB '{DB_NAME}'...")
             try:
                 # Intenta forzar la eliminación, ignorando el error si no existe
-                cursor.execute(f"DROP DATABASE IF EXISTS {SERVER_CREDS['db_name']} WITH (FORCE)") 
+                cursor.execute(f"DROP DATABASE IF EXISTS {DB_NAME} WITH (FORCE)") 
             except:
                 pass 
-            cursor.execute(f"CREATE DATABASE {SERVER_CREDS['db_name']}")
+            cursor.execute(f"CREATE DATABASE {DB_NAME}")
             cursor.close()
             conn.close()
+            conn = None
 
-            # Reconexión a la nueva base de datos para crear las tablas
-            conn = psycopg2.connect(
-                host=SERVER_CREDS["host"], port=config["port"],
-                user=SERVER_CREDS["user"], password=SERVER_CREDS["password"],
-                database=SERVER_CREDS["db_name"]
-            )
-            cursor = conn.cursor()
+            # Conexión (del pool) a la nueva base de datos para crear las tablas
+            with conexion(db_name) as conn_base:
+                cursor = conn_base.cursor()
             
-            print("    2. Creando todas las tablas...")
-            cursor.execute(SQL_PG)
-            conn.commit()
-            print("Estructura creada correctamente.")
+                print("    2. Creando todas las tablas...")
+                cursor.execute(esquema_particionado(SQL_PG, "psycopg2") if particionar else SQL_PG)
+                conn_base.commit()
+            print(f"Estructura de {db_name} creada correctamente.")
             
         elif config["driver"] == "mysql":
             # Lógica para MySQL/MariaDB
             # Conexión inicial al servidor (sin especificar base de datos)
-            conn = mysql.connector.connect(
-                host=SERVER_CREDS["host"], port=config["port"],
-                user=SERVER_CREDS["user"], password=SERVER_CREDS["password"]
-            )
+            conn = conectar_servidor(config)
             cursor = conn.cursor()
 
-            print(f"    1. Eliminando y creando DB '{SERVER_CREDS['db_name']}'...")
-            cursor.execute(f"DROP DATABASE IF EXISTS {SERVER_CREDS['db_name']}")
-            cursor.execute(f"CREATE DATABASE {SERVER_CREDS['db_name']}")
+            print(f"    1. Eliminando y creando DB '{DB_NAME}'...")
+            cursor.execute(f"DROP DATABASE IF EXISTS {DB_NAME}")
+            cursor.execute(f"CREATE DATABASE {DB_NAME}")
             conn.commit()
             
-            cursor.execute(f"USE {SERVER_CREDS['db_name']}")
+            cursor.execute(f"USE {DB_NAME}")
             
             print("    2. Creando todas las tablas...")
             # Ejecución del esquema SQL (dividiendo por sentencias)
-            for statement in SQL_MYSQL.split(';'):
+            sql = esquema_particionado(SQL_MYSQL, "mysql") if particionar else SQL_MYSQL
+            for statement in sql.split(';'):
                 if statement.strip():
                     cursor.execute(statement)
             
             conn.commit()
-            print("Estructura creada correctamente.")
+            print(f"Estructura de {db_name} creada correctamente.")
+        return True
             
     except Exception as e:
         print(f"ERROR en {db_name} (Puerto {config['port']}): {e}")
+        return False
     finally:
         if conn: conn.close()
 
 
-def main():
+def main(paralelo=False, particionar=False):
     print("--- INICIO DE LA CREACIÓN DE ESTRUCTURAS DE BASES DE DATOS ---")
     
-    # Procesar PostgreSQL
-    create_db_and_schema("PostgreSQL", SERVER_CONFIGS["PostgreSQL"])
-    
-    # Procesar MySQL
-    create_db_and_schema("MySQL", SERVER_CONFIGS["MySQL"])
+    if paralelo:
+        # Un proceso por motor: el error de uno no detiene a los demás
+        resultados = {}
+        with ProcessPoolExecutor(max_workers=len(DB_CONFIGS)) as executor:
+            futuros = {
+                executor.submit(create_db_and_schema, db_name, config, particionar): db_name
+                for db_name, config in DB_CONFIGS.items()
+            }
+            for futuro in as_completed(futuros):
+                db_name = futuros[futuro]
+                try:
+                    resultados[db_name] = futuro.result()
+                except Exception as e:
+                    print(f"ERROR en el proceso de {db_name}: {e}")
+                    resultados[db_name] = False
+
+        print("\n--- RESUMEN ---")
+        for db_name in DB_CONFIGS:
+            print(f"    {db_name}: {'OK' if resultados.get(db_name) else 'ERROR'}")
+    else:
+        # Procesar PostgreSQL
+        create_db_and_schema("PostgreSQL", DB_CONFIGS["PostgreSQL"], particionar)
+        
+        # Procesar MySQL
+        create_db_and_schema("MySQL", DB_CONFIGS["MySQL"], particionar)
 
-    # Procesar MariaDB
-    create_db_and_schema("MariaDB", SERVER_CONFIGS["MariaDB"])
+        # Procesar MariaDB
+        create_db_and_schema("MariaDB", DB_CONFIGS["MariaDB"], particionar)
 
     print("\n--- PROCESO FINALIZADO ---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Crea la base de datos y el esquema en los tres motores.")
+    parser.add_argument("--paralelo", action="store_true", help="Crea los tres esquemas a la vez, un proceso por motor.")
+    parser.add_argument("--particionar", action="store_true",
+                        help="Crea RegistroSensor particionada por mes de fecha (sin FKs hacia ella).")
+    args = parser.parse_args()
+    main(paralelo=args.paralelo, particionar=args.particionar)
@@ -0,0 +1,226 @@
+# Espejo analítico local de las bases de datos.
+#
+# Copia las diez tablas de cada motor de DB_CONFIGS a un almacén embebido en
+# disco (DuckDB, columnar, si está instalado; si no, SQLite) y ejecuta allí los
+# análisis de obtenerDatosImportantes, sin cargar a los motores transaccionales
+# y sin necesidad de contenedores una vez sincronizado.
+#
+# Cada motor tiene su propio fichero (espejo/espejo_<motor>.duckdb|.sqlite).
+# La sincronización es incremental por marca de agua: se copian solo las filas
+# con id mayor que el máximo ya presente en el espejo, leídas en streaming.
+# Como en rollupSensores, las filas modificadas o borradas en el origen después
+# de copiarse no se reflejan: para eso, --reconstruir.
+
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from cargaMasiva import escribir_csv
+from conexiones import DB_CONFIGS, TAM_LOTE_STREAMING, conexion, filas_en_streaming
+from obtenerDatosImportantes import ANALISIS_POR_MOTOR, SQL_ZONA_MAS_CRITICA, combinar_zonas
+
+ALMACENES = ("duckdb", "sqlite")
+DIRECTORIO_ESPEJO = "espejo"
+EXTENSIONES = {"duckdb": "duckdb", "sqlite": "sqlite"}
+
+# Método de cada análisis en el espejo: sin tablas de resumen ni dialecto de los
+# motores, se usan las consultas originales y la correlación por ventana
+METODO_ESPEJO = {"PostgreSQL": "sql", "MySQL": "sql", "MariaDB": "ventana"}
+
+# Filas por lote al copiar (un INSERT o un fichero CSV por lote)
+TAM_LOTE_ESPEJO = 50000
+
+# Columnas copiadas de cada tabla y su tipo en el espejo (válido en DuckDB y SQLite)
+ESQUEMA_ESPEJO = {
+    "Usuario": (("id", "INTEGER"), ("nombre", "VARCHAR"), ("correo", "VARCHAR"), ("telefono", "VARCHAR"),
+                ("direccion", "VARCHAR"), ("fechaDeRegistro", "TIMESTAMP")),
+    "Zona": (("id", "INTEGER"), ("nombre", "VARCHAR"), ("categoria", "VARCHAR"),
+             ("numeroIncidencias", "INTEGER"), ("coordenadas", "VARCHAR")),
+    "Reporte": (("id", "INTEGER"), ("id_usuario", "INTEGER"), ("id_zona", "INTEGER"), ("tipoIncidencia", "VARCHAR"),
+                ("descripcion", "VARCHAR"), ("fechaHora", "TIMESTAMP"), ("estado", "VARCHAR"),
+                ("prioridad", "VARCHAR"), ("medioReporte", "VARCHAR"), ("ubicacion", "VARCHAR")),
+    "Sensor": (("id", "INTEGER"), ("id_zona", "INTEGER"), ("tipo", "VARCHAR"), ("ubicacion", "VARCHAR"),
+               ("fechaInstalacion", "DATE"), ("modelo", "VARCHAR"), ("estado", "VARCHAR")),
+    "RegistroSensor": (("id", "INTEGER"), ("id_sensor", "INTEGER"), ("fecha", "TIMESTAMP"),
+                       ("valor", "DECIMAL(10,2)"), ("unidad", "VARCHAR")),
+    "Comentario": (("id", "INTEGER"), ("id_usuario", "INTEGER"), ("id_reporte", "INTEGER"), ("texto", "VARCHAR"),
+                   ("fecha", "TIMESTAMP")),
+    "Multimedia": (("id", "INTEGER"), ("id_reporte", "INTEGER"), ("tipoArchivo", "VARCHAR"),
+                   ("rutaArchivo", "VARCHAR")),
+    "Alerta": (("id", "INTEGER"), ("id_reporte", "INTEGER"), ("tipo", "VARCHAR"), ("mensaje", "VARCHAR"),
+               ("fecha", "TIMESTAMP")),
+    "Indicador": (("id", "INTEGER"), ("id_zona", "INTEGER"), ("id_registro_sensor", "INTEGER"), ("nombre", "VARCHAR"),
+                  ("descripcion", "VARCHAR"), ("valor", "DECIMAL(10,2)"), ("fecha", "TIMESTAMP")),
+    "Informe": (("id", "INTEGER"), ("id_indicador", "INTEGER"), ("titulo", "VARCHAR"), ("descripcion", "VARCHAR"),
+                ("fecha", "TIMESTAMP"), ("tipo", "VARCHAR"), ("fuentes", "VARCHAR")),
+}
+
+# SQLite guarda fechas y decimales como texto/real: se registran las
+# conversiones explícitas (las predeterminadas están obsoletas desde Python 3.12)
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(" "))
+sqlite3.register_adapter(date, lambda valor: valor.isoformat())
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter("TIMESTAMP", lambda valor: datetime.fromisoformat(valor.decode()))
+sqlite3.register_converter("DATE", lambda valor: date.fromisoformat(valor.decode()))
+
+
+def almacen_por_defecto():
+    return "duckdb" if duckdb is not None else "sqlite"
+
+def ruta_espejo(db_name, almacen, directorio=DIRECTORIO_ESPEJO):
+    return os.path.join(directorio, f"espejo_{db_name}.{EXTENSIONES[almacen]}")
+
+def abrir_espejo(db_name, almacen=None, directorio=DIRECTORIO_ESPEJO):
+    """Conexión al espejo de `db_name`, creando el fichero y las tablas si no existen."""
+    almacen = almacen or almacen_por_defecto()
+    if almacen == "duckdb" and duckdb is None:
+        raise ValueError("DuckDB no está instalado (pip install duckdb); usa el almacén sqlite")
+    os.makedirs(directorio, exist_ok=True)
+    ruta = ruta_espejo(db_name, almacen, directorio)
+    if almacen == "duckdb":
+        conn = duckdb.connect(ruta)
+    else:
+        conn = sqlite3.connect(ruta, detect_types=sqlite3.PARSE_DECLTYPES)
+    cursor = conn.cursor()
+    for tabla, columnas in ESQUEMA_ESPEJO.items():
+        definicion = [f"{nombre} {tipo}" for nombre, tipo in columnas]
+        if almacen == "sqlite":
+            # La clave primaria hace que MAX(id) no recorra la tabla
+            definicion[0] = "id INTEGER PRIMARY KEY"
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {tabla} ({', '.join(definicion)})")
+    conn.commit()
+    cursor.close()
+    return conn
+
+# --- SINCRONIZACIÓN ---
+
+def _marca(conn, tabla):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabla}")
+    marca = cursor.fetchall()[0][0]
+    cursor.close()
+    return marca
+
+def _insertar_lote(espejo, tabla, lote):
+    columnas = ESQUEMA_ESPEJO[tabla]
+    cursor = espejo.cursor()
+    if isinstance(espejo, sqlite3.Connection):
+        marcadores = ", ".join("?" * len(columnas))
+        cursor.executemany(f"INSERT INTO {tabla} VALUES ({marcadores})", lote)
+    else:
+        # executemany de DuckDB ejecuta fila a fila: el lote va por un CSV temporal
+        # en el formato intermedio de cargaMasiva (textos entre comillas, NULL sin ellas)
+        fd, ruta = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        try:
+            escribir_csv(ruta, lote)
+            tipos = ", ".join(f"'{nombre}': '{tipo}'" for nombre, tipo in columnas)
+            cursor.execute(
+                f"INSERT INTO {tabla} SELECT * FROM read_csv(?, header = false, quote = '\"', escape = '\"', "
+                f"nullstr = 'NULL', allow_quoted_nulls = false, columns = {{{tipos}}})",
+                [ruta]
+            )
+        finally:
+            os.remove(ruta)
+    espejo.commit()
+    cursor.close()
+
+def sincronizar_tabla(conn, espejo, tabla, lote=TAM_LOTE_ESPEJO):
+    """Copia al espejo las filas de `tabla` con id mayor que su marca. Devuelve cuántas copió."""
+    desde = _marca(espejo, tabla)
+    columnas = ", ".join(nombre for nombre, _ in ESQUEMA_ESPEJO[tabla])
+    sql = f"SELECT {columnas} FROM {tabla} WHERE id > {desde} ORDER BY id"
+    filas = filas_en_streaming(conn, sql, f"espejo_{tabla}", TAM_LOTE_STREAMING)
+    copiadas = 0
+    while True:
+        bloque = list(itertools.islice(filas, lote))
+        if not bloque:
+            return copiadas
+        _insertar_lote(espejo, tabla, bloque)
+        copiadas += len(bloque)
+
+def sincronizar(db_name, almacen=None, directorio=DIRECTORIO_ESPEJO, reconstruir=False):
+    """Pone al día el espejo de `db_name`. Devuelve {tabla: filas copiadas}."""
+    if reconstruir:
+        ruta = ruta_espejo(db_name, almacen or almacen_por_defecto(), directorio)
+        if os.path.exists(ruta):
+            os.remove(ruta)
+    espejo = abrir_espejo(db_name, almacen, directorio)
+    try:
+        with conexion(db_name) as conn:
+            return {tabla: sincronizar_tabla(conn, espejo, tabla) for tabla in ESQUEMA_ESPEJO}
+    finally:
+        espejo.close()
+
+# --- ANÁLISIS SOBRE EL ESPEJO ---
+
+def analizar(db_name, almacen=None, directorio=DIRECTORIO_ESPEJO):
+    """Ejecuta sobre el espejo de `db_name` el mismo análisis que obtenerDatosImportantes."""
+    funcion, _ = ANALISIS_POR_MOTOR[db_name]
+    espejo = abrir_espejo(db_name, almacen, directorio)
+    try:
+        return funcion(espejo, metodo=METODO_ESPEJO[db_name])
+    finally:
+        espejo.close()
+
+def funcion_conjunta(k=1, almacen=None, directorio=DIRECTORIO_ESPEJO):
+    """funcionConjunta con los conteos por zona leídos de los espejos de los tres motores."""
+    parciales = {}
+    for db_name in DB_CONFIGS:
+        espejo = abrir_espejo(db_name, almacen, directorio)
+        try:
+            cursor = espejo.cursor()
+            cursor.execute(SQL_ZONA_MAS_CRITICA)
+            parciales[db_name] = cursor.fetchall()
+            cursor.close()
+        finally:
+            espejo.close()
+    return combinar_zonas(parciales, k)
+
+
+def _escribir_json(ruta, data):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+def main():
+    parser = argparse.ArgumentParser(description="Espejo analítico local (DuckDB o SQLite) de las tres bases.")
+    parser.add_argument("accion", choices=["sincronizar", "analizar"])
+    parser.add_argument("--motores", nargs="+", choices=list(DB_CONFIGS), default=list(DB_CONFIGS))
+    parser.add_argument("--almacen", choices=ALMACENES, default=None,
+                        help="Por defecto DuckDB si está instalado; si no, SQLite.")
+    parser.add_argument("--directorio", default=DIRECTORIO_ESPEJO,
+                        help="Directorio de los ficheros del espejo y de los análisis exportados.")
+    parser.add_argument("--reconstruir", action="store_true", help="Con sincronizar, copia todo desde cero.")
+    args = parser.parse_args()
+
+    if args.accion == "sincronizar":
+        for db_name in args.motores:
+            try:
+                copiadas = sincronizar(db_name, args.almacen, args.directorio, args.reconstruir)
+                print(f"{db_name}: {sum(copiadas.values())} filas nuevas en el espejo "
+                      f"({', '.join(f'{t}={n}' for t, n in copiadas.items() if n) or 'sin cambios'})")
+            except Exception as e:
+                print(f"ERROR al sincronizar el espejo de {db_name}: {e}")
+        return
+
+    for db_name in args.motores:
+        _, fichero = ANALISIS_POR_MOTOR[db_name]
+        ruta = os.path.join(args.directorio, fichero)
+        _escribir_json(ruta, analizar(db_name, args.almacen, args.directorio))
+        print(f"Análisis de {db_name} (espejo) exportado a {ruta}")
+    ruta = os.path.join(args.directorio, "datosDeLasTresBases")
+    _escribir_json(ruta, funcion_conjunta(almacen=args.almacen, directorio=args.directorio))
+    print(f"funcionConjunta (espejos) exportada a {ruta}")
+
+if __name__ == "__main__":
+    main()
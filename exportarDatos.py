@@ -0,0 +1,152 @@
+# Exportación completa de resultados en memoria constante.
+#
+# A diferencia de los análisis de obtenerDatosImportantes (LIMIT 5 + fetchall +
+# json.dump), aquí las filas se leen en streaming (cursor con nombre en
+# PostgreSQL, cursor sin buffer en MySQL/MariaDB, por lotes de fetchmany) y se
+# escriben al disco según llegan, en JSON, NDJSON o CSV.
+
+import argparse
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import psycopg2
+
+from conexiones import DB_CONFIGS, TAM_LOTE_STREAMING, conexion, filas_en_streaming
+
+FORMATOS = ("json", "ndjson", "csv")
+
+# Lista de tipos de alerta de cada reporte en el dialecto de cada motor
+AGREGAR_TIPOS_ALERTA = {
+    "psycopg2": "STRING_AGG(DISTINCT tipo, ',' ORDER BY tipo)",
+    "mysql": "GROUP_CONCAT(DISTINCT tipo ORDER BY tipo SEPARATOR ',')",
+}
+
+# --- EXPORTACIONES DISPONIBLES ---
+# Cada una: (columnas de salida, SQL con esas columnas en el mismo orden).
+EXPORTACIONES = {
+    # Todos los reportes con su zona, número de comentarios y alertas
+    "reportes": (
+        ("id", "fecha_hora", "zona", "tipo_incidencia", "estado", "prioridad",
+         "comentarios", "alertas", "tipos_alerta"),
+        """
+        SELECT
+            R.id, R.fechaHora, Z.nombre, R.tipoIncidencia, R.estado, R.prioridad,
+            COALESCE(C.total, 0), COALESCE(A.total, 0), A.tipos
+        FROM Reporte R
+        JOIN Zona Z ON Z.id = R.id_zona
+        LEFT JOIN (
+            SELECT id_reporte, COUNT(*) AS total FROM Comentario GROUP BY id_reporte
+        ) C ON C.id_reporte = R.id
+        LEFT JOIN (
+            SELECT id_reporte, COUNT(*) AS total, {tipos_alerta} AS tipos
+            FROM Alerta GROUP BY id_reporte
+        ) A ON A.id_reporte = R.id
+        ORDER BY R.id
+        """,
+    ),
+    # Todos los registros de sensor con el sensor y la zona a la que pertenecen
+    "registros_sensor": (
+        ("id", "fecha", "valor", "unidad", "sensor", "tipo_sensor", "zona"),
+        """
+        SELECT RS.id, RS.fecha, RS.valor, RS.unidad, S.id, S.tipo, Z.nombre
+        FROM RegistroSensor RS
+        JOIN Sensor S ON S.id = RS.id_sensor
+        JOIN Zona Z ON Z.id = S.id_zona
+        ORDER BY RS.id
+        """,
+    ),
+    # Resumen diario por sensor (RegistroSensorDia, mantenido por rollupSensores.py)
+    "resumen_sensores_dia": (
+        ("sensor", "tipo_sensor", "zona", "dia", "minimo", "maximo", "media", "lecturas"),
+        """
+        SELECT D.id_sensor, S.tipo, Z.nombre, D.periodo, D.minimo, D.maximo, D.suma / D.cuenta, D.cuenta
+        FROM RegistroSensorDia D
+        JOIN Sensor S ON S.id = D.id_sensor
+        JOIN Zona Z ON Z.id = S.id_zona
+        ORDER BY D.id_sensor, D.periodo
+        """,
+    ),
+}
+
+
+def _valor_json(valor):
+    """Tipos que json no serializa por sí solo."""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+# --- ESCRITORES INCREMENTALES ---
+# Reciben el fichero abierto, las columnas y un iterador de filas; devuelven cuántas escribieron.
+
+def escribir_json(f, columnas, filas):
+    """Un array JSON de objetos, escrito elemento a elemento."""
+    total = 0
+    f.write("[")
+    for fila in filas:
+        f.write(",\n" if total else "\n")
+        f.write(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False, default=_valor_json))
+        total += 1
+    f.write("\n]\n" if total else "]\n")
+    return total
+
+def escribir_ndjson(f, columnas, filas):
+    """Un objeto JSON por línea."""
+    total = 0
+    for fila in filas:
+        f.write(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False, default=_valor_json) + "\n")
+        total += 1
+    return total
+
+def escribir_csv(f, columnas, filas):
+    """CSV con cabecera; NULL se escribe como campo vacío."""
+    escritor = csv.writer(f)
+    escritor.writerow(columnas)
+    total = 0
+    for fila in filas:
+        escritor.writerow(fila)
+        total += 1
+    return total
+
+ESCRITORES = {"json": escribir_json, "ndjson": escribir_ndjson, "csv": escribir_csv}
+
+
+def consulta_exportacion(nombre, conn):
+    """Devuelve (columnas, SQL) de la exportación `nombre` para el motor de `conn`."""
+    if nombre not in EXPORTACIONES:
+        raise ValueError(f"Exportación desconocida: {nombre}. Opciones: {', '.join(EXPORTACIONES)}")
+    columnas, sql = EXPORTACIONES[nombre]
+    driver = "psycopg2" if isinstance(conn, psycopg2.extensions.connection) else "mysql"
+    return columnas, sql.format(tipos_alerta=AGREGAR_TIPOS_ALERTA[driver])
+
+
+def exportar(db_name, nombre, ruta, formato="ndjson", lote=TAM_LOTE_STREAMING):
+    """Exporta el resultado completo de `nombre` desde `db_name` a `ruta`. Devuelve las filas escritas."""
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato desconocido: {formato}. Opciones: {', '.join(FORMATOS)}")
+    with conexion(db_name) as conn:
+        columnas, sql = consulta_exportacion(nombre, conn)
+        filas = filas_en_streaming(conn, sql, f"exportar_{nombre}", lote)
+        with open(ruta, "w", encoding="utf-8", newline="") as f:
+            return ESCRITORES[formato](f, columnas, filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta resultados completos en streaming (memoria constante).")
+    parser.add_argument("exportacion", choices=list(EXPORTACIONES))
+    parser.add_argument("--motor", choices=list(DB_CONFIGS), default="PostgreSQL")
+    parser.add_argument("--formato", choices=FORMATOS, default="ndjson")
+    parser.add_argument("--salida", default=None, help="Fichero de salida. Por defecto, <exportacion>.<formato>.")
+    parser.add_argument("--lote", type=int, default=TAM_LOTE_STREAMING, help="Filas por fetchmany.")
+    args = parser.parse_args()
+
+    ruta = args.salida or f"{args.exportacion}.{args.formato}"
+    print(f"-> Exportando {args.exportacion} desde {args.motor}...")
+    total = exportar(args.motor, args.exportacion, ruta, args.formato, args.lote)
+    print(f"{total} filas exportadas a {ruta}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Generación en el servidor de las tablas derivadas (Indicador e Informe).
+#
+# En lugar de generar las filas en Python y enviarlas, cada tabla se rellena con
+# un único INSERT ... SELECT: Indicador sale de RegistroSensor ⋈ Sensor (un
+# indicador por registro, con la zona de su sensor) e Informe de una serie de
+# ids (generate_series en PostgreSQL; en MySQL/MariaDB, las filas de Indicador
+# recién creadas, una por informe, para no depender de un CTE recursivo y su
+# límite de profundidad). Por la red solo viaja la sentencia.
+#
+# Los valores sintéticos se eligen con un hash entero del id y una sal derivada
+# de la semilla, evaluado igual en los tres motores: misma semilla, mismos datos
+# en todos ellos. No coinciden con los de la generación en el cliente, que usa
+# random.Random. Los textos salen de los mismos pools de Faker, incrustados en la
+# sentencia como ARRAY[...] (PostgreSQL) o ELT(...) (MySQL/MariaDB).
+
+from cargaMasiva import es_postgresql
+from generarDatos import FUENTES_INFORME, NOMBRES_INDICADOR, TIPOS_INFORME, semilla_derivada
+
+# Tablas que se pueden generar en el servidor
+TABLAS_SERVIDOR = ("Indicador", "Informe")
+
+SQL_INDICADOR = """
+    INSERT INTO Indicador (id, id_zona, id_registro_sensor, nombre, valor, descripcion)
+    SELECT {id}, S.id_zona, RS.id, {nombre}, {valor}, {descripcion}
+    FROM RegistroSensor RS
+    JOIN Sensor S ON S.id = RS.id_sensor
+    WHERE RS.id BETWEEN {desde} AND {hasta}
+"""
+
+SQL_INFORME = """
+    INSERT INTO Informe (id, id_indicador, titulo, descripcion, tipo, fuentes)
+    SELECT {id}, {id_indicador}, {titulo}, {descripcion}, {tipo}, {fuentes}
+    FROM {origen}
+"""
+
+# Origen de las filas de Informe y expresión de su id en cada motor
+ORIGEN_INFORME = {
+    "psycopg2": ("generate_series({desde}, {hasta}) AS G(id)", "G.id"),
+    "mysql": ("Indicador I WHERE I.id BETWEEN {desde_indicador} AND {hasta_indicador}",
+              "I.id + {desplazamiento}"),
+}
+
+# División entera en el dialecto de cada motor
+DIVISION_ENTERA = {"psycopg2": "/", "mysql": "DIV"}
+
+
+def _driver(conn):
+    return "psycopg2" if es_postgresql(conn) else "mysql"
+
+def _literal(texto, driver):
+    """Literal de texto SQL. MySQL trata la barra invertida como escape."""
+    if driver == "mysql":
+        texto = texto.replace("\\", "\\\\")
+    return "'" + texto.replace("'", "''") + "'"
+
+def _indice(plan, tabla, columna, expr_id, n, driver):
+    """Expresión SQL con un índice pseudoaleatorio en [0, n) para la fila de id `expr_id`.
+    Hash multiplicativo sobre 32 bits, rotado 16 bits para que el módulo use los bits altos."""
+    sal = semilla_derivada(plan["semilla"], "servidor", tabla, columna) & 0xFFFFFFFF
+    h = f"((({expr_id}) * 2654435761 + {sal}) % 4294967296)"
+    return f"((({h} {DIVISION_ENTERA[driver]} 65536) + ({h} % 65536) * 65536) % {n})"
+
+def _elegir(valores, indice, driver):
+    """Expresión SQL que toma valores[indice]."""
+    literales = ", ".join(_literal(v, driver) for v in valores)
+    if driver == "psycopg2":
+        return f"(ARRAY[{literales}]::text[])[{indice} + 1]"
+    return f"ELT({indice} + 1, {literales})"
+
+def _concatenar(a, b, driver):
+    return f"{a} || ' - ' || {b}" if driver == "psycopg2" else f"CONCAT({a}, ' - ', {b})"
+
+
+def _sql_indicador(plan, pools, driver):
+    ids = plan["ids"]
+    registros, indicadores = ids["RegistroSensor"], ids["Indicador"]
+    id_fila = "RS.id"
+
+    def elegir(columna, valores):
+        return _elegir(valores, _indice(plan, "Indicador", columna, id_fila, len(valores), driver), driver)
+
+    return SQL_INDICADOR.format(
+        id=f"RS.id + {indicadores.start - registros.start}",
+        nombre=elegir("nombre", NOMBRES_INDICADOR),
+        # Mismo rango que VALORES_INDICADOR: 1.00 a 10.00
+        valor=f"(100 + {_indice(plan, 'Indicador', 'valor', id_fila, 901, driver)}) / 100.0",
+        descripcion=elegir("descripcion", pools["frase_5"]),
+        desde=registros.start,
+        hasta=registros.stop - 1,
+    )
+
+def _sql_informe(plan, pools, driver):
+    ids = plan["ids"]
+    indicadores, informes = ids["Indicador"], ids["Informe"]
+    origen, id_fila = ORIGEN_INFORME[driver]
+    origen = origen.format(desde=informes.start, hasta=informes.stop - 1,
+                           desde_indicador=indicadores.start, hasta_indicador=indicadores.start + len(informes) - 1)
+    id_fila = id_fila.format(desplazamiento=informes.start - indicadores.start)
+
+    def elegir(columna, valores):
+        return _elegir(valores, _indice(plan, "Informe", columna, id_fila, len(valores), driver), driver)
+
+    return SQL_INFORME.format(
+        id=id_fila,
+        id_indicador=f"{indicadores.start} + {_indice(plan, 'Informe', 'id_indicador', id_fila, len(indicadores), driver)}",
+        titulo=_concatenar(elegir("titulo_tipo", TIPOS_INFORME), elegir("titulo_ciudad", pools["ciudad"]), driver),
+        descripcion=elegir("descripcion", pools["texto_200"]),
+        tipo=elegir("tipo", TIPOS_INFORME),
+        fuentes=_literal(FUENTES_INFORME, driver),
+        origen=origen,
+    )
+
+_SQL_TABLA = {"Indicador": _sql_indicador, "Informe": _sql_informe}
+
+
+def sql_generacion(tabla, plan, pools, conn):
+    """INSERT ... SELECT que genera `tabla` en el servidor de `conn` con los ids del plan."""
+    if tabla not in _SQL_TABLA:
+        raise ValueError(f"{tabla} no se puede generar en el servidor. Opciones: {', '.join(TABLAS_SERVIDOR)}")
+    return _SQL_TABLA[tabla](plan, pools, _driver(conn))
+
+def generar_en_servidor(cursor, conn, tabla, plan, pools):
+    """Genera `tabla` con una sola sentencia. No hace commit. Devuelve las filas insertadas."""
+    if not plan["ids"][tabla]:
+        return 0
+    cursor.execute(sql_generacion(tabla, plan, pools, conn))
+    return cursor.rowcount
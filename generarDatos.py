@@ -0,0 +1,377 @@
+# Motor de generación de datos por columnas.
+#
+# En lugar de llamar a Faker fila a fila, se precalculan una sola vez "pools" de
+# valores de Faker y después cada bloque de una tabla se construye columna a
+# columna muestreando de esos pools con random.choices (categóricos, enteros,
+# decimales y fechas incluidos). Cada bloque es una lista de columnas que solo
+# se convierte en filas en el momento de la carga.
+#
+# La generación es determinista: cada bloque de cada tabla usa su propio
+# random.Random cuya semilla se deriva de la semilla maestra, la tabla y la
+# posición del bloque. Por eso los bloques se pueden repartir entre procesos
+# y el resultado es idéntico byte a byte con cualquier número de procesos.
+#
+# Métodos de Faker usados para los pools:
+# name(), user_name(), free_email_domain(), phone_number(), address(), city(),
+# coordinate(), paragraph(), sentence(), text()
+
+import hashlib
+import random
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import repeat
+
+from faker import Faker
+
+fake = Faker('es_ES')
+NUM_REGISTROS_BASE = 15
+
+# Filas de cada tabla por unidad de scale factor, en múltiplos de NUM_REGISTROS_BASE.
+# Indicador e Informe no aparecen: se derivan uno a uno de RegistroSensor.
+MULTIPLICADORES_TABLA = {
+    "Usuario": 2,
+    "Zona": 1,
+    "Reporte": 3,
+    "Sensor": 1,
+    "RegistroSensor": 4,
+    "Comentario": 2,
+    "Multimedia": 1,
+    "Alerta": 1,
+}
+
+# Columnas de cada tabla en el orden en que se generan y se cargan
+COLUMNAS = {
+    "Usuario":        ("id", "nombre", "correo", "telefono", "direccion", "fechaDeRegistro"),
+    "Zona":           ("id", "nombre", "categoria", "coordenadas", "numeroIncidencias"),
+    "Reporte":        ("id", "id_usuario", "id_zona", "tipoIncidencia", "descripcion", "fechaHora", "estado", "prioridad", "medioReporte"),
+    "Sensor":         ("id", "id_zona", "tipo", "modelo", "estado", "fechaInstalacion"),
+    "RegistroSensor": ("id", "id_sensor", "valor", "unidad"),
+    "Comentario":     ("id", "id_usuario", "id_reporte", "texto"),
+    "Multimedia":     ("id", "id_reporte", "tipoArchivo", "rutaArchivo"),
+    "Alerta":         ("id", "id_reporte", "tipo", "mensaje"),
+    "Indicador":      ("id", "id_zona", "id_registro_sensor", "nombre", "valor", "descripcion"),
+    "Informe":        ("id", "id_indicador", "titulo", "descripcion", "tipo", "fuentes"),
+}
+
+# Valores distintos precalculados por cada método de Faker
+TAM_POOL = 2000
+
+# Filas por bloque columnar. Forma parte del plan: cambiarlo cambia los datos generados
+TAM_BLOQUE_GENERACION = 10000
+
+# Semilla maestra por defecto, para que dos ejecuciones sin --semilla sean comparables
+SEMILLA_POR_DEFECTO = 42
+
+# Bloques encargados por adelantado a cada proceso en la generación paralela
+BLOQUES_EN_VUELO_POR_PROCESO = 2
+
+CATEGORIAS = ['Zona Céntrica', 'Barrio Residencial', 'Área Industrial', 'Zona de Conflicto']
+INCIDENTES = ['Robo con violencia', 'Conflicto vecinal', 'Vandalismo', 'Sospecha de actividad']
+ESTADOS = ['Nuevo', 'En análisis', 'Escalado a policía', 'Cerrado']
+PRIORIDADES = ['Crítica', 'Alta', 'Media', 'Baja']
+MEDIOS = ['App Ciudadana', 'Web Oficial', 'Red Social']
+TIPOS_SENSOR = ['Ruido Ambiental', 'Flujo Peatonal', 'Calidad Aire', 'Cámara CCTV']
+UNIDADES = ['dB', 'PPM']
+TIPOS_ARCHIVO = ['imagen/jpeg', 'video/mp4']
+TIPOS_ALERTA = ['Umbral de Ruido Superado', 'Patrón de Concurrencia Anormal', 'Alerta de Vandalismo']
+NOMBRES_INDICADOR = ['Nivel de Percepción de Riesgo', 'Índice de Conflictos', 'Frecuencia de Incidentes']
+TIPOS_INFORME = ['Análisis de Riesgo', 'Recomendaciones Operativas', 'Resumen Mensual de Seguridad']
+FUENTES_INFORME = "Sensores, Reportes, Datos Públicos"
+
+# Valores posibles de los decimales (dos decimales), equivalentes a
+# fake.pydecimal(3, 2, 40, 95) y fake.pydecimal(2, 2, 1, 10)
+VALORES_REGISTRO = [Decimal(c).scaleb(-2) for c in range(4000, 9501)]
+VALORES_INDICADOR = [Decimal(c).scaleb(-2) for c in range(100, 1001)]
+MODELOS_SENSOR = [f"MOD-{n}" for n in range(100, 1000)]
+
+
+def filas_tabla(tabla, scale_factor):
+    """Número de filas a generar para `tabla` con el scale factor dado."""
+    return max(1, round(NUM_REGISTROS_BASE * MULTIPLICADORES_TABLA[tabla] * scale_factor))
+
+
+def semilla_derivada(semilla, *partes):
+    """Deriva una semilla de 64 bits estable a partir de la maestra y un contexto.
+    No usa hash() para no depender de PYTHONHASHSEED entre procesos."""
+    texto = ":".join(map(str, (semilla,) + partes))
+    return int.from_bytes(hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def construir_pools(semilla=SEMILLA_POR_DEFECTO, tam=TAM_POOL):
+    """Precalcula una vez los valores de Faker que después se muestrean por columnas."""
+    fake.seed_instance(semilla_derivada(semilla, "pools"))
+    return {
+        "nombre": [fake.name() for _ in range(tam)],
+        "usuario": [fake.user_name() for _ in range(tam)],
+        "dominio": [fake.free_email_domain() for _ in range(tam)],
+        "telefono": [fake.phone_number() for _ in range(tam)],
+        "direccion": [fake.address() for _ in range(tam)],
+        "ciudad": [fake.city() for _ in range(tam)],
+        "coordenadas": [fake.coordinate() for _ in range(tam)],
+        "parrafo": [fake.paragraph(nb_sentences=2) for _ in range(tam)],
+        "frase_5": [fake.sentence(nb_words=5) for _ in range(tam)],
+        "frase_8": [fake.sentence(nb_words=8) for _ in range(tam)],
+        "frase_10": [fake.sentence(nb_words=10) for _ in range(tam)],
+        "texto_200": [fake.text(max_nb_chars=200) for _ in range(tam)],
+    }
+
+
+def crear_plan(ids, semilla=SEMILLA_POR_DEFECTO, fecha_referencia=None, tam_bloque=TAM_BLOQUE_GENERACION):
+    """Reúne lo que comparten los bloques de todas las tablas.
+
+    `ids` es un dict tabla -> range con los ids asignados a cada tabla.
+    Las fechas se generan entre el 1 de enero del año de `fecha_referencia` y
+    esa fecha (por defecto, hoy a las 00:00), como fake.date_time_this_year().
+    """
+    if fecha_referencia is None:
+        fecha_referencia = datetime.combine(datetime.now().date(), datetime.min.time())
+    inicio_anio = datetime(fecha_referencia.year, 1, 1)
+    rng = random.Random(semilla_derivada(semilla, "plan"))
+    return {
+        "ids": ids,
+        "semilla": semilla,
+        "tam_bloque": tam_bloque,
+        # Mezcla la asignación registro -> sensor (ver _sensor_de_registro)
+        "sal_sensores": rng.getrandbits(32),
+        # Mezcla la asignación sensor -> zona (ver _zona_de_sensor)
+        "sal_zonas": rng.getrandbits(32),
+        "inicio_fechas": inicio_anio,
+        "segundos": range(max(1, int((fecha_referencia - inicio_anio).total_seconds()))),
+    }
+
+
+def _sensor_de_registro(indice, n_sensores, sal):
+    """Posición del sensor asignado al registro número `indice`.
+    Es una función pura para que Indicador la recalcule sin leer RegistroSensor."""
+    return ((indice * 2654435761 + sal) & 0xFFFFFFFF) % n_sensores
+
+def _zona_de_sensor(indice, n_zonas, sal):
+    """Posición de la zona del sensor número `indice`. Función pura, como
+    _sensor_de_registro: Sensor e Indicador la calculan igual en cualquier proceso
+    sin que el plan lleve una tabla por sensor. Se rotan 16 bits del hash para que
+    el módulo (pocas zonas) use los bits altos, que son los bien mezclados."""
+    h = (indice * 2246822519 + sal) & 0xFFFFFFFF
+    return ((h >> 16) | ((h & 0xFFFF) << 16)) % n_zonas
+
+def _fechas(rng, plan, n):
+    # timedelta(0, s) en lugar de fromtimestamp: no depende de la zona horaria local
+    desplazamientos = map(timedelta, repeat(0), rng.choices(plan["segundos"], k=n))
+    return list(map(plan["inicio_fechas"].__add__, desplazamientos))
+
+def _uuid4(bits):
+    return str(uuid.UUID(int=bits, version=4))
+
+# --- GENERADORES DE BLOQUE POR TABLA ---
+# Cada uno recibe las posiciones [inicio, fin) dentro del rango de ids de la
+# tabla y devuelve las columnas del bloque en el orden de COLUMNAS[tabla].
+
+def _bloque_usuario(inicio, fin, plan, pools, rng):
+    n = fin - inicio
+    ids = plan["ids"]["Usuario"][inicio:fin]
+    # El id garantiza correos únicos aunque se generen millones de usuarios
+    correos = list(map("{}.{}@{}".format, rng.choices(pools["usuario"], k=n), ids, rng.choices(pools["dominio"], k=n)))
+    return [
+        ids,
+        rng.choices(pools["nombre"], k=n),
+        correos,
+        rng.choices(pools["telefono"], k=n),
+        rng.choices(pools["direccion"], k=n),
+        _fechas(rng, plan, n),
+    ]
+
+def _bloque_zona(inicio, fin, plan, pools, rng):
+    n = fin - inicio
+    return [
+        plan["ids"]["Zona"][inicio:fin],
+        rng.choices(pools["ciudad"], k=n),
+        rng.choices(CATEGORIAS, k=n),
+        rng.choices(pools["coordenadas"], k=n),
+        # Contador de reportes de la zona: lo pone al día resumenReportes.actualizar_resumenes
+        [0] * n,
+    ]
+
+def _bloque_reporte(inicio, fin, plan, pools, rng):
+    n = fin - inicio
+    ids = plan["ids"]
+    tipos = rng.choices(INCIDENTES, k=n)
+    descripciones = list(map("Reporte de {} cerca de {}. Detalle: {}".format,
+                             tipos, rng.choices(pools["ciudad"], k=n), rng.choices(pools["parrafo"], k=n)))
+    return [
+        ids["Reporte"][inicio:fin],
+        rng.choices(ids["Usuario"], k=n),
+        rng.choices(ids["Zona"], k=n),
+        tipos,
+        descripciones,
+        _fechas(rng, plan, n),
+        rng.choices(ESTADOS, k=n),
+        rng.choices(PRIORIDADES, k=n),
+        rng.choices(MEDIOS, k=n),
+    ]
+
+def _bloque_sensor(inicio, fin, plan, pools, rng):
+    n = fin - inicio
+    zona_ids, sal = plan["ids"]["Zona"], plan["sal_zonas"]
+    n_zonas = len(zona_ids)
+    return [
+        plan["ids"]["Sensor"][inicio:fin],
+        [zona_ids[_zona_de_sensor(k, n_zonas, sal)] for k in range(inicio, fin)],
+        rng.choices(TIPOS_SENSOR, k=n),
+        rng.choices(MODELOS_SENSOR, k=n),
+        ['Activo'] * n,
+        [f.date() for f in _fechas(rng, plan, n)],
+    ]
+
+def _bloque_registro_sensor(inicio, fin, plan, pools, rng):
+    n = fin - inicio
+    sensor_ids = plan["ids"]["Sensor"]
+    n_sensores, sal = len(sensor_ids), plan["sal_sensores"]
+    return [
+        plan["ids"]["RegistroSensor"][inicio:fin],
+        [sensor_ids[_sensor_de_registro(k, n_sensores, sal)] for k in range(inicio, fin)],
+        rng.choices(VALORES_REGISTRO, k=n),
+        rng.choices(UNIDADES, k=n),
+    ]
+
+def _bloque_comentario(inicio, fin, plan, pools, rng):
+    n = fin - inicio
+    ids = plan["ids"]
+    return [
+        ids["Comentario"][inicio:fin],
+        rng.choices(ids["Usuario"], k=n),
+        rng.choices(ids["Reporte"], k=n),
+        rng.choices(pools["frase_8"], k=n),
+    ]
+
+def _bloque_multimedia(inicio, fin, plan, pools, rng):
+    n = fin - inicio
+    rutas = ["/evidencia/" + _uuid4(rng.getrandbits(128)) for _ in range(n)]
+    return [
+        plan["ids"]["Multimedia"][inicio:fin],
+        rng.choices(plan["ids"]["Reporte"], k=n),
+        rng.choices(TIPOS_ARCHIVO, k=n),
+        rutas,
+    ]
+
+def _bloque_alerta(inicio, fin, plan, pools, rng):
+    n = fin - inicio
+    return [
+        plan["ids"]["Alerta"][inicio:fin],
+        rng.choices(plan["ids"]["Reporte"], k=n),
+        rng.choices(TIPOS_ALERTA, k=n),
+        rng.choices(pools["frase_10"], k=n),
+    ]
+
+def _bloque_indicador(inicio, fin, plan, pools, rng):
+    # Un indicador por registro de sensor: la zona sale de recalcular su sensor
+    n = fin - inicio
+    ids = plan["ids"]
+    sal_sensores, sal_zonas = plan["sal_sensores"], plan["sal_zonas"]
+    n_sensores, n_zonas = len(ids["Sensor"]), len(ids["Zona"])
+    return [
+        ids["Indicador"][inicio:fin],
+        [ids["Zona"][_zona_de_sensor(_sensor_de_registro(k, n_sensores, sal_sensores), n_zonas, sal_zonas)]
+         for k in range(inicio, fin)],
+        ids["RegistroSensor"][inicio:fin],
+        rng.choices(NOMBRES_INDICADOR, k=n),
+        rng.choices(VALORES_INDICADOR, k=n),
+        rng.choices(pools["frase_5"], k=n),
+    ]
+
+def _bloque_informe(inicio, fin, plan, pools, rng):
+    n = fin - inicio
+    titulos = list(map("{} - {}".format, rng.choices(TIPOS_INFORME, k=n), rng.choices(pools["ciudad"], k=n)))
+    return [
+        plan["ids"]["Informe"][inicio:fin],
+        rng.choices(plan["ids"]["Indicador"], k=n),
+        titulos,
+        rng.choices(pools["texto_200"], k=n),
+        rng.choices(TIPOS_INFORME, k=n),
+        [FUENTES_INFORME] * n,
+    ]
+
+_GENERADORES_BLOQUE = {
+    "Usuario": _bloque_usuario,
+    "Zona": _bloque_zona,
+    "Reporte": _bloque_reporte,
+    "Sensor": _bloque_sensor,
+    "RegistroSensor": _bloque_registro_sensor,
+    "Comentario": _bloque_comentario,
+    "Multimedia": _bloque_multimedia,
+    "Alerta": _bloque_alerta,
+    "Indicador": _bloque_indicador,
+    "Informe": _bloque_informe,
+}
+
+
+def generar_bloque(tabla, inicio, fin, plan, pools):
+    """Genera las posiciones [inicio, fin) de `tabla` como lista de columnas.
+    El resultado solo depende de la semilla del plan, la tabla y `inicio`."""
+    rng = random.Random(semilla_derivada(plan["semilla"], tabla, inicio))
+    return _GENERADORES_BLOQUE[tabla](inicio, fin, plan, pools, rng)
+
+def _limites_bloques(tabla, plan):
+    total, tam = len(plan["ids"][tabla]), plan["tam_bloque"]
+    return ((inicio, min(inicio + tam, total)) for inicio in range(0, total, tam))
+
+def generar_tabla(tabla, plan, pools, generador=None):
+    """Genera la tabla completa como una secuencia ordenada de bloques columnares.
+    Si se pasa un GeneradorParalelo, los bloques se reparten entre sus procesos."""
+    if generador is not None:
+        yield from generador.tabla(tabla)
+        return
+    for inicio, fin in _limites_bloques(tabla, plan):
+        yield generar_bloque(tabla, inicio, fin, plan, pools)
+
+# --- GENERACIÓN PARALELA ---
+
+# Plan y pools de cada proceso trabajador (los fija _inicializar_trabajador)
+_PLAN_TRABAJADOR = None
+_POOLS_TRABAJADOR = None
+
+def _inicializar_trabajador(plan, pools):
+    global _PLAN_TRABAJADOR, _POOLS_TRABAJADOR
+    _PLAN_TRABAJADOR, _POOLS_TRABAJADOR = plan, pools
+
+def _generar_bloque_trabajador(tabla, inicio, fin):
+    return generar_bloque(tabla, inicio, fin, _PLAN_TRABAJADOR, _POOLS_TRABAJADOR)
+
+
+class GeneradorParalelo:
+    """Reparte los bloques de cada tabla entre un pool de procesos.
+
+    Los bloques se devuelven en orden y con un número acotado en vuelo, así
+    que la memoria no crece con el tamaño de la tabla.
+    """
+
+    def __init__(self, plan, pools, procesos):
+        self.plan = plan
+        self.procesos = procesos
+        self._executor = ProcessPoolExecutor(
+            max_workers=procesos, initializer=_inicializar_trabajador, initargs=(plan, pools)
+        )
+
+    def tabla(self, tabla):
+        en_vuelo = deque()
+        for inicio, fin in _limites_bloques(tabla, self.plan):
+            en_vuelo.append(self._executor.submit(_generar_bloque_trabajador, tabla, inicio, fin))
+            if len(en_vuelo) >= self.procesos * BLOQUES_EN_VUELO_POR_PROCESO:
+                yield en_vuelo.popleft().result()
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
+
+    def cerrar(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+def filas_de_bloques(bloques):
+    """Convierte los bloques columnares en filas justo en el momento de cargarlas."""
+    for columnas in bloques:
+        yield from zip(*columnas)
@@ -0,0 +1,208 @@
+# Simulador de ingesta continua de lecturas de sensor.
+#
+# Un hilo productor emite lecturas de todos los sensores (por turnos) a una tasa
+# objetivo, controlada con un cubo de tokens, y las deja en una cola acotada.
+# El hilo principal las escribe en RegistroSensor por lotes, haciendo commit al
+# llegar a TAM_LOTE_INGESTA filas o a INTERVALO_COMMIT segundos. Si la base no
+# da abasto, la cola se llena y el productor se bloquea (contrapresión): la tasa
+# conseguida cae por debajo de la objetivo y el tiempo bloqueado lo refleja.
+
+import argparse
+import json
+import queue
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from cargaMasiva import MODOS_CARGA, insertar_filas
+from conexiones import DB_CONFIGS, conexion
+from generarDatos import SEMILLA_POR_DEFECTO, UNIDADES, VALORES_REGISTRO
+from rollupSensores import actualizar_rollups
+
+COLUMNAS_INGESTA = ("id_sensor", "fecha", "valor", "unidad")
+
+TASA_POR_DEFECTO = 10000       # filas/s
+TAM_LOTE_INGESTA = 5000        # filas por commit
+INTERVALO_COMMIT = 1.0         # segundos máximos entre commits
+TAM_TRAMO = 100                # filas por elemento de la cola
+TAM_COLA = 200                 # tramos en vuelo antes de bloquear al productor
+
+_FIN = None
+
+
+class _CuboTokens:
+    """Cubo de tokens: `tasa` tokens por segundo, con ráfagas de hasta `capacidad`."""
+
+    def __init__(self, tasa, capacidad):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.tokens = 0.0
+        self.ultimo = time.monotonic()
+
+    def esperar(self, n):
+        while True:
+            ahora = time.monotonic()
+            self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultimo) * self.tasa)
+            self.ultimo = ahora
+            if self.tokens >= n:
+                self.tokens -= n
+                return
+            time.sleep((n - self.tokens) / self.tasa)
+
+
+def _productor(sensores, tasa, duracion, cola, estado, semilla):
+    """Emite tramos de lecturas durante `duracion` segundos y termina con _FIN."""
+    rng = random.Random(semilla)
+    cubo = _CuboTokens(tasa, max(TAM_TRAMO, tasa * 0.1))
+    fin = time.monotonic() + duracion
+    turno = 0
+    while time.monotonic() < fin:
+        cubo.esperar(TAM_TRAMO)
+        fecha = datetime.now()
+        tramo = []
+        for _ in range(TAM_TRAMO):
+            tramo.append((sensores[turno], fecha, rng.choice(VALORES_REGISTRO), rng.choice(UNIDADES)))
+            turno = (turno + 1) % len(sensores)
+        inicio = time.monotonic()
+        cola.put(tramo)
+        estado["bloqueado_s"] += time.monotonic() - inicio
+        estado["emitidas"] += len(tramo)
+    cola.put(_FIN)
+
+
+def _resumen_latencias(latencias):
+    if not latencias:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordenadas = sorted(latencias)
+    p95 = statistics.quantiles(ordenadas, n=20, method="inclusive")[-1] if len(ordenadas) > 1 else ordenadas[0]
+    return {
+        "p50_ms": round(statistics.median(ordenadas) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "max_ms": round(ordenadas[-1] * 1000, 3),
+    }
+
+
+def ingerir(db_name, tasa=TASA_POR_DEFECTO, duracion=60, tam_lote=TAM_LOTE_INGESTA,
+            intervalo_commit=INTERVALO_COMMIT, modo_carga="nativo", semilla=SEMILLA_POR_DEFECTO):
+    """Ingesta continua en un motor durante `duracion` segundos. Devuelve el informe."""
+    with conexion(db_name) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM Sensor ORDER BY id")
+        sensores = [fila[0] for fila in cursor.fetchall()]
+        if not sensores:
+            raise ValueError("no hay sensores; ejecuta rellenarDatos.py antes de la ingesta")
+
+        cola = queue.Queue(maxsize=TAM_COLA)
+        estado = {"emitidas": 0, "bloqueado_s": 0.0}
+        productor = threading.Thread(
+            target=_productor, args=(sensores, tasa, duracion, cola, estado, semilla), daemon=True
+        )
+
+        escritas = 0
+        profundidad_maxima = 0
+        latencias_escritura, latencias_commit = [], []
+        lote = []
+
+        def volcar():
+            nonlocal escritas
+            inicio = time.perf_counter()
+            insertar_filas(cursor, conn, "RegistroSensor", COLUMNAS_INGESTA, lote, modo_carga)
+            antes_commit = time.perf_counter()
+            conn.commit()
+            fin = time.perf_counter()
+            latencias_escritura.append(antes_commit - inicio)
+            latencias_commit.append(fin - antes_commit)
+            escritas += len(lote)
+            lote.clear()
+
+        print(f"-> Ingesta en {db_name}: {len(sensores)} sensores, objetivo {tasa} filas/s durante {duracion} s...")
+        inicio = time.monotonic()
+        ultimo_volcado = inicio
+        productor.start()
+        while True:
+            profundidad_maxima = max(profundidad_maxima, cola.qsize())
+            espera = max(0.0, ultimo_volcado + intervalo_commit - time.monotonic())
+            try:
+                tramo = cola.get(timeout=espera)
+            except queue.Empty:
+                tramo = []
+            if tramo is _FIN:
+                break
+            lote.extend(tramo)
+            if len(lote) >= tam_lote or (lote and time.monotonic() - ultimo_volcado >= intervalo_commit):
+                volcar()
+                ultimo_volcado = time.monotonic()
+        if lote:
+            volcar()
+        segundos = time.monotonic() - inicio
+        productor.join()
+        cursor.close()
+        # Las lecturas nuevas se incorporan a los resúmenes por hora y día
+        actualizar_rollups(conn)
+
+    return {
+        "motor": db_name,
+        "tasa_objetivo": tasa,
+        "segundos": round(segundos, 3),
+        "filas": escritas,
+        "filas_por_segundo": round(escritas / segundos, 1) if segundos else 0.0,
+        "commits": len(latencias_commit),
+        "latencia_escritura": _resumen_latencias(latencias_escritura),
+        "latencia_commit": _resumen_latencias(latencias_commit),
+        "productor_bloqueado_s": round(estado["bloqueado_s"], 3),
+        "profundidad_maxima_cola": profundidad_maxima,
+    }
+
+
+def _ingerir_seguro(db_name, *argumentos):
+    """Punto de entrada de cada proceso: el fallo de un motor no detiene a los demás."""
+    try:
+        return ingerir(db_name, *argumentos)
+    except Exception as e:
+        print(f"ERROR en la ingesta de {db_name}: {e}")
+        return {"motor": db_name, "error": str(e).strip()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta continua de lecturas de sensor a una tasa objetivo.")
+    parser.add_argument("--motores", nargs="+", choices=list(DB_CONFIGS), default=list(DB_CONFIGS))
+    parser.add_argument("--tasa", type=int, default=TASA_POR_DEFECTO, help="Filas por segundo objetivo (por motor).")
+    parser.add_argument("--duracion", type=float, default=60, help="Segundos de ingesta.")
+    parser.add_argument("--tam-lote", type=int, default=TAM_LOTE_INGESTA, help="Filas por commit.")
+    parser.add_argument("--intervalo-commit", type=float, default=INTERVALO_COMMIT,
+                        help="Segundos máximos entre commits aunque el lote no esté lleno.")
+    parser.add_argument("--modo-carga", choices=MODOS_CARGA, default="nativo")
+    parser.add_argument("--semilla", type=int, default=SEMILLA_POR_DEFECTO)
+    parser.add_argument("--salida", default=None, help="Fichero JSON donde guardar el informe.")
+    args = parser.parse_args()
+
+    opciones = (args.tasa, args.duracion, args.tam_lote, args.intervalo_commit, args.modo_carga, args.semilla)
+    informes = {}
+    # Un proceso por motor, como en el relleno en paralelo
+    with ProcessPoolExecutor(max_workers=len(args.motores)) as executor:
+        futuros = {executor.submit(_ingerir_seguro, db_name, *opciones): db_name for db_name in args.motores}
+        for futuro in as_completed(futuros):
+            informes[futuros[futuro]] = futuro.result()
+
+    print("\n--- RESUMEN DE LA INGESTA ---")
+    for db_name in args.motores:
+        informe = informes[db_name]
+        if "error" in informe:
+            print(f"    {db_name}: ERROR - {informe['error']}")
+            continue
+        print(f"    {db_name}: {informe['filas']} filas en {informe['segundos']} s "
+              f"({informe['filas_por_segundo']} filas/s de {informe['tasa_objetivo']}), "
+              f"{informe['commits']} commits, commit p50={informe['latencia_commit']['p50_ms']} ms "
+              f"p95={informe['latencia_commit']['p95_ms']} ms, "
+              f"productor bloqueado {informe['productor_bloqueado_s']} s")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informes, f, ensure_ascii=False, indent=4)
+        print(f"Informe de la ingesta exportado a {args.salida}")
+
+if __name__ == "__main__":
+    main()
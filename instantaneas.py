@@ -0,0 +1,163 @@
+# Instantáneas de la base rellenada, para reiniciar benchmarks en segundos.
+#
+# Cada instantánea es una base de datos hermana de "negocio" cuyo nombre lleva el
+# scale factor, la semilla, la versión de los datos (rellenarDatos.VERSION_DATOS)
+# y si RegistroSensor está particionada (negocio_sf1_s42_v3, negocio_sf1_s42_v3_p).
+# Al cambiar la versión, las instantáneas antiguas dejan de encontrarse y se
+# vuelven a capturar; las huérfanas se ven con "listar" y se quitan con "borrar".
+#   - PostgreSQL: CREATE DATABASE ... TEMPLATE, que copia los ficheros de la base
+#     sin pasar por SQL. Requiere que la base de origen no tenga conexiones.
+#   - MySQL/MariaDB: copia en el servidor, tabla a tabla, con la DDL completa de
+#     SHOW CREATE TABLE (índices, FKs, particiones) + INSERT ... SELECT.
+# El usuario necesita permisos sobre las bases negocio_%: ver los inicio.sql.
+
+import argparse
+
+from conexiones import DB_CONFIGS, DB_CREDS, cerrar_pools, conectar_servidor
+from generarDatos import SEMILLA_POR_DEFECTO
+from rellenarDatos import VERSION_DATOS
+
+BASE = DB_CREDS["database"]
+
+
+def nombre_instantanea(scale_factor, semilla, particionada=False):
+    """Nombre de la base que guarda la instantánea de (scale_factor, semilla) en la versión actual."""
+    nombre = f"{BASE}_sf{scale_factor:g}_s{semilla}_v{VERSION_DATOS}" + ("_p" if particionada else "")
+    return nombre.replace(".", "_").replace("-", "m")
+
+
+def _existe(cursor, driver, base):
+    if driver == "psycopg2":
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (base,))
+    else:
+        cursor.execute("SELECT 1 FROM information_schema.SCHEMATA WHERE SCHEMA_NAME = %s", (base,))
+    return bool(cursor.fetchall())
+
+
+def _copiar_postgresql(cursor, origen, destino):
+    # CREATE DATABASE ... TEMPLATE falla si alguien está conectado al origen
+    cursor.execute(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s AND pid <> pg_backend_pid()",
+        (origen,)
+    )
+    cursor.fetchall()
+    cursor.execute(f"DROP DATABASE IF EXISTS {destino} WITH (FORCE)")
+    cursor.execute(f"CREATE DATABASE {destino} TEMPLATE {origen}")
+
+
+def _copiar_mysql(cursor, conn, origen, destino):
+    cursor.execute(f"DROP DATABASE IF EXISTS {destino}")
+    cursor.execute(f"CREATE DATABASE {destino}")
+    cursor.execute(
+        "SELECT TABLE_NAME FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE' ORDER BY TABLE_NAME",
+        (origen,)
+    )
+    tablas = [fila[0] for fila in cursor.fetchall()]
+    cursor.execute(f"USE {destino}")
+    # Sin comprobar FKs el orden de creación y copia de las tablas es indiferente
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+    try:
+        for tabla in tablas:
+            cursor.execute(f"SHOW CREATE TABLE {origen}.{tabla}")
+            cursor.execute(cursor.fetchall()[0][1])
+            cursor.execute(f"INSERT INTO {destino}.{tabla} SELECT * FROM {origen}.{tabla}")
+            conn.commit()
+    finally:
+        cursor.execute("SET SESSION foreign_key_checks = 1")
+
+
+def _copiar(db_name, origen, destino):
+    """Copia la base `origen` en `destino` dentro del servidor de `db_name`."""
+    config = DB_CONFIGS[db_name]
+    # Las conexiones del pool de este proceso apuntan a la base que se va a sustituir
+    cerrar_pools(db_name)
+    conn = conectar_servidor(config)
+    try:
+        cursor = conn.cursor()
+        if config["driver"] == "psycopg2":
+            conn.autocommit = True
+            if not _existe(cursor, "psycopg2", origen):
+                raise ValueError(f"no existe la base {origen}")
+            _copiar_postgresql(cursor, origen, destino)
+        else:
+            if not _existe(cursor, "mysql", origen):
+                raise ValueError(f"no existe la base {origen}")
+            _copiar_mysql(cursor, conn, origen, destino)
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def capturar(db_name, scale_factor, semilla, particionada=False):
+    """Guarda el estado actual de "negocio" como instantánea de (scale_factor, semilla)."""
+    destino = nombre_instantanea(scale_factor, semilla, particionada)
+    _copiar(db_name, BASE, destino)
+    print(f"{db_name}: instantánea {destino} capturada.")
+
+def restaurar(db_name, scale_factor, semilla, particionada=False):
+    """Sustituye "negocio" por la instantánea de (scale_factor, semilla)."""
+    origen = nombre_instantanea(scale_factor, semilla, particionada)
+    _copiar(db_name, origen, BASE)
+    print(f"{db_name}: {BASE} restaurada desde {origen}.")
+
+def existe(db_name, scale_factor, semilla, particionada=False):
+    conn = conectar_servidor(DB_CONFIGS[db_name])
+    try:
+        cursor = conn.cursor()
+        return _existe(cursor, DB_CONFIGS[db_name]["driver"], nombre_instantanea(scale_factor, semilla, particionada))
+    finally:
+        conn.close()
+
+def listar(db_name):
+    """Nombres de las instantáneas guardadas en el servidor de `db_name`."""
+    conn = conectar_servidor(DB_CONFIGS[db_name])
+    try:
+        cursor = conn.cursor()
+        patron = BASE + "\\_sf%"
+        if DB_CONFIGS[db_name]["driver"] == "psycopg2":
+            cursor.execute("SELECT datname FROM pg_database WHERE datname LIKE %s ORDER BY 1", (patron,))
+        else:
+            cursor.execute("SELECT SCHEMA_NAME FROM information_schema.SCHEMATA WHERE SCHEMA_NAME LIKE %s ORDER BY 1",
+                           (patron,))
+        return [fila[0] for fila in cursor.fetchall()]
+    finally:
+        conn.close()
+
+def borrar(db_name, scale_factor, semilla, particionada=False):
+    conn = conectar_servidor(DB_CONFIGS[db_name])
+    try:
+        conn.autocommit = True
+        cursor = conn.cursor()
+        forzar = " WITH (FORCE)" if DB_CONFIGS[db_name]["driver"] == "psycopg2" else ""
+        cursor.execute(f"DROP DATABASE IF EXISTS {nombre_instantanea(scale_factor, semilla, particionada)}{forzar}")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Captura y restaura instantáneas de la base rellenada.")
+    parser.add_argument("accion", choices=["capturar", "restaurar", "listar", "borrar"])
+    parser.add_argument("--motores", nargs="+", choices=list(DB_CONFIGS), default=list(DB_CONFIGS))
+    parser.add_argument("--scale-factor", type=float, default=1)
+    parser.add_argument("--semilla", type=int, default=SEMILLA_POR_DEFECTO)
+    parser.add_argument("--particionada", action="store_true",
+                        help="Instantánea de una base creada con crearBaseDeDatos.py --particionar.")
+    args = parser.parse_args()
+
+    for db_name in args.motores:
+        try:
+            if args.accion == "listar":
+                print(f"{db_name}: {', '.join(listar(db_name)) or 'sin instantáneas'}")
+            elif args.accion == "borrar":
+                borrar(db_name, args.scale_factor, args.semilla, args.particionada)
+                print(f"{db_name}: instantánea "
+                      f"{nombre_instantanea(args.scale_factor, args.semilla, args.particionada)} borrada.")
+            else:
+                accion = capturar if args.accion == "capturar" else restaurar
+                accion(db_name, args.scale_factor, args.semilla, args.particionada)
+        except Exception as e:
+            print(f"ERROR en {db_name}: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# Instrumentación del relleno y de los análisis.
+#
+# Dos tipos de métrica, guardadas en un registro por proceso:
+#   - Fases: duración, filas y bytes enviados de cada paso del relleno:
+#     generación y carga de cada tabla, índices, secuencias... En los modos
+#     executemany y valores, los bytes son una estimación a partir de los valores.
+#   - Histogramas de latencia: una observación por sentencia ejecutada en
+#     obtenerDatosImportantes, con cubetas fijas. Las registra el cursor de
+#     conexiones.sentencias_cronometradas.
+# Se exportan a JSON y al formato de texto de Prometheus (apto para el textfile
+# collector de node_exporter). El perfilado con cProfile del bucle de
+# generación es opcional: solo se activa con activar_perfil().
+
+import cProfile
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+
+PREFIJO_PROMETHEUS = "negocio"
+
+# Límites superiores (segundos) de las cubetas de los histogramas de latencia
+CUBETAS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, math.inf)
+
+_fases = []
+_histogramas = {}
+_etiquetas_globales = {}
+_perfil = None
+
+
+def reiniciar():
+    """Vacía el registro de este proceso (p. ej. antes de rellenar otro motor)."""
+    global _perfil
+    _fases.clear()
+    _histogramas.clear()
+    _etiquetas_globales.clear()
+    _perfil = None
+
+def fijar_etiquetas(**etiquetas):
+    """Etiquetas que se añaden a todas las métricas siguientes (p. ej. motor=...)."""
+    _etiquetas_globales.update(etiquetas)
+
+# --- FASES ---
+
+@contextmanager
+def fase(nombre, **etiquetas):
+    """Cronometra el bloque. Quien llama puede anotar "filas" y "bytes" en el dict devuelto."""
+    datos = {"filas": None, "bytes": None}
+    inicio = time.perf_counter()
+    try:
+        yield datos
+    finally:
+        segundos = time.perf_counter() - inicio
+        if "segundos_generacion" in datos:
+            datos["segundos_generacion"] = round(datos["segundos_generacion"], 6)
+        registro = {"fase": nombre, **_etiquetas_globales, **etiquetas, **datos, "segundos": round(segundos, 6)}
+        if datos["filas"] and segundos > 0:
+            registro["filas_por_segundo"] = round(datos["filas"] / segundos, 1)
+        _fases.append(registro)
+
+def bloques_cronometrados(bloques, datos):
+    """Recorre los bloques columnares anotando en `datos` el tiempo de generación y las filas.
+    Con el perfil activado, solo se perfila la producción de cada bloque."""
+    datos["filas"] = 0
+    datos["segundos_generacion"] = 0.0
+    iterador = iter(bloques)
+    while True:
+        inicio = time.perf_counter()
+        if _perfil:
+            _perfil.enable()
+        try:
+            bloque = next(iterador, None)
+        finally:
+            if _perfil:
+                _perfil.disable()
+        datos["segundos_generacion"] += time.perf_counter() - inicio
+        if bloque is None:
+            return
+        datos["filas"] += len(bloque[0])
+        yield bloque
+
+# --- HISTOGRAMAS DE LATENCIA ---
+
+def observar(nombre, valor, **etiquetas):
+    """Añade `valor` (segundos) al histograma `nombre` con esas etiquetas."""
+    clave = (nombre, tuple(sorted({**_etiquetas_globales, **etiquetas}.items())))
+    histograma = _histogramas.get(clave)
+    if histograma is None:
+        histograma = _histogramas[clave] = {"cubetas": [0] * len(CUBETAS_LATENCIA), "suma": 0.0, "cuenta": 0}
+    for i, limite in enumerate(CUBETAS_LATENCIA):
+        if valor <= limite:
+            histograma["cubetas"][i] += 1
+            break
+    histograma["suma"] += valor
+    histograma["cuenta"] += 1
+
+# --- PERFILADO ---
+
+def activar_perfil():
+    global _perfil
+    _perfil = cProfile.Profile()
+
+def guardar_perfil(ruta):
+    """Vuelca el perfil acumulado (formato pstats) si estaba activado."""
+    if _perfil:
+        _perfil.dump_stats(ruta)
+
+# --- EXPORTACIÓN ---
+
+def _como_json():
+    histogramas = []
+    for (nombre, etiquetas), h in sorted(_histogramas.items()):
+        acumulado, cubetas = 0, {}
+        for limite, n in zip(CUBETAS_LATENCIA, h["cubetas"]):
+            acumulado += n
+            cubetas["+Inf" if math.isinf(limite) else f"{limite:g}"] = acumulado
+        histogramas.append({"nombre": nombre, "etiquetas": dict(etiquetas), "cubetas": cubetas,
+                            "suma": round(h["suma"], 6), "cuenta": h["cuenta"]})
+    return {"fases": list(_fases), "histogramas": histogramas}
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _etiquetas_prometheus(etiquetas):
+    pares = ",".join(f'{k}="{_escapar(v)}"' for k, v in etiquetas.items())
+    return "{" + pares + "}" if pares else ""
+
+def _como_prometheus():
+    lineas = []
+    for campo, ayuda in (("segundos", "Duración de la fase"), ("filas", "Filas procesadas en la fase"),
+                         ("bytes", "Bytes enviados al servidor en la fase (exactos con carga nativa; "
+                                   "estimados a partir de los valores con executemany y valores)"),
+                         ("segundos_generacion", "Parte de la fase dedicada a generar los datos")):
+        metrica = f"{PREFIJO_PROMETHEUS}_fase_{campo}"
+        muestras = [f for f in _fases if f.get(campo) is not None]
+        if not muestras:
+            continue
+        lineas += [f"# HELP {metrica} {ayuda}", f"# TYPE {metrica} gauge"]
+        for f in muestras:
+            etiquetas = {k: v for k, v in f.items()
+                         if k not in ("filas", "bytes", "segundos", "segundos_generacion", "filas_por_segundo")}
+            lineas.append(f"{metrica}{_etiquetas_prometheus(etiquetas)} {f[campo]}")
+
+    for nombre in sorted({n for n, _ in _histogramas}):
+        metrica = f"{PREFIJO_PROMETHEUS}_{nombre}"
+        lineas += [f"# HELP {metrica} Latencia de las sentencias", f"# TYPE {metrica} histogram"]
+        for (n, etiquetas), h in sorted(_histogramas.items()):
+            if n != nombre:
+                continue
+            etiquetas = dict(etiquetas)
+            acumulado = 0
+            for limite, cuenta in zip(CUBETAS_LATENCIA, h["cubetas"]):
+                acumulado += cuenta
+                le = "+Inf" if math.isinf(limite) else f"{limite:g}"
+                lineas.append(f"{metrica}_bucket{_etiquetas_prometheus({**etiquetas, 'le': le})} {acumulado}")
+            lineas.append(f"{metrica}_sum{_etiquetas_prometheus(etiquetas)} {h['suma']:.6f}")
+            lineas.append(f"{metrica}_count{_etiquetas_prometheus(etiquetas)} {h['cuenta']}")
+    return "\n".join(lineas) + "\n"
+
+def exportar(directorio, nombre):
+    """Escribe <directorio>/<nombre>.json y <directorio>/<nombre>.prom."""
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, f"{nombre}.json"), "w", encoding="utf-8") as f:
+        json.dump(_como_json(), f, ensure_ascii=False, indent=4)
+    with open(os.path.join(directorio, f"{nombre}.prom"), "w", encoding="utf-8") as f:
+        f.write(_como_prometheus())
@@ -110,3 +110,54 @@ CREATE TABLE IF NOT EXISTS Informe (
     fuentes TEXT,
     FOREIGN KEY (id_indicador) REFERENCES Indicador(id) ON DELETE CASCADE
 );
+
+-- Resúmenes de RegistroSensor por sensor y hora/día (los mantiene rollupSensores.py)
+CREATE TABLE IF NOT EXISTS RegistroSensorHora (
+    id_sensor INT NOT NULL,
+    periodo DATETIME NOT NULL,
+    minimo DECIMAL(10,2),
+    maximo DECIMAL(10,2),
+    suma DECIMAL(20,2),
+    cuenta BIGINT,
+    PRIMARY KEY (id_sensor, periodo)
+);
+
+CREATE TABLE IF NOT EXISTS RegistroSensorDia (
+    id_sensor INT NOT NULL,
+    periodo DATETIME NOT NULL,
+    minimo DECIMAL(10,2),
+    maximo DECIMAL(10,2),
+    suma DECIMAL(20,2),
+    cuenta BIGINT,
+    PRIMARY KEY (id_sensor, periodo)
+);
+
+-- Último id de cada tabla de origen (RegistroSensor, Reporte, Comentario) incorporado a los resúmenes
+CREATE TABLE IF NOT EXISTS MarcaRollup (
+    tabla VARCHAR(50) PRIMARY KEY,
+    ultimo_id INT NOT NULL
+);
+
+-- Conteos por zona y por usuario de los análisis de Reporte (los mantiene resumenReportes.py)
+CREATE TABLE IF NOT EXISTS ResumenZona (
+    id_zona INT PRIMARY KEY,
+    reportes_criticos BIGINT NOT NULL DEFAULT 0,
+    reportes_alta BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ResumenUsuario (
+    id_usuario INT PRIMARY KEY,
+    reportes_resueltos BIGINT NOT NULL DEFAULT 0,
+    reportes_comentados BIGINT NOT NULL DEFAULT 0,
+    comentarios BIGINT NOT NULL DEFAULT 0
+);
+
+-- RegistroSensor puede crearse particionada por mes de fecha con
+-- crearBaseDeDatos.py --particionar (este script crea la versión sin particionar).
+
+-- Los índices secundarios no se declaran aquí: se crean después de la carga
+-- masiva (crearBaseDeDatos.crear_indices, llamado desde rellenarDatos.py).
+
+-- Permisos sobre las instantáneas (negocio_sf<scale factor>_s<semilla>) que
+-- crea y restaura instantaneas.py; el usuario solo tiene permisos sobre negocio.
+GRANT ALL PRIVILEGES ON `negocio\_%`.* TO 'user'@'%';
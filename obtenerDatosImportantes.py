@@ -1,43 +1,28 @@
-import mysql.connector
+import argparse
+import heapq
+import os
 import psycopg2
 import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from operator import itemgetter
 
-# --- CONFIGURACIÓN DE CONEXIÓN ---
-DB_CREDS = {
-    "host": "localhost",
-    "user": "user",
-    "password": "user123",
-    "database": "negocio"
-}
-
-DB_CONFIGS = {
-    "PostgreSQL": {"port": 5432, "driver": "psycopg2"},
-    "MySQL":      {"port": 3306, "driver": "mysql"}, # Asumiendo 3306 como puerto principal de MySQL
-    "MariaDB":    {"port": 3308, "driver": "mysql"},
-}
-
-# --- FUNCIONES DE CONEXIÓN ---
+import metricas
+from cacheAnalisis import TABLAS_ANALISIS, CacheAnalisis, marca_agua
+from conexiones import DB_CONFIGS, conexion, estadisticas, sentencias_cronometradas
+from correlacion import SQL_REGISTROS_ORDENADOS, correlacion_ventana
+from resumenReportes import (SQL_EFICIENCIA_USUARIOS_RESUMEN, SQL_ZONA_MAS_CRITICA_RESUMEN, SQL_ZONAS_RIESGO_RESUMEN,
+                             actualizar_resumenes)
 
-def get_db_connection(config):
-    """Establece la conexión a la base de datos."""
-    if config["driver"] == "psycopg2":
-        return psycopg2.connect(**DB_CREDS, port=config["port"])
-    else:
-        # Usa mysql-connector para MySQL y MariaDB
-        return mysql.connector.connect(**DB_CREDS, port=config["port"])
+# --- CONSULTAS DE ANÁLISIS ---
 
-# --- FUNCIONES DE EXTRACCIÓN Y ANÁLISIS ---
+# Consultas originales sobre las tablas completas (metodo="sql"). Por defecto,
+# los análisis de Reporte leen las tablas de resumenReportes.py, que se ponen al
+# día con las filas nuevas justo antes de consultarlas.
 
-def analizar_postgresql(conn):
-    """
-    Métrica: Zonas de Alto Riesgo por Incidencia y Prioridad.
-    Obtiene las 5 zonas con más reportes de prioridad 'Crítica' o 'Alta'.
-    """
-    print("-> Extrayendo Zonas de Alto Riesgo (PostgreSQL)...")
-    
-    # Consulta que une Zona y Reporte, agrupando por Zona y contando reportes críticos/altos.
-    sql = """
+# Zonas de Alto Riesgo: une Zona y Reporte, agrupando por Zona y contando reportes críticos/altos.
+SQL_ZONAS_RIESGO = """
     SELECT
         Z.nombre AS nombre_zona,
         COUNT(R.id) AS total_incidentes_criticos,
@@ -49,6 +34,114 @@ def analizar_postgresql(conn):
     ORDER BY total_incidentes_criticos DESC
     LIMIT 5;
     """
+
+# Eficiencia de cierre: une Usuario, Reporte y Comentario.
+SQL_EFICIENCIA_USUARIOS = """
+    SELECT
+        U.nombre AS nombre_usuario,
+        COUNT(R.id) AS reportes_resueltos,
+        AVG(Sub.total_comentarios) AS promedio_comentarios_por_reporte
+    FROM Usuario U
+    JOIN Reporte R ON U.id = R.id_usuario
+    LEFT JOIN (
+        SELECT id_reporte, COUNT(id) AS total_comentarios
+        FROM Comentario
+        GROUP BY id_reporte
+    ) Sub ON R.id = Sub.id_reporte
+    WHERE R.estado = 'Cerrado' OR R.estado = 'Resuelto'
+    GROUP BY U.id, U.nombre
+    ORDER BY reportes_resueltos DESC
+    LIMIT 5;
+    """
+
+# Correlación Sensor-Reporte, consulta original (metodo="sql" en analizar_mariadb).
+# El join intermedio crece de forma cuadrática con los registros; por defecto se
+# usa el motor de ventana deslizante de correlacion.py, que da el mismo resultado.
+# 1. Empieza con RegistroSensor (la fuente de datos de tiempo).
+# 2. Une con Sensor y Zona para obtener la ubicación.
+# 3. Une con Reporte y Alerta usando la condición de la misma Zona.
+# 4. Aplica la condición temporal.
+# {desde_fecha_sensor} es la expresión "2 días antes de RS.fecha" en el dialecto de cada motor.
+SQL_CORRELACION_SENSOR = """
+        SELECT
+        Z.nombre AS zona,
+        S.tipo AS tipo_sensor,
+        COUNT(DISTINCT R.id) AS reportes_ciudadanos_cercanos
+        FROM RegistroSensor RS
+        JOIN Sensor S ON RS.id_sensor = S.id
+        JOIN Zona Z ON S.id_zona = Z.id
+        JOIN Reporte R ON R.id_zona = Z.id
+        JOIN Alerta A ON A.id_reporte = R.id
+        WHERE
+            -- Corregido: R.fechaHora está entre 2 días antes y la hora del registro del sensor (RS.fecha)
+            R.fechaHora BETWEEN {desde_fecha_sensor} AND RS.fecha
+        GROUP BY Z.nombre, S.tipo
+        HAVING COUNT(R.id) > 0
+        ORDER BY reportes_ciudadanos_cercanos DESC
+        LIMIT 5;
+        """
+DESDE_FECHA_SENSOR = {
+    "psycopg2": "RS.fecha - INTERVAL '2 days'",
+    "mysql": "DATE_SUB(RS.fecha, INTERVAL 2 DAY)",
+}
+
+# Reportes de prioridad Alta por zona (agregado parcial de funcionConjunta).
+# Sin ORDER BY ni LIMIT: cada motor devuelve todas sus zonas y el top-k global
+# se calcula al combinar los tres resultados.
+SQL_ZONA_MAS_CRITICA = """
+       SELECT
+            Z.nombre AS zona,
+            COUNT(R.id) AS reportes_alta_prioridad
+        FROM Zona Z
+        JOIN Reporte R ON Z.id = R.id_zona
+        WHERE
+            R.prioridad = 'Alta'
+        GROUP BY
+            Z.nombre;
+        """
+
+def consulta_analisis(nombre, conn):
+    """Devuelve el SQL que ejecuta el análisis `nombre` en el motor de `conn`."""
+    driver = "psycopg2" if isinstance(conn, psycopg2.extensions.connection) else "mysql"
+    if nombre == "analizar_postgresql":
+        return SQL_ZONAS_RIESGO_RESUMEN
+    if nombre == "analizar_postgresql_sql":
+        return SQL_ZONAS_RIESGO
+    if nombre == "analizar_mysql":
+        return SQL_EFICIENCIA_USUARIOS_RESUMEN
+    if nombre == "analizar_mysql_sql":
+        return SQL_EFICIENCIA_USUARIOS
+    if nombre == "analizar_mariadb":
+        # La consulta dominante del motor de ventana: los registros ordenados
+        return SQL_REGISTROS_ORDENADOS
+    if nombre == "analizar_mariadb_sql":
+        return SQL_CORRELACION_SENSOR.format(desde_fecha_sensor=DESDE_FECHA_SENSOR[driver])
+    if nombre == "funcionConjunta":
+        return SQL_ZONA_MAS_CRITICA_RESUMEN
+    if nombre == "funcionConjunta_sql":
+        return SQL_ZONA_MAS_CRITICA
+    raise ValueError(f"Análisis desconocido: {nombre}")
+
+# --- FUNCIONES DE EXTRACCIÓN Y ANÁLISIS ---
+
+def _sql_segun_metodo(conn, metodo, sql_resumen, sql_original):
+    """SQL del análisis: con metodo="resumen" pone antes al día los resúmenes."""
+    if metodo == "resumen":
+        actualizar_resumenes(conn)
+        return sql_resumen
+    if metodo == "sql":
+        return sql_original
+    raise ValueError(f"Método desconocido: {metodo}. Opciones: resumen, sql")
+
+def analizar_postgresql(conn, metodo="resumen"):
+    """
+    Métrica: Zonas de Alto Riesgo por Incidencia y Prioridad.
+    Obtiene las 5 zonas con más reportes de prioridad 'Crítica' o 'Alta'.
+    metodo: "resumen" (ResumenZona, incremental) o "sql" (agrega Reporte completo).
+    """
+    print("-> Extrayendo Zonas de Alto Riesgo (PostgreSQL)...")
+    
+    sql = _sql_segun_metodo(conn, metodo, SQL_ZONAS_RIESGO_RESUMEN, SQL_ZONAS_RIESGO)
     cursor = conn.cursor()
     cursor.execute(sql)
     
@@ -67,32 +160,16 @@ def analizar_postgresql(conn):
         "top_zonas": resultados
     }
 
-def analizar_mysql(conn):
+def analizar_mysql(conn, metodo="resumen"):
     """
     Métrica: Eficiencia de Cierre de Reportes por Usuario.
     Obtiene los 5 usuarios con más reportes resueltos y el promedio de comentarios
     que sus reportes reciben, indicando la interacción comunitaria.
+    metodo: "resumen" (ResumenUsuario, incremental) o "sql" (agrega Reporte y Comentario completos).
     """
     print("-> Extrayendo Eficiencia de Reportes (MySQL)...")
     
-    # Consulta que une Usuario, Reporte y Comentario.
-    sql = """
-    SELECT
-        U.nombre AS nombre_usuario,
-        COUNT(R.id) AS reportes_resueltos,
-        AVG(Sub.total_comentarios) AS promedio_comentarios_por_reporte
-    FROM Usuario U
-    JOIN Reporte R ON U.id = R.id_usuario
-    LEFT JOIN (
-        SELECT id_reporte, COUNT(id) AS total_comentarios
-        FROM Comentario
-        GROUP BY id_reporte
-    ) Sub ON R.id = Sub.id_reporte
-    WHERE R.estado = 'Cerrado' OR R.estado = 'Resuelto'
-    GROUP BY U.id, U.nombre
-    ORDER BY reportes_resueltos DESC
-    LIMIT 5;
-    """
+    sql = _sql_segun_metodo(conn, metodo, SQL_EFICIENCIA_USUARIOS_RESUMEN, SQL_EFICIENCIA_USUARIOS)
     cursor = conn.cursor()
     cursor.execute(sql)
     
@@ -112,48 +189,32 @@ def analizar_mysql(conn):
         "top_usuarios_eficientes": resultados
     }
 
-def analizar_mariadb(conn):
+def analizar_mariadb(conn, metodo="ventana"):
     """
     Métrica: Correlación entre Alertas de Sensor y Reportes Ciudadanos.
     Cuenta cuántos reportes ciudadanos existen en una zona y tiempo similar a un registro de sensor,
     validando la correlación entre percepción (Reporte) y tecnología (Sensor).
+    metodo: "ventana" (sort-merge en streaming, lineal) o "sql" (la consulta original).
     """
     print("-> Extrayendo Correlación Sensor-Reporte (MariaDB)...")
     
-    # Consulta optimizada para MariaDB:
-    # 1. Empieza con RegistroSensor (la fuente de datos de tiempo).
-    # 2. Une con Sensor y Zona para obtener la ubicación.
-    # 3. Une con Reporte y Alerta usando la condición de la misma Zona.
-    # 4. Aplica la condición temporal.
-    sql = """
-        SELECT
-        Z.nombre AS zona,
-        S.tipo AS tipo_sensor,
-        COUNT(DISTINCT R.id) AS reportes_ciudadanos_cercanos
-        FROM RegistroSensor RS
-        JOIN Sensor S ON RS.id_sensor = S.id
-        JOIN Zona Z ON S.id_zona = Z.id
-        JOIN Reporte R ON R.id_zona = Z.id
-        JOIN Alerta A ON A.id_reporte = R.id
-        WHERE
-            -- Corregido: R.fechaHora está entre 2 días antes y la hora del registro del sensor (RS.fecha)
-            R.fechaHora BETWEEN DATE_SUB(RS.fecha, INTERVAL 2 DAY) AND RS.fecha
-        GROUP BY Z.nombre, S.tipo
-        HAVING COUNT(R.id) > 0
-        ORDER BY reportes_ciudadanos_cercanos DESC
-        LIMIT 5;
-        """
-    cursor = conn.cursor()
-    cursor.execute(sql)
+    if metodo == "ventana":
+        filas = correlacion_ventana(conn, limite=5)
+    elif metodo == "sql":
+        cursor = conn.cursor()
+        cursor.execute(consulta_analisis("analizar_mariadb_sql", conn))
+        filas = cursor.fetchall()
+        cursor.close()
+    else:
+        raise ValueError(f"Método de correlación desconocido: {metodo}")
     
     resultados = []
-    for row in cursor.fetchall():
+    for row in filas:
         resultados.append({
             "zona": row[0],
             "sensor": row[1],
             "reportes_ciudadanos_afectados": row[2]
         })
-    cursor.close()
     
     return {
         "fecha_generacion": datetime.now().isoformat(),
@@ -161,87 +222,149 @@ def analizar_mariadb(conn):
         "top_correlaciones_sensor_reporte": resultados
     }
 
-def funcionConjunta():
-    sql="""
-       SELECT
-            Z.nombre AS zona_mas_critica,
-            COUNT(R.id) AS reportes_alta_prioridad_total
-        FROM Zona Z
-        JOIN Reporte R ON Z.id = R.id_zona
-        WHERE
-            R.prioridad = 'Alta'
-        GROUP BY
-            Z.nombre
-        ORDER BY
-            reportes_alta_prioridad_total DESC
-        LIMIT 1;
-        """
-    dbNames = ["PostgreSQL", "MySQL", "MariaDB"]
-    resultado = []
+# --- CONSULTA FEDERADA ---
 
-    for db in dbNames:
-        conn = None
-        try:
-            config = DB_CONFIGS[db]
-            conn = get_db_connection(config)
-
-            cursor = conn.cursor()
-
-            cursor.execute(sql)
-        
-            for row in cursor.fetchall():
-                resultado.append({
-                    "zona_mas_critica": row[0],
-                    "reportes_alta_prioridad_total": row[1],
-                })
-            cursor.close()
-        except Exception as e:
-            print(f"ERROR al procesar {db}:")
-            print(f"Detalle: {e}")
-        finally:
-            if conn:
-                conn.close()
+def _consultar_motor(db_name, sql, sentencia, antes=None):
+    with conexion(db_name) as conn, sentencias_cronometradas(conn, analisis=sentencia, motor=db_name):
+        if antes:
+            antes(conn)
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        filas = cursor.fetchall()
+        cursor.close()
+        return filas
+
+def consulta_federada(sql, motores=None, sentencia="federada", antes=None):
+    """Ejecuta `sql` en todos los motores a la vez (un hilo por motor).
+    `antes(conn)`, si se indica, se ejecuta en cada motor antes de la consulta.
+    Devuelve {motor: filas} con los motores que respondieron."""
+    motores = list(motores or DB_CONFIGS)
+    resultados = {}
+    with ThreadPoolExecutor(max_workers=len(motores)) as pool:
+        futuros = {pool.submit(_consultar_motor, db, sql, sentencia, antes): db for db in motores}
+        for futuro in as_completed(futuros):
+            db = futuros[futuro]
+            try:
+                resultados[db] = futuro.result()
+            except Exception as e:
+                print(f"ERROR al procesar {db}:")
+                print(f"Detalle: {e}")
+    return resultados
 
-    return resultado
+def funcionConjunta(k=1, metodo="resumen"):
+    """Las `k` zonas con más reportes de prioridad Alta sumando los tres motores.
+    Cada motor devuelve sus conteos por zona; se suman y se elige el top-k con un heap.
+    metodo: "resumen" (ResumenZona de cada motor, puesta al día antes) o "sql"."""
+    if metodo == "resumen":
+        parciales = consulta_federada(SQL_ZONA_MAS_CRITICA_RESUMEN, sentencia="funcionConjunta",
+                                      antes=actualizar_resumenes)
+    elif metodo == "sql":
+        parciales = consulta_federada(SQL_ZONA_MAS_CRITICA, sentencia="funcionConjunta")
+    else:
+        raise ValueError(f"Método desconocido: {metodo}. Opciones: resumen, sql")
+    return combinar_zonas(parciales, k)
 
+def combinar_zonas(parciales, k=1):
+    """Suma los conteos por zona de {motor: [(zona, total), ...]} y devuelve el top-k."""
+    totales = Counter()
+    for filas in parciales.values():
+        for zona, total in filas:
+            # SUM llega como Decimal (numeric en PostgreSQL, DECIMAL en MySQL), que json no serializa
+            totales[zona] += int(total)
+
+    return [
+        {"zona_mas_critica": zona, "reportes_alta_prioridad_total": total}
+        for zona, total in heapq.nlargest(k, totales.items(), key=itemgetter(1))
+    ]
 
-    
 
 # --- FUNCIÓN PRINCIPAL ---
 
-def main():
+# Análisis que se exporta de cada motor y fichero de destino
+ANALISIS_POR_MOTOR = {
+    "PostgreSQL": (analizar_postgresql, "analisisZonasRiesgo.json"),
+    "MySQL":      (analizar_mysql, "analisis_eficiencia_usuarios.json"),
+    "MariaDB":    (analizar_mariadb, "analisisCorrelacionSensor.json"),
+}
+
+def _escribir_json(filename, data):
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+def main(usar_cache=True, directorio_metricas=None):
+    """Exporta los análisis de cada motor y el conjunto de los tres.
+    Cada sentencia se cronometra en el histograma sentencia_segundos (etiquetas
+    analisis, sentencia y motor); con `directorio_metricas` se exporta como analisis.json/.prom."""
     print("--- INICIO DE EXPORTACIÓN DE ANÁLISIS CLAVE ---")
     
-    export_functions = {
-        "PostgreSQL": (analizar_postgresql, "analisisZonasRiesgo.json"),
-        "MySQL":      (analizar_mysql, "analisis_eficiencia_usuarios.json"),
-        "MariaDB":    (analizar_mariadb, "analisisCorrelacionSensor.json"),
-    }
+    export_functions = ANALISIS_POR_MOTOR
+    cache = CacheAnalisis() if usar_cache else None
+    # Marca de funcionConjunta por motor; si falta algún motor no se usa la caché
+    marcas_conjunta = {}
     
     for db_name, (analysis_func, filename) in export_functions.items():
-        conn = None
         try:
-            config = DB_CONFIGS[db_name]
-            conn = get_db_connection(config)
+            with conexion(db_name) as conn:
+                # 1. Ejecutar análisis (o servirlo de la caché si los datos no han cambiado)
+                data = None
+                if cache:
+                    nombre = analysis_func.__name__
+                    tablas = TABLAS_ANALISIS[nombre]
+                    # Una sola consulta de marca por motor, también para funcionConjunta
+                    with sentencias_cronometradas(conn, analisis="marca_agua", motor=db_name):
+                        marca = marca_agua(conn, sorted(set(tablas) | set(TABLAS_ANALISIS["funcionConjunta"])))
+                    marcas_conjunta[db_name] = {t: marca[t] for t in TABLAS_ANALISIS["funcionConjunta"]}
+                    marca = {t: marca[t] for t in tablas}
+                    clave = f"{db_name}:{nombre}"
+                    data = cache.obtener(clave, marca)
             
-            # 1. Ejecutar análisis
-            data = analysis_func(conn)
+                if data is not None and os.path.exists(filename):
+                    print(f"Análisis de {db_name} sin cambios: se mantiene {filename} (caché)")
+                    continue
+                if data is None:
+                    with sentencias_cronometradas(conn, analisis=analysis_func.__name__, motor=db_name):
+                        data = analysis_func(conn)
+                    if cache:
+                        cache.guardar(clave, marca, data)
             
-            # 2. Guardar en JSON
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+                # 2. Guardar en JSON
+                _escribir_json(filename, data)
             
-            print(f"Análisis de {db_name} exportado a {filename}")
+                print(f"Análisis de {db_name} exportado a {filename}")
 
         except Exception as e:
             print(f"ERROR al procesar {db_name}:")
             print(f"Detalle: {e}")
-        finally:
-            if conn:
-                conn.close()
 
-    with open("datosDeLasTresBases", 'w' ,encoding='utf-8') as f:
-        json.dump(funcionConjunta(),f,ensure_ascii=False, indent=4)
+    conjunta = None
+    if cache and len(marcas_conjunta) == len(DB_CONFIGS):
+        conjunta = cache.obtener("funcionConjunta", marcas_conjunta)
+    if conjunta is not None and os.path.exists("datosDeLasTresBases"):
+        print("funcionConjunta sin cambios: se mantiene datosDeLasTresBases (caché)")
+    else:
+        if conjunta is None:
+            conjunta = funcionConjunta()
+            if cache and len(marcas_conjunta) == len(DB_CONFIGS):
+                cache.guardar("funcionConjunta", marcas_conjunta, conjunta)
+        _escribir_json("datosDeLasTresBases", conjunta)
+
+    if cache:
+        cache.persistir()
+
+    print("\n--- POOL DE CONEXIONES ---")
+    for db_name, datos in estadisticas().items():
+        print(f"    {db_name}: {datos['prestamos']} préstamos, espera media {datos['espera_media_ms']} ms, "
+              f"ocupación pico {datos['pico_en_uso']}/{datos['tam_pool']}")
+
+    if directorio_metricas:
+        metricas.exportar(directorio_metricas, "analisis")
+        print(f"Latencias de las sentencias exportadas a {directorio_metricas}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Exporta los análisis clave de las tres bases de datos.")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="Recalcula todos los análisis aunque los datos no hayan cambiado.")
+    parser.add_argument("--metricas", metavar="DIRECTORIO", default=None,
+                        help="Exporta en DIRECTORIO el histograma de latencias por sentencia (JSON y Prometheus).")
+    args = parser.parse_args()
+    main(usar_cache=not args.sin_cache, directorio_metricas=args.metricas)
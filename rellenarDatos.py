@@ -1,219 +1,460 @@
-# 1. name()   nombre ramdom
-# 2. email()  email inventado
-# 3. phone_number() numero de telefono
-# 4. address() dirección
-# 5. date_time_this_year()  generador de fecha
-# 6. city()  Ciudad aleatoria
-# 7. random_int()    numero entero aleatorio
-# 8. coordinate()    coordenadas en el mapa
-# 9. sentence()     frase de relleno
-# 10. pydecimal()   para generar numeros decimales
-
-import mysql.connector
-import psycopg2
-from faker import Faker
-import random
-from datetime import datetime
-
-fake = Faker('es_ES')
-NUM_REGISTROS_BASE = 15 
-
-DB_CREDS = {
-    "host": "localhost",
-    "user": "user",
-    "password": "user123",
-    "database": "negocio"
-}
-
-DB_CONFIGS = {
-    "PostgreSQL": {"port": 5432, "driver": "psycopg2"},
-    "MySQL":      {"port": 3306, "driver": "mysql"}, 
-    "MariaDB":    {"port": 3308, "driver": "mysql"},
-}
-
-
-def get_db_connection(config):
-    """Establece la conexión a la base de datos."""
-    if config["driver"] == "psycopg2":
-        return psycopg2.connect(**DB_CREDS, port=config["port"])
-    else:
-        return mysql.connector.connect(**DB_CREDS, port=config["port"])
+import argparse
+import contextlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import metricas
+from conexiones import DB_CONFIGS, conexion
+from cargaMasiva import (MODOS_CARGA, cargar_csv, es_postgresql, escribir_csv, insertar_filas,
+                         sesion_carga_rapida)
+from busqueda import crear_indices_busqueda
+from crearBaseDeDatos import crear_indices
+from generacionServidor import generar_en_servidor
+from datetime import datetime, timedelta
+
+from resumenReportes import actualizar_resumenes
+from rollupSensores import actualizar_rollups
+from generarDatos import (COLUMNAS, MULTIPLICADORES_TABLA, SEMILLA_POR_DEFECTO, GeneradorParalelo,
+                          construir_pools, crear_plan, filas_de_bloques, filas_tabla, generar_tabla)
+
+# Fichero que describe un intermedio generado (parámetros y filas por tabla)
+MANIFIESTO_INTERMEDIO = "manifiesto.json"
+
+# Versión de los datos y del esquema rellenados: al cambiarla, los intermedios y las
+# instantáneas anteriores no se reutilizan. Hay que subirla con cada cambio de esquema
+# o de datos derivados.
+#   2: Zona.numeroIncidencias empieza en 0 y la mantiene resumenReportes.
+#   3: índices de texto completo de busqueda.py.
+#   4: la zona de cada sensor sale de un hash (generarDatos._zona_de_sensor).
+VERSION_DATOS = 4
+
+# Motor que está rellenando este proceso; prefija el progreso en modo paralelo
+MOTOR_ACTUAL = None
+
+
+def progreso(mensaje):
+    """Imprime una línea de progreso, indicando el motor si se rellena en paralelo."""
+    prefijo = f"[{MOTOR_ACTUAL}] " if MOTOR_ACTUAL else ""
+    print(f"    {prefijo}- {mensaje}", flush=True)
 
-def fetch_ids(cursor, table):
-    """Obtiene todos los IDs de una tabla. Crucial para FKs."""
+def reservar_ids(cursor, conn, tabla, n):
+    """Reserva `n` ids consecutivos de `tabla` avanzando su secuencia/AUTO_INCREMENT,
+    para que otros escritores (p. ej. ingestaSensores) no los tomen mientras se carga.
+    Es la única consulta previa por tabla: las FKs se eligen después sobre el rango.
+      - PostgreSQL: con la tabla bloqueada frente a INSERT, nextval + setval al final del bloque.
+      - MySQL/MariaDB: con LOCK TABLES ... WRITE, MAX(id) + ALTER TABLE ... AUTO_INCREMENT.
+    Hace commit."""
+    if es_postgresql(conn):
+        # SHARE ROW EXCLUSIVE choca con el ROW EXCLUSIVE de los INSERT, que toman el
+        # lock antes de evaluar el DEFAULT nextval(): nadie pide ids entre las dos sentencias
+        cursor.execute(f"LOCK TABLE {tabla} IN SHARE ROW EXCLUSIVE MODE")
+        cursor.execute(
+            f"SELECT pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1 FROM {tabla}", (tabla.lower(),)
+        )
+        secuencia, siguiente = cursor.fetchall()[0]
+        # Si hubo ids explícitos sin sincronizar la secuencia, manda MAX(id)
+        cursor.execute("SELECT GREATEST(nextval(%s), %s)", (secuencia, siguiente))
+        inicio = cursor.fetchall()[0][0]
+        if n:
+            cursor.execute("SELECT setval(%s, %s)", (secuencia, inicio + n - 1))
+        conn.commit()
+        return range(inicio, inicio + n)
+
+    cursor.execute(f"LOCK TABLES {tabla} WRITE")
     try:
-        cursor.execute(f"SELECT id FROM {table}")
-        return [row[0] for row in cursor.fetchall()]
-    except Exception:
-        return []
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {tabla}")
+        inicio = cursor.fetchall()[0][0]
+        # InnoDB nunca baja el contador por debajo de MAX(id) + 1
+        cursor.execute(f"ALTER TABLE {tabla} AUTO_INCREMENT = {inicio + n}")
+    finally:
+        cursor.execute("UNLOCK TABLES")
+    conn.commit()
+    return range(inicio, inicio + n)
+
+def _tabla_vacia(cursor, tabla):
+    cursor.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM {tabla} LIMIT 1) T")
+    return cursor.fetchall()[0][0] == 0
+
+def sincronizar_secuencias(cursor, conn, tablas):
+    """Tras insertar ids explícitos, avanza las secuencias SERIAL de PostgreSQL hasta MAX(id).
+    Nunca las retrasa: con reservar_ids ya están al final del bloque y puede haber ids
+    de otros escritores aún sin confirmar. En MySQL/MariaDB el AUTO_INCREMENT se ajusta solo."""
+    if not es_postgresql(conn):
+        return
+    for tabla in tablas:
+        cursor.execute(
+            "SELECT setval(S.secuencia, GREATEST(COALESCE(T.maximo, 1), COALESCE(pg_sequence_last_value(S.secuencia), 1)),"
+            " T.maximo IS NOT NULL OR pg_sequence_last_value(S.secuencia) IS NOT NULL)"
+            f" FROM (SELECT MAX(id) AS maximo FROM {tabla}) T,"
+            " (SELECT pg_get_serial_sequence(%s, 'id')::regclass AS secuencia) S",
+            (tabla.lower(),)
+        )
+    conn.commit()
+
+def cargar_tabla(cursor, conn, tabla, plan, pools, modo_carga="executemany", generador=None):
+    """Genera `tabla` por bloques columnares y la carga a medida que se produce.
+    La fase registra el tiempo total, el de generación, las filas y los bytes enviados."""
+    with metricas.fase("carga_tabla", tabla=tabla) as datos:
+        bloques = metricas.bloques_cronometrados(generar_tabla(tabla, plan, pools, generador), datos)
+        datos["bytes"] = insertar_filas(cursor, conn, tabla, COLUMNAS[tabla], filas_de_bloques(bloques), modo_carga)
 
 # --- FUNCIONES DE INSERCIÓN LÓGICA POR TABLA (ORDENADO POR DEPENDENCIAS) ---
+# Los datos los produce generarDatos por bloques de columnas: nunca se
+# materializa la tabla completa en memoria. Los ids se asignan en el cliente
+# (rangos de reservar_ids, ya apartados de la secuencia de cada tabla), así
+# que las FKs se muestrean sobre un range sin releer ninguna tabla.
 
-def insert_usuario_zona(cursor, conn):
+def insert_usuario_zona(cursor, conn, plan, pools, modo_carga="executemany", generador=None):
     """Inserta datos en tablas raíz: Usuario y Zona."""
     
     # 1 Tabla Usuario
-    sql_user = "INSERT INTO Usuario (nombre, correo, telefono, direccion, fechaDeRegistro) VALUES (%s, %s, %s, %s, %s)"
-    data_users = [(fake.name(), fake.email(), fake.phone_number(), fake.address(), fake.date_time_this_year()) for _ in range(NUM_REGISTROS_BASE * 2)]
-    cursor.executemany(sql_user, data_users)
-    print("    - Usuarios insertados.")
+    cargar_tabla(cursor, conn, "Usuario", plan, pools, modo_carga, generador)
+    progreso("Usuarios insertados.")
 
     # 2 Tabla Zona 
-    sql_zona = "INSERT INTO Zona (nombre, categoria, coordenadas, numeroIncidencias) VALUES (%s, %s, %s, %s)"
-    categorias = ['Zona Céntrica', 'Barrio Residencial', 'Área Industrial', 'Zona de Conflicto']
-    data_zonas = [(fake.city(), random.choice(categorias), fake.coordinate(), fake.random_int(0, 100)) for _ in range(NUM_REGISTROS_BASE)]
-    cursor.executemany(sql_zona, data_zonas)
-    print("    - Zonas insertadas.")
+    cargar_tabla(cursor, conn, "Zona", plan, pools, modo_carga, generador)
+    progreso("Zonas insertadas.")
     
     conn.commit()
 
 
-def insert_reporte_sensor(cursor, conn, usuario_ids, zona_ids):
+def insert_reporte_sensor(cursor, conn, plan, pools, modo_carga="executemany", generador=None):
     """Inserta Reporte (depende de Usuario, Zona) y Sensor (depende de Zona)."""
     
     # 3 Tabla Reporte
-    sql_reporte = "INSERT INTO Reporte (id_usuario, id_zona, tipoIncidencia, descripcion, fechaHora, estado, prioridad, medioReporte) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
-    incidentes = ['Robo con violencia', 'Conflicto vecinal', 'Vandalismo', 'Sospecha de actividad']
-    estados = ['Nuevo', 'En análisis', 'Escalado a policía', 'Cerrado']
-    prioridades = ['Crítica', 'Alta', 'Media', 'Baja']
-    medios = ['App Ciudadana', 'Web Oficial', 'Red Social']
-    
-    data_reportes = []
-    for _ in range(NUM_REGISTROS_BASE * 3):
-        tipo_incidente = fake.random_element(elements=incidentes)
-        descripcion = f"Reporte de {tipo_incidente} cerca de {fake.city()}. Detalle: {fake.paragraph(nb_sentences=2)}"
-        
-        data_reportes.append((
-            random.choice(usuario_ids), random.choice(zona_ids), tipo_incidente, descripcion, 
-            fake.date_time_this_year(), fake.random_element(elements=estados), 
-            fake.random_element(elements=prioridades), fake.random_element(elements=medios)
-        ))
-    cursor.executemany(sql_reporte, data_reportes)
-    print("    - Reportes insertados.")
+    cargar_tabla(cursor, conn, "Reporte", plan, pools, modo_carga, generador)
+    progreso("Reportes insertados.")
 
     # 4 Tabla Sensor
-    sql_sensor = "INSERT INTO Sensor (id_zona, tipo, modelo, estado, fechaInstalacion) VALUES (%s, %s, %s, %s, %s)"
-    tipos_sensor = ['Ruido Ambiental', 'Flujo Peatonal', 'Calidad Aire', 'Cámara CCTV']
-    
-    data_sensores = []
-    for _ in range(NUM_REGISTROS_BASE):
-        modelo_str = f"MOD-{fake.random_int(min=100, max=999)}"
-
-        data_sensores.append((
-            random.choice(zona_ids), 
-            random.choice(tipos_sensor), 
-            modelo_str,
-            'Activo', 
-            fake.date_time_this_year().date()
-        ))
-    cursor.executemany(sql_sensor, data_sensores)
-    print("    - Sensores insertados.")
+    cargar_tabla(cursor, conn, "Sensor", plan, pools, modo_carga, generador)
+    progreso("Sensores insertados.")
     
     conn.commit()
 
 
-def insert_registro_comentario_multimedia_alerta(cursor, conn, usuario_ids, reporte_ids, sensor_ids):
+def insert_registro_comentario_multimedia_alerta(cursor, conn, plan, pools, modo_carga="executemany", generador=None):
     """Inserta tablas que dependen de Reporte o Sensor."""
 
     # 5 Tabla RegistroSensor
-    sql_registro = "INSERT INTO RegistroSensor (id_sensor, valor, unidad) VALUES (%s, %s, %s)"
-    data_registros = [(random.choice(sensor_ids), fake.pydecimal(3, 2, 40, 95), 'dB' if random.random() > 0.5 else 'PPM') for _ in range(NUM_REGISTROS_BASE * 4)]
-    cursor.executemany(sql_registro, data_registros)
-    print("    - Registros de Sensor insertados.")
+    cargar_tabla(cursor, conn, "RegistroSensor", plan, pools, modo_carga, generador)
+    progreso("Registros de Sensor insertados.")
     
     # 6 Tabla Comentario
-    sql_comentario = "INSERT INTO Comentario (id_usuario, id_reporte, texto) VALUES (%s, %s, %s)"
-    data_comentarios = [(random.choice(usuario_ids), random.choice(reporte_ids), fake.sentence(nb_words=8)) for _ in range(NUM_REGISTROS_BASE * 2)]
-    cursor.executemany(sql_comentario, data_comentarios)
-    print("    - Comentarios insertados.")
+    cargar_tabla(cursor, conn, "Comentario", plan, pools, modo_carga, generador)
+    progreso("Comentarios insertados.")
     
     # 7 Tabla Multimedia
-    sql_multimedia = "INSERT INTO Multimedia (id_reporte, tipoArchivo, rutaArchivo) VALUES (%s, %s, %s)"
-    tipos_archivo = ['imagen/jpeg', 'video/mp4']
-    data_multimedia = [(random.choice(reporte_ids), fake.random_element(elements=tipos_archivo), f"/evidencia/{fake.uuid4()}") for _ in range(NUM_REGISTROS_BASE)]
-    cursor.executemany(sql_multimedia, data_multimedia)
-    print("    - Multimedia insertada.")
+    cargar_tabla(cursor, conn, "Multimedia", plan, pools, modo_carga, generador)
+    progreso("Multimedia insertada.")
 
     # 8 Tabla Alerta
-    sql_alerta = "INSERT INTO Alerta (id_reporte, tipo, mensaje) VALUES (%s, %s, %s)"
-    tipos_alerta = ['Umbral de Ruido Superado', 'Patrón de Concurrencia Anormal', 'Alerta de Vandalismo']
-    data_alertas = [(random.choice(reporte_ids), random.choice(tipos_alerta), fake.sentence(nb_words=10)) for _ in range(NUM_REGISTROS_BASE)]
-    cursor.executemany(sql_alerta, data_alertas)
-    print("    - Alertas insertadas.")
+    cargar_tabla(cursor, conn, "Alerta", plan, pools, modo_carga, generador)
+    progreso("Alertas insertadas.")
 
     conn.commit()
 
 
-def insert_indicador_informe(cursor, conn, zona_ids, registro_ids):
-    """Inserta Indicador (Análisis) y Informe (Decisiones)."""
-    
-    # 9 Tabla Indicador
-    sql_indicador = "INSERT INTO Indicador (id_zona, id_registro_sensor, nombre, valor, descripcion) VALUES (%s, %s, %s, %s, %s)"
-    
-    cursor.execute("SELECT R.id, S.id_zona FROM RegistroSensor R INNER JOIN Sensor S ON R.id_sensor = S.id")
-    registro_data = cursor.fetchall()
+def generar_tabla_en_servidor(cursor, conn, tabla, plan, pools):
+    """Genera `tabla` con un INSERT ... SELECT en el propio servidor (ver generacionServidor)."""
+    with metricas.fase("generacion_servidor", tabla=tabla) as datos:
+        datos["filas"] = generar_en_servidor(cursor, conn, tabla, plan, pools)
+
+
+def insert_indicador_informe(cursor, conn, plan, pools, modo_carga="executemany", generador=None, en_servidor=False):
+    """Inserta Indicador (Análisis) y Informe (Decisiones).
+    Con en_servidor, ambas se generan en el motor sin enviar filas desde el cliente."""
     
-    nombres_indicador = ['Nivel de Percepción de Riesgo', 'Índice de Conflictos', 'Frecuencia de Incidentes']
-    data_indicadores = [(reg[1], reg[0], random.choice(nombres_indicador), fake.pydecimal(2, 2, 1, 10), fake.sentence(nb_words=5)) for reg in registro_data]
-    cursor.executemany(sql_indicador, data_indicadores)
+    # 9 Tabla Indicador (uno por registro de sensor)
+    if en_servidor:
+        generar_tabla_en_servidor(cursor, conn, "Indicador", plan, pools)
+    else:
+        cargar_tabla(cursor, conn, "Indicador", plan, pools, modo_carga, generador)
     conn.commit()
-    print("    - Indicadores insertados.")
+    progreso("Indicadores insertados.")
     
     # 10 Tabla Informe
-    indicador_ids = fetch_ids(cursor, 'Indicador')
-    sql_informe = "INSERT INTO Informe (id_indicador, titulo, descripcion, tipo, fuentes) VALUES (%s, %s, %s, %s, %s)"
-    tipos_informe = ['Análisis de Riesgo', 'Recomendaciones Operativas', 'Resumen Mensual de Seguridad']
-    
-    data_informes = []
-    for i_id in indicador_ids:
-        titulo = fake.random_element(elements=tipos_informe) + f" - {fake.city()}"
-        data_informes.append((random.choice(indicador_ids), titulo, fake.text(max_nb_chars=200), fake.random_element(elements=tipos_informe), "Sensores, Reportes, Datos Públicos"))
-    cursor.executemany(sql_informe, data_informes)
-    print("    - Informes insertados.")
+    if en_servidor:
+        generar_tabla_en_servidor(cursor, conn, "Informe", plan, pools)
+    else:
+        cargar_tabla(cursor, conn, "Informe", plan, pools, modo_carga, generador)
+    progreso("Informes insertados.")
     
     conn.commit()
 
 
 # --- FUNCIÓN PRINCIPAL DE EJECUCIÓN ---
 
-def main():
-    """Conecta a cada DB y ejecuta las inserciones de forma lógica."""
+def _iniciar_metricas(db_name, perfilar):
+    metricas.reiniciar()
+    metricas.fijar_etiquetas(motor=db_name)
+    if perfilar:
+        metricas.activar_perfil()
+
+def _exportar_metricas(db_name, directorio_metricas):
+    """Escribe relleno_<motor>.json/.prom y, si se perfiló, generacion_<motor>.prof.
+    La generación del intermedio usa "intermedio" como motor."""
+    if not directorio_metricas:
+        return
+    metricas.exportar(directorio_metricas, f"relleno_{db_name}")
+    metricas.guardar_perfil(os.path.join(directorio_metricas, f"generacion_{db_name}.prof"))
+    progreso(f"Métricas exportadas a {directorio_metricas}.")
+
+def _fases_finales(cursor, conn, tablas, indices):
+    """Secuencias, resúmenes e índices tras la carga, cada uno como fase medida."""
+    with metricas.fase("secuencias"):
+        sincronizar_secuencias(cursor, conn, tablas)
+    with metricas.fase("rollups"):
+        actualizar_rollups(conn)
+    progreso("Resúmenes por hora y día de RegistroSensor actualizados.")
+    with metricas.fase("resumenes_reportes"):
+        actualizar_resumenes(conn)
+    progreso("Resúmenes de Reporte y contadores de incidencias por zona actualizados.")
+    if indices:
+        with metricas.fase("indices"):
+            crear_indices(cursor, conn)
+        progreso("Índices secundarios creados.")
+        with metricas.fase("indices_busqueda"):
+            crear_indices_busqueda(cursor, conn)
+        progreso("Índices de texto completo creados.")
+
+def rellenar_base(db_name, config, modo_carga="nativo", scale_factor=1,
+                  semilla=SEMILLA_POR_DEFECTO, procesos_generacion=1, fecha_referencia=None,
+                  indices=True, carga_rapida=False, directorio_metricas=None, perfilar=False,
+                  derivadas_en_servidor=False):
+    """Rellena una base completa. Devuelve None si todo fue bien o el detalle del error.
+    carga_rapida: relaja FKs/únicos (y el WAL en PostgreSQL) durante la carga; ver cargaMasiva.
+    directorio_metricas: si se indica, exporta ahí las métricas de cada fase (y el perfil con perfilar).
+    derivadas_en_servidor: Indicador e Informe se generan con INSERT ... SELECT en el motor."""
+    generador = None
+    _iniciar_metricas(db_name, perfilar)
+    try:
+        print(f"\n--- Conectando a {db_name} en puerto {config['port']} ---")
+        with conexion(db_name) as conn:
+            cursor = conn.cursor()
+
+            # 0. Reservar el rango de ids de cada tabla (Indicador e Informe: uno por registro)
+            with metricas.fase("reservar_ids"):
+                ids = {tabla: reservar_ids(cursor, conn, tabla, filas_tabla(tabla, scale_factor))
+                       for tabla in MULTIPLICADORES_TABLA}
+                ids["Indicador"] = reservar_ids(cursor, conn, "Indicador", len(ids["RegistroSensor"]))
+                ids["Informe"] = reservar_ids(cursor, conn, "Informe", len(ids["Indicador"]))
+            plan = crear_plan(ids, semilla, fecha_referencia)
+            pools = construir_pools(semilla)
+            generador = GeneradorParalelo(plan, pools, procesos_generacion) if procesos_generacion > 1 else None
+
+            # Con carga_rapida, las comprobaciones se relajan solo mientras se inserta
+            with sesion_carga_rapida(conn) if carga_rapida else contextlib.nullcontext():
+                # 1. Insertar entidades raíz
+                insert_usuario_zona(cursor, conn, plan, pools, modo_carga, generador)
+
+                # 2. Insertar entidades dependientes de nivel 1
+                insert_reporte_sensor(cursor, conn, plan, pools, modo_carga, generador)
+
+                # 3. Insertar entidades dependientes de nivel 2
+                insert_registro_comentario_multimedia_alerta(cursor, conn, plan, pools, modo_carga, generador)
+
+                # 4. Insertar entidades de análisis final (mondongo)
+                insert_indicador_informe(cursor, conn, plan, pools, modo_carga, generador, derivadas_en_servidor)
+
+            # 5. Secuencias, resúmenes e índices secundarios, una vez cargados los datos
+            _fases_finales(cursor, conn, ids, indices)
+        
+        print(f"Relleno de {db_name} completado y conexión devuelta al pool.")
+        _exportar_metricas(db_name, directorio_metricas)
+        return None
+        
+    except Exception as e:
+        print(f"ERROR CRÍTICO al conectar o rellenar {db_name} (Puerto {config['port']}):")
+        print(f"Asegúrate de que el contenedor de {db_name} esté corriendo en el puerto {config['port']} y que la base de datos esté inicializada.")
+        print(f"Detalle del error: {e}")
+        return str(e).strip()
+    finally:
+        if generador:
+            generador.cerrar()
+
+
+# --- PIPELINE EN DOS FASES: GENERAR UNA VEZ, CARGAR EN LOS TRES MOTORES ---
+
+def _ids_base_vacia(scale_factor):
+    """Rangos de ids de una base recién creada (todas las tablas empiezan en 1)."""
+    ids = {tabla: range(1, filas_tabla(tabla, scale_factor) + 1) for tabla in MULTIPLICADORES_TABLA}
+    ids["Indicador"] = range(1, len(ids["RegistroSensor"]) + 1)
+    ids["Informe"] = range(1, len(ids["Indicador"]) + 1)
+    return ids
+
+def generar_intermedio(directorio, scale_factor=1, semilla=SEMILLA_POR_DEFECTO,
+                       procesos_generacion=1, fecha_referencia=None, directorio_metricas=None, perfilar=False):
+    """Fase 1: genera todas las tablas una sola vez como CSV en `directorio`.
+    Si ya existe un intermedio con los mismos parámetros, se reutiliza."""
+    plan = crear_plan(_ids_base_vacia(scale_factor), semilla, fecha_referencia)
+    parametros = {
+        "scale_factor": scale_factor,
+        "semilla": semilla,
+        "fecha_referencia": (plan["inicio_fechas"] + timedelta(seconds=len(plan["segundos"]))).isoformat(),
+        "tam_bloque": plan["tam_bloque"],
+        "version_datos": VERSION_DATOS,
+    }
+    ruta_manifiesto = os.path.join(directorio, MANIFIESTO_INTERMEDIO)
+    if os.path.exists(ruta_manifiesto):
+        with open(ruta_manifiesto, encoding="utf-8") as f:
+            if json.load(f).get("parametros") == parametros:
+                print(f"Intermedio existente en {directorio} reutilizado.")
+                return
+
+    print(f"\n--- Generando intermedio en {directorio} ---")
+    os.makedirs(directorio, exist_ok=True)
+    pools = construir_pools(semilla)
+    generador = GeneradorParalelo(plan, pools, procesos_generacion) if procesos_generacion > 1 else None
+    _iniciar_metricas("intermedio", perfilar)
+    filas = {}
+    try:
+        for tabla in COLUMNAS:
+            ruta = os.path.join(directorio, f"{tabla}.csv")
+            with metricas.fase("generacion_csv", tabla=tabla) as datos:
+                bloques = metricas.bloques_cronometrados(generar_tabla(tabla, plan, pools, generador), datos)
+                filas[tabla] = escribir_csv(ruta, filas_de_bloques(bloques))
+                datos["bytes"] = os.path.getsize(ruta)
+            progreso(f"{tabla}: {filas[tabla]} filas generadas.")
+    finally:
+        if generador:
+            generador.cerrar()
+    _exportar_metricas("intermedio", directorio_metricas)
+
+    # El manifiesto se escribe al final: sin él, el intermedio se considera incompleto
+    with open(ruta_manifiesto, "w", encoding="utf-8") as f:
+        json.dump({"parametros": parametros, "filas": filas}, f, ensure_ascii=False, indent=4)
+
+
+def cargar_intermedio(db_name, config, directorio, indices=True, carga_rapida=False, directorio_metricas=None):
+    """Fase 2: carga el intermedio de `directorio` en un motor. Requiere las tablas vacías.
+    Devuelve None si todo fue bien o el detalle del error."""
+    _iniciar_metricas(db_name, False)
+    try:
+        with open(os.path.join(directorio, MANIFIESTO_INTERMEDIO), encoding="utf-8") as f:
+            manifiesto = json.load(f)
+
+        print(f"\n--- Conectando a {db_name} en puerto {config['port']} ---")
+        with conexion(db_name) as conn:
+            cursor = conn.cursor()
+
+            # Los ids del intermedio empiezan en 1: solo encajan en una base vacía y sin
+            # otros escritores hasta que sincronizar_secuencias avanza las secuencias
+            for tabla in COLUMNAS:
+                if not _tabla_vacia(cursor, tabla):
+                    raise ValueError(f"la tabla {tabla} no está vacía; ejecuta crearBaseDeDatos.py antes de cargar el intermedio")
+
+            with sesion_carga_rapida(conn) if carga_rapida else contextlib.nullcontext():
+                for tabla, columnas in COLUMNAS.items():
+                    with metricas.fase("carga_csv", tabla=tabla) as datos:
+                        datos["bytes"] = cargar_csv(cursor, conn, tabla, columnas, os.path.join(directorio, f"{tabla}.csv"))
+                        conn.commit()
+                        datos["filas"] = manifiesto["filas"][tabla]
+                    progreso(f"{tabla}: {manifiesto['filas'][tabla]} filas cargadas.")
+
+            _fases_finales(cursor, conn, COLUMNAS, indices)
+        print(f"Carga de {db_name} desde el intermedio completada.")
+        _exportar_metricas(db_name, directorio_metricas)
+        return None
+
+    except Exception as e:
+        print(f"ERROR CRÍTICO al cargar el intermedio en {db_name} (Puerto {config['port']}):")
+        print(f"Detalle del error: {e}")
+        return str(e).strip()
+
+
+def _ejecutar_en_proceso(funcion, db_name, config, *argumentos):
+    """Punto de entrada de cada proceso del modo paralelo."""
+    global MOTOR_ACTUAL
+    MOTOR_ACTUAL = db_name
+    return funcion(db_name, config, *argumentos)
+
+
+def ejecutar_en_motores(funcion, argumentos, paralelo=False):
+    """Ejecuta funcion(db_name, config, *argumentos) para cada motor de DB_CONFIGS.
+
+    En modo paralelo cada motor va en su propio proceso y el fallo de uno no
+    interrumpe a los demás; al final se imprime un resumen por motor.
+    """
+    if not paralelo:
+        for db_name, config in DB_CONFIGS.items():
+            funcion(db_name, config, *argumentos)
+        return
+
+    errores = {}
+    with ProcessPoolExecutor(max_workers=len(DB_CONFIGS)) as executor:
+        futuros = {
+            executor.submit(_ejecutar_en_proceso, funcion, db_name, config, *argumentos): db_name
+            for db_name, config in DB_CONFIGS.items()
+        }
+        for futuro in as_completed(futuros):
+            db_name = futuros[futuro]
+            try:
+                errores[db_name] = futuro.result()
+            except Exception as e:
+                errores[db_name] = f"el proceso terminó de forma inesperada: {e}"
+
+    print("\n--- RESUMEN DEL RELLENO ---")
+    for db_name in DB_CONFIGS:
+        error = errores.get(db_name)
+        print(f"    {db_name}: {'OK' if error is None else 'ERROR - ' + error}")
+
+
+def main(paralelo=False, modo_carga="nativo", scale_factor=1,
+         semilla=SEMILLA_POR_DEFECTO, procesos_generacion=1, fecha_referencia=None,
+         intermedio=None, solo_generar=False, indices=True, carga_rapida=False,
+         directorio_metricas=None, perfilar=False, derivadas_en_servidor=False):
+    """Conecta a cada DB y ejecuta las inserciones de forma lógica.
+
+    Con `intermedio`, los datos se generan una sola vez en ese directorio y
+    después se cargan los mismos ficheros en los tres motores.
+    Con `directorio_metricas`, cada motor exporta ahí las métricas de sus fases.
+    """
     print("--- INICIO DEL PROCESO DE RELLENO DE BASES DE DATOS (LÓGICA DE NEGOCIO) ---")
     
-    for db_name, config in DB_CONFIGS.items():
-        conn = None
-        try:
-            print(f"\n--- Conectando a {db_name} en puerto {config['port']} ---")
-            conn = get_db_connection(config)
-            cursor = conn.cursor()
+    if intermedio:
+        generar_intermedio(intermedio, scale_factor, semilla, procesos_generacion, fecha_referencia,
+                           directorio_metricas, perfilar)
+        if not solo_generar:
+            ejecutar_en_motores(cargar_intermedio, (intermedio, indices, carga_rapida, directorio_metricas), paralelo)
+        return
 
-            # 1. Insertar entidades raíz y obtener IDs
-            insert_usuario_zona(cursor, conn)
-            usuario_ids = fetch_ids(cursor, 'Usuario')
-            zona_ids = fetch_ids(cursor, 'Zona')
-
-            # 2. Insertar entidades dependientes de nivel 1
-            insert_reporte_sensor(cursor, conn, usuario_ids, zona_ids)
-            reporte_ids = fetch_ids(cursor, 'Reporte')
-            sensor_ids = fetch_ids(cursor, 'Sensor')
-
-            # 3. Insertar entidades dependientes de nivel 2
-            insert_registro_comentario_multimedia_alerta(cursor, conn, usuario_ids, reporte_ids, sensor_ids)
-            registro_ids = fetch_ids(cursor, 'RegistroSensor')
-
-            # 4. Insertar entidades de análisis final (mondongo)
-            insert_indicador_informe(cursor, conn, zona_ids, registro_ids)
-            
-            conn.close()
-            print(f"Relleno de {db_name} completado y conexión cerrada.")
-            
-        except Exception as e:
-            print(f"ERROR CRÍTICO al conectar o rellenar {db_name} (Puerto {config['port']}):")
-            print(f"Asegúrate de que el contenedor de {db_name} esté corriendo en el puerto {config['port']} y que la base de datos esté inicializada.")
-            print(f"Detalle del error: {e}")
-        finally:
-            if conn:
-                conn.close()
+    opciones = (modo_carga, scale_factor, semilla, procesos_generacion, fecha_referencia, indices, carga_rapida,
+                directorio_metricas, perfilar, derivadas_en_servidor)
+    ejecutar_en_motores(rellenar_base, opciones, paralelo)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Rellena las tres bases de datos con datos de prueba.")
+    parser.add_argument("--paralelo", action="store_true", help="Rellena los tres motores a la vez, un proceso por motor.")
+    parser.add_argument("--modo-carga", choices=MODOS_CARGA, default="nativo",
+                        help="nativo: COPY / LOAD DATA; valores: INSERT multi-fila por páginas (execute_values en "
+                             "PostgreSQL); executemany: ruta original fila a fila (para comparar).")
+    parser.add_argument("--scale-factor", type=float, default=1,
+                        help="Multiplica el volumen de todas las tablas (1 = volumen original).")
+    parser.add_argument("--semilla", type=int, default=SEMILLA_POR_DEFECTO,
+                        help="Semilla maestra: misma semilla y scale factor producen los mismos datos.")
+    parser.add_argument("--procesos-generacion", type=int, default=1,
+                        help="Procesos que generan bloques en paralelo (no cambia los datos generados).")
+    parser.add_argument("--fecha-referencia", type=datetime.fromisoformat, default=None,
+                        help="Fecha (YYYY-MM-DD) que cierra el rango de fechas generadas. Por defecto, hoy.")
+    parser.add_argument("--intermedio", metavar="DIRECTORIO", default=None,
+                        help="Genera los datos una vez como CSV en DIRECTORIO y carga esos ficheros en los tres motores.")
+    parser.add_argument("--solo-generar", action="store_true",
+                        help="Con --intermedio, solo genera los ficheros sin cargarlos.")
+    parser.add_argument("--sin-indices", action="store_true",
+                        help="No crea los índices secundarios ni los de texto completo al terminar la carga.")
+    parser.add_argument("--carga-rapida", action="store_true",
+                        help="Desactiva FKs/únicos (MySQL) o FKs/WAL (PostgreSQL) durante la carga y los valida al final.")
+    parser.add_argument("--metricas", metavar="DIRECTORIO", default=None,
+                        help="Exporta en DIRECTORIO las métricas de cada fase por motor (JSON y Prometheus).")
+    parser.add_argument("--perfilar", action="store_true",
+                        help="Con --metricas, perfila con cProfile la generación de bloques (generacion_<motor>.prof).")
+    parser.add_argument("--derivadas-en-servidor", action="store_true",
+                        help="Genera Indicador e Informe con INSERT ... SELECT en cada motor (sin enviar filas).")
+    args = parser.parse_args()
+    main(paralelo=args.paralelo, modo_carga=args.modo_carga, scale_factor=args.scale_factor,
+         semilla=args.semilla, procesos_generacion=args.procesos_generacion,
+         fecha_referencia=args.fecha_referencia, intermedio=args.intermedio,
+         solo_generar=args.solo_generar, indices=not args.sin_indices, carga_rapida=args.carga_rapida,
+         directorio_metricas=args.metricas, perfilar=args.perfilar,
+         derivadas_en_servidor=args.derivadas_en_servidor)
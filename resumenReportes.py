@@ -0,0 +1,251 @@
+# Mantenimiento incremental de los resúmenes de Reporte y Comentario.
+#
+# Los análisis de zonas de riesgo, eficiencia de cierre y funcionConjunta
+# agregaban Reporte (y Comentario) completos en cada ejecución. Estas tablas
+# guardan los conteos que necesitan y se actualizan solo con las filas nuevas:
+#   - ResumenZona: reportes de prioridad Crítica o Alta y solo Alta por zona.
+#   - ResumenUsuario: reportes resueltos por usuario, cuántos de ellos tienen
+#     comentarios y el total de esos comentarios (media = comentarios / comentados,
+#     igual que el AVG de la consulta original, que ignora los reportes sin ellos).
+#   - Zona.numeroIncidencias: contador desnormalizado de reportes de cada zona
+#     (todas las prioridades). El relleno lo deja a 0 y cada actualización le suma
+#     los reportes nuevos en lote; no se usan triggers para no frenar las cargas
+#     masivas fila a fila. verificar_incidencias lo compara con Reporte.
+# Como en rollupSensores, MarcaRollup guarda el último id incorporado de cada
+# tabla de origen ('Reporte' y 'Comentario') y se bloquea con FOR UPDATE.
+#
+# Supone ids confirmados en orden y reportes que no cambian de estado ni de
+# prioridad después de resumirse. Si se modifican o borran: --reconstruir.
+
+import argparse
+import time
+
+import psycopg2
+
+from conexiones import DB_CONFIGS, conexion
+
+# Estados que cuentan como resueltos (los de SQL_EFICIENCIA_USUARIOS)
+ESTADOS_RESUELTOS = "('Cerrado', 'Resuelto')"
+
+FUSION_ZONA = """
+    INSERT INTO ResumenZona (id_zona, reportes_criticos, reportes_alta)
+    SELECT
+        id_zona,
+        SUM(CASE WHEN prioridad IN ('Crítica', 'Alta') THEN 1 ELSE 0 END),
+        SUM(CASE WHEN prioridad = 'Alta' THEN 1 ELSE 0 END)
+    FROM Reporte
+    WHERE id > {desde_reporte} AND id <= {hasta_reporte} AND id_zona IS NOT NULL
+    GROUP BY id_zona
+    {fusion}
+"""
+
+# Reportes afectados: los resueltos nuevos y los resueltos antiguos con comentarios
+# nuevos. De cada uno, sus comentarios hasta la marca nueva y los ya contados.
+FUSION_USUARIO = """
+    INSERT INTO ResumenUsuario (id_usuario, reportes_resueltos, reportes_comentados, comentarios)
+    SELECT
+        R.id_usuario,
+        SUM(CASE WHEN R.id > {desde_reporte} THEN 1 ELSE 0 END),
+        SUM(CASE WHEN C.total > 0 AND (R.id > {desde_reporte} OR C.previos = 0) THEN 1 ELSE 0 END),
+        SUM(CASE WHEN R.id > {desde_reporte} THEN COALESCE(C.total, 0) ELSE COALESCE(C.total - C.previos, 0) END)
+    FROM Reporte R
+    LEFT JOIN (
+        SELECT
+            id_reporte,
+            COUNT(*) AS total,
+            SUM(CASE WHEN id <= {desde_comentario} THEN 1 ELSE 0 END) AS previos
+        FROM Comentario
+        WHERE id <= {hasta_comentario} AND id_reporte IN (
+            SELECT id FROM Reporte WHERE id > {desde_reporte} AND id <= {hasta_reporte}
+            UNION
+            SELECT id_reporte FROM Comentario WHERE id > {desde_comentario} AND id <= {hasta_comentario}
+        )
+        GROUP BY id_reporte
+    ) C ON C.id_reporte = R.id
+    WHERE R.estado IN {resueltos} AND R.id <= {hasta_reporte} AND R.id_usuario IS NOT NULL
+      AND (R.id > {desde_reporte} OR C.total > C.previos)
+    GROUP BY R.id_usuario
+    {fusion}
+"""
+
+ACTUALIZACION = {
+    "psycopg2": {
+        "ResumenZona": """ON CONFLICT (id_zona) DO UPDATE SET
+            reportes_criticos = ResumenZona.reportes_criticos + EXCLUDED.reportes_criticos,
+            reportes_alta = ResumenZona.reportes_alta + EXCLUDED.reportes_alta""",
+        "ResumenUsuario": """ON CONFLICT (id_usuario) DO UPDATE SET
+            reportes_resueltos = ResumenUsuario.reportes_resueltos + EXCLUDED.reportes_resueltos,
+            reportes_comentados = ResumenUsuario.reportes_comentados + EXCLUDED.reportes_comentados,
+            comentarios = ResumenUsuario.comentarios + EXCLUDED.comentarios""",
+    },
+    "mysql": {
+        "ResumenZona": """ON DUPLICATE KEY UPDATE
+            reportes_criticos = reportes_criticos + VALUES(reportes_criticos),
+            reportes_alta = reportes_alta + VALUES(reportes_alta)""",
+        "ResumenUsuario": """ON DUPLICATE KEY UPDATE
+            reportes_resueltos = reportes_resueltos + VALUES(reportes_resueltos),
+            reportes_comentados = reportes_comentados + VALUES(reportes_comentados),
+            comentarios = comentarios + VALUES(comentarios)""",
+    },
+}
+
+# Suma a cada zona sus reportes nuevos
+INCIDENCIAS_ZONA = {
+    "psycopg2": """
+        UPDATE Zona SET numeroIncidencias = COALESCE(Zona.numeroIncidencias, 0) + D.total
+        FROM (
+            SELECT id_zona, COUNT(*) AS total FROM Reporte
+            WHERE id > {desde_reporte} AND id <= {hasta_reporte} GROUP BY id_zona
+        ) D
+        WHERE Zona.id = D.id_zona
+    """,
+    "mysql": """
+        UPDATE Zona Z
+        JOIN (
+            SELECT id_zona, COUNT(*) AS total FROM Reporte
+            WHERE id > {desde_reporte} AND id <= {hasta_reporte} GROUP BY id_zona
+        ) D ON Z.id = D.id_zona
+        SET Z.numeroIncidencias = COALESCE(Z.numeroIncidencias, 0) + D.total
+    """,
+}
+
+# Zonas cuyo contador no coincide con sus reportes ya incorporados (hasta la marca)
+SQL_VERIFICAR_INCIDENCIAS = """
+    SELECT Z.id, Z.nombre, Z.numeroIncidencias, COUNT(R.id)
+    FROM Zona Z
+    LEFT JOIN Reporte R ON R.id_zona = Z.id
+        AND R.id <= (SELECT ultimo_id FROM MarcaRollup WHERE tabla = 'Reporte')
+    GROUP BY Z.id, Z.nombre, Z.numeroIncidencias
+    HAVING COALESCE(Z.numeroIncidencias, 0) <> COUNT(R.id)
+    ORDER BY Z.id
+"""
+
+INICIAR_MARCAS = {
+    "psycopg2": "INSERT INTO MarcaRollup (tabla, ultimo_id) VALUES ('Reporte', 0), ('Comentario', 0) "
+                "ON CONFLICT (tabla) DO NOTHING",
+    "mysql": "INSERT IGNORE INTO MarcaRollup (tabla, ultimo_id) VALUES ('Reporte', 0), ('Comentario', 0)",
+}
+
+# --- CONSULTAS DE LOS ANÁLISIS SOBRE LOS RESÚMENES ---
+# Mismas columnas y orden que SQL_ZONAS_RIESGO, SQL_EFICIENCIA_USUARIOS y SQL_ZONA_MAS_CRITICA.
+
+SQL_ZONAS_RIESGO_RESUMEN = """
+    SELECT Z.nombre, RZ.reportes_criticos, Z.coordenadas
+    FROM ResumenZona RZ
+    JOIN Zona Z ON Z.id = RZ.id_zona
+    WHERE RZ.reportes_criticos > 0
+    ORDER BY RZ.reportes_criticos DESC
+    LIMIT 5
+"""
+
+SQL_EFICIENCIA_USUARIOS_RESUMEN = """
+    SELECT U.nombre, RU.reportes_resueltos, RU.comentarios * 1.0 / NULLIF(RU.reportes_comentados, 0)
+    FROM ResumenUsuario RU
+    JOIN Usuario U ON U.id = RU.id_usuario
+    WHERE RU.reportes_resueltos > 0
+    ORDER BY RU.reportes_resueltos DESC
+    LIMIT 5
+"""
+
+SQL_ZONA_MAS_CRITICA_RESUMEN = """
+    SELECT Z.nombre, SUM(RZ.reportes_alta)
+    FROM ResumenZona RZ
+    JOIN Zona Z ON Z.id = RZ.id_zona
+    WHERE RZ.reportes_alta > 0
+    GROUP BY Z.nombre
+"""
+
+
+def _driver(conn):
+    return "psycopg2" if isinstance(conn, psycopg2.extensions.connection) else "mysql"
+
+
+def actualizar_resumenes(conn):
+    """Incorpora a los resúmenes los reportes y comentarios nuevos.
+    Devuelve {tabla de origen: (desde, hasta)} de ids procesados."""
+    driver = _driver(conn)
+    cursor = conn.cursor()
+    cursor.execute(INICIAR_MARCAS[driver])
+    conn.commit()
+
+    cursor.execute("SELECT tabla, ultimo_id FROM MarcaRollup WHERE tabla IN ('Reporte', 'Comentario') FOR UPDATE")
+    desde = dict(cursor.fetchall())
+    cursor.execute("SELECT (SELECT MAX(id) FROM Reporte), (SELECT MAX(id) FROM Comentario)")
+    hasta_reporte, hasta_comentario = cursor.fetchall()[0]
+    hasta = {"Reporte": hasta_reporte or 0, "Comentario": hasta_comentario or 0}
+    if all(hasta[t] <= desde[t] for t in hasta):
+        conn.rollback()
+        cursor.close()
+        return {t: (desde[t], desde[t]) for t in desde}
+    hasta = {t: max(hasta[t], desde[t]) for t in hasta}
+
+    marcas = {
+        "desde_reporte": desde["Reporte"], "hasta_reporte": hasta["Reporte"],
+        "desde_comentario": desde["Comentario"], "hasta_comentario": hasta["Comentario"],
+    }
+    cursor.execute(FUSION_ZONA.format(fusion=ACTUALIZACION[driver]["ResumenZona"], **marcas))
+    cursor.execute(INCIDENCIAS_ZONA[driver].format(**marcas))
+    cursor.execute(FUSION_USUARIO.format(fusion=ACTUALIZACION[driver]["ResumenUsuario"],
+                                         resueltos=ESTADOS_RESUELTOS, **marcas))
+    for tabla, ultimo in hasta.items():
+        cursor.execute(f"UPDATE MarcaRollup SET ultimo_id = {ultimo} WHERE tabla = '{tabla}'")
+    conn.commit()
+    cursor.close()
+    return {t: (desde[t], hasta[t]) for t in hasta}
+
+
+def reconstruir_resumenes(conn):
+    """Vacía los resúmenes (y los contadores de Zona) y los recalcula desde todos los reportes y comentarios."""
+    cursor = conn.cursor()
+    cursor.execute("UPDATE Zona SET numeroIncidencias = 0")
+    cursor.execute("DELETE FROM ResumenZona")
+    cursor.execute("DELETE FROM ResumenUsuario")
+    cursor.execute("DELETE FROM MarcaRollup WHERE tabla IN ('Reporte', 'Comentario')")
+    conn.commit()
+    cursor.close()
+    return actualizar_resumenes(conn)
+
+
+def verificar_incidencias(conn):
+    """Zonas cuyo numeroIncidencias no coincide con COUNT(*) de sus reportes.
+    Devuelve [(id, nombre, contador, reportes), ...]; vacía si todo cuadra."""
+    cursor = conn.cursor()
+    cursor.execute(SQL_VERIFICAR_INCIDENCIAS)
+    discrepancias = cursor.fetchall()
+    cursor.close()
+    return discrepancias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Actualiza los resúmenes por zona y por usuario de Reporte.")
+    parser.add_argument("--motores", nargs="+", choices=list(DB_CONFIGS), default=list(DB_CONFIGS))
+    parser.add_argument("--reconstruir", action="store_true", help="Recalcula los resúmenes desde cero.")
+    parser.add_argument("--verificar", action="store_true",
+                        help="Tras actualizar, comprueba Zona.numeroIncidencias contra los reportes.")
+    parser.add_argument("--cada", type=float, default=0,
+                        help="Repite la actualización cada N segundos (0 = una sola vez).")
+    args = parser.parse_args()
+
+    while True:
+        for db_name in args.motores:
+            try:
+                with conexion(db_name) as conn:
+                    actualizar = reconstruir_resumenes if args.reconstruir else actualizar_resumenes
+                    rangos = actualizar(conn)
+                    discrepancias = verificar_incidencias(conn) if args.verificar else []
+                print(f"{db_name}: resúmenes al día ("
+                      + ", ".join(f"{t} hasta el id {h}, {h - d} nuevos" for t, (d, h) in rangos.items()) + ")")
+                if args.verificar:
+                    print(f"    {len(discrepancias)} zonas con numeroIncidencias descuadrado"
+                          + (" (usa --reconstruir)" if discrepancias else ""))
+                    for id_zona, nombre, contador, reportes in discrepancias[:10]:
+                        print(f"    - {nombre} (id {id_zona}): contador {contador}, reportes {reportes}")
+            except Exception as e:
+                print(f"ERROR al actualizar los resúmenes de {db_name}: {e}")
+        if not args.cada:
+            break
+        args.reconstruir = False
+        time.sleep(args.cada)
+
+if __name__ == "__main__":
+    main()
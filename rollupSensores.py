@@ -0,0 +1,130 @@
+# Mantenimiento incremental de los resúmenes de RegistroSensor.
+#
+# RegistroSensorHora y RegistroSensorDia guardan, por sensor y periodo, el
+# mínimo, el máximo, la suma y el número de lecturas (media = suma / cuenta).
+# MarcaRollup recuerda el último id de RegistroSensor ya incorporado: cada
+# actualización agrega solo las filas nuevas y las fusiona con un upsert.
+# La fila de MarcaRollup se bloquea (FOR UPDATE) para que dos actualizaciones
+# simultáneas no cuenten dos veces las mismas lecturas.
+#
+# Supone que los ids de RegistroSensor se confirman en orden (un solo escritor,
+# como rellenarDatos.py o ingestaSensores.py). Las lecturas borradas o
+# modificadas después de resumirse no se reflejan: para eso, --reconstruir.
+
+import argparse
+import time
+
+import psycopg2
+
+from conexiones import DB_CONFIGS, conexion
+
+# Truncado de fecha al inicio del periodo en el dialecto de cada motor
+PERIODOS = {
+    "RegistroSensorHora": {
+        "psycopg2": "date_trunc('hour', fecha)",
+        "mysql": "DATE_FORMAT(fecha, '%Y-%m-%d %H:00:00')",
+    },
+    "RegistroSensorDia": {
+        "psycopg2": "date_trunc('day', fecha)",
+        "mysql": "CAST(DATE(fecha) AS DATETIME)",
+    },
+}
+
+# Los ids van formateados en el SQL (son enteros leídos de la base) para no
+# mezclar marcadores %s con los % de DATE_FORMAT.
+FUSION = {
+    "psycopg2": """
+        INSERT INTO {tabla} (id_sensor, periodo, minimo, maximo, suma, cuenta)
+        SELECT id_sensor, {periodo}, MIN(valor), MAX(valor), SUM(valor), COUNT(*)
+        FROM RegistroSensor
+        WHERE id > {desde} AND id <= {hasta} AND id_sensor IS NOT NULL
+        GROUP BY id_sensor, {periodo}
+        ON CONFLICT (id_sensor, periodo) DO UPDATE SET
+            minimo = LEAST({tabla}.minimo, EXCLUDED.minimo),
+            maximo = GREATEST({tabla}.maximo, EXCLUDED.maximo),
+            suma = {tabla}.suma + EXCLUDED.suma,
+            cuenta = {tabla}.cuenta + EXCLUDED.cuenta
+    """,
+    "mysql": """
+        INSERT INTO {tabla} (id_sensor, periodo, minimo, maximo, suma, cuenta)
+        SELECT id_sensor, {periodo}, MIN(valor), MAX(valor), SUM(valor), COUNT(*)
+        FROM RegistroSensor
+        WHERE id > {desde} AND id <= {hasta} AND id_sensor IS NOT NULL
+        GROUP BY id_sensor, {periodo}
+        ON DUPLICATE KEY UPDATE
+            minimo = LEAST(minimo, VALUES(minimo)),
+            maximo = GREATEST(maximo, VALUES(maximo)),
+            suma = suma + VALUES(suma),
+            cuenta = cuenta + VALUES(cuenta)
+    """,
+}
+
+INICIAR_MARCA = {
+    "psycopg2": "INSERT INTO MarcaRollup (tabla, ultimo_id) VALUES ('RegistroSensor', 0) ON CONFLICT (tabla) DO NOTHING",
+    "mysql": "INSERT IGNORE INTO MarcaRollup (tabla, ultimo_id) VALUES ('RegistroSensor', 0)",
+}
+
+
+def _driver(conn):
+    return "psycopg2" if isinstance(conn, psycopg2.extensions.connection) else "mysql"
+
+
+def actualizar_rollups(conn):
+    """Incorpora a los resúmenes las lecturas nuevas. Devuelve (desde, hasta) de ids procesados."""
+    driver = _driver(conn)
+    cursor = conn.cursor()
+    cursor.execute(INICIAR_MARCA[driver])
+    conn.commit()
+
+    cursor.execute("SELECT ultimo_id FROM MarcaRollup WHERE tabla = 'RegistroSensor' FOR UPDATE")
+    desde = cursor.fetchall()[0][0]
+    cursor.execute("SELECT MAX(id) FROM RegistroSensor")
+    hasta = cursor.fetchall()[0][0] or 0
+    if hasta <= desde:
+        conn.rollback()
+        cursor.close()
+        return desde, desde
+
+    for tabla, periodo in PERIODOS.items():
+        cursor.execute(FUSION[driver].format(tabla=tabla, periodo=periodo[driver], desde=desde, hasta=hasta))
+    cursor.execute(f"UPDATE MarcaRollup SET ultimo_id = {hasta} WHERE tabla = 'RegistroSensor'")
+    conn.commit()
+    cursor.close()
+    return desde, hasta
+
+
+def reconstruir_rollups(conn):
+    """Vacía los resúmenes y los recalcula desde todas las lecturas."""
+    cursor = conn.cursor()
+    for tabla in PERIODOS:
+        cursor.execute(f"DELETE FROM {tabla}")
+    cursor.execute("DELETE FROM MarcaRollup WHERE tabla = 'RegistroSensor'")
+    conn.commit()
+    cursor.close()
+    return actualizar_rollups(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Actualiza los resúmenes por hora y día de RegistroSensor.")
+    parser.add_argument("--motores", nargs="+", choices=list(DB_CONFIGS), default=list(DB_CONFIGS))
+    parser.add_argument("--reconstruir", action="store_true", help="Recalcula los resúmenes desde cero.")
+    parser.add_argument("--cada", type=float, default=0,
+                        help="Repite la actualización cada N segundos (0 = una sola vez).")
+    args = parser.parse_args()
+
+    while True:
+        for db_name in args.motores:
+            try:
+                with conexion(db_name) as conn:
+                    actualizar = reconstruir_rollups if args.reconstruir else actualizar_rollups
+                    desde, hasta = actualizar(conn)
+                print(f"{db_name}: resúmenes al día hasta el id {hasta} ({hasta - desde} lecturas nuevas)")
+            except Exception as e:
+                print(f"ERROR al actualizar los resúmenes de {db_name}: {e}")
+        if not args.cada:
+            break
+        args.reconstruir = False
+        time.sleep(args.cada)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Ejecución completa de ejecutar_benchmark con preparar=False contra una conexión
+# falsa de tipo MySQL: comprueba que se construye el informe, no las latencias.
+from contextlib import contextmanager
+from unittest import mock
+
+import benchmark
+import conexiones
+
+
+class _CursorFalso:
+    def execute(self, sql, parametros=None):
+        self.sql = sql
+
+    def fetchall(self):
+        # Vale como versión (no MariaDB), como plan JSON y como fila de resultado
+        return [("{}", 1, "texto", 1.0)]
+
+    def close(self):
+        pass
+
+
+class _ConexionFalsa:
+    def cursor(self):
+        return _CursorFalso()
+
+    def commit(self):
+        pass
+
+
+@contextmanager
+def _conexion_falsa(db_name):
+    yield _ConexionFalsa()
+
+
+def test_ejecutar_benchmark_sin_preparar():
+    with mock.patch.object(conexiones, "conexion", _conexion_falsa), \
+            mock.patch.object(conexiones, "DB_CONFIGS", {"MySQL": {}}):
+        informe = benchmark.ejecutar_benchmark([1], calentamiento=0, repeticiones=2, preparar=False,
+                                               terminos_busqueda=["hospital"])
+
+    assert informe["configuracion"]["repeticiones"] == 2
+    assert informe["configuracion"]["terminos_busqueda"] == ["hospital"]
+    busquedas = [r for r in informe["resultados"] if r["analisis"].startswith("busqueda_")]
+    assert len(busquedas) == len(benchmark.busqueda.CAMPOS_BUSQUEDA) * len(benchmark.METODOS_BUSQUEDA)
+    for r in busquedas:
+        assert "error" not in r, r
+        assert r["repeticiones"] == 2 and r["filas"] == 1
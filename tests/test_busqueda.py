@@ -0,0 +1,57 @@
+# Comprobaciones de busqueda.sql_busqueda sin base de datos: se fija el driver.
+from unittest import mock
+
+import pytest
+
+import busqueda
+
+
+def _sql(driver, tabla, texto, **kwargs):
+    with mock.patch.object(busqueda, "_driver", return_value=driver):
+        return busqueda.sql_busqueda(tabla, None, texto, **kwargs)
+
+
+def test_postgresql_usa_el_indice_gin():
+    sql, parametros = _sql("psycopg2", "Comentario", "Hospital, MERCADO!")
+    vector = "to_tsvector('spanish', COALESCE(texto, ''))"
+    assert f"WHERE {vector} @@ Q.consulta" in sql
+    assert "plainto_tsquery('spanish', %s)" in sql
+    assert "FROM Comentario" in sql and "id_reporte" in sql
+    assert parametros == ["hospital mercado"]
+    # La expresión de la consulta es la misma que la del índice
+    assert vector in busqueda.indices_busqueda("psycopg2")[1]
+
+def test_mysql_exige_todos_los_terminos_como_prefijo():
+    sql, parametros = _sql("mysql", "Alerta", "presidente partido")
+    assert sql.count("MATCH(mensaje) AGAINST (%s IN BOOLEAN MODE)") == 2
+    assert parametros == ["+presidente* +partido*"] * 2
+
+def test_mysql_descarta_terminos_cortos():
+    _, parametros = _sql("mysql", "Reporte", "la casa de mi")
+    assert parametros == ["+casa*"] * 2
+
+def test_sin_terminos_buscables_devuelve_none():
+    assert _sql("mysql", "Reporte", "de la y") is None
+    assert _sql("psycopg2", "Reporte", " ¡! ") is None
+    assert _sql("psycopg2", "Reporte", "", metodo="like") is None
+
+def test_like_un_patron_por_termino():
+    sql, parametros = _sql("mysql", "Reporte", "mercado 50", metodo="like", limite=5)
+    assert sql.count("LOWER(descripcion) LIKE %s") == 2
+    assert sql.endswith("LIMIT 5")
+    assert parametros == ["%mercado%", "%50%"]
+
+def test_errores():
+    with pytest.raises(ValueError):
+        _sql("mysql", "Usuario", "hospital")
+    with pytest.raises(ValueError):
+        _sql("mysql", "Reporte", "hospital", metodo="regex")
+
+def test_buscar_agrupa_por_tabla():
+    cursor = mock.Mock()
+    cursor.fetchall.return_value = [(7, 3, "Hospital ...", 0.5)]
+    conn = mock.Mock(cursor=mock.Mock(return_value=cursor))
+    with mock.patch.object(busqueda, "_driver", return_value="mysql"):
+        resultados = busqueda.buscar(conn, "hospital", tablas=["Reporte", "Alerta"])
+    assert resultados == [("Reporte", 7, 3, "Hospital ...", 0.5), ("Alerta", 7, 3, "Hospital ...", 0.5)]
+    cursor.close.assert_called_once()
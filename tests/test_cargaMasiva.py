@@ -0,0 +1,27 @@
+# Modo "valores" sin base de datos: páginas enviadas y bytes estimados.
+from unittest import mock
+
+import cargaMasiva
+
+
+def test_valores_postgresql_pagina_con_execute_values():
+    filas = [(i, f"texto {i}") for i in range(2500)]
+    with mock.patch.object(cargaMasiva, "es_postgresql", return_value=True), \
+            mock.patch.object(cargaMasiva.psycopg2.extras, "execute_values") as execute_values:
+        enviados = cargaMasiva.insertar_filas(mock.Mock(), None, "Zona", ("id", "nombre"), iter(filas), "valores")
+
+    paginas = [llamada.args[2] for llamada in execute_values.call_args_list]
+    assert [len(p) for p in paginas] == [1000, 1000, 500]
+    assert sum(paginas, []) == filas
+    assert execute_values.call_args.args[1] == "INSERT INTO Zona (id, nombre) VALUES %s"
+    assert enviados == cargaMasiva._bytes_estimados(filas)
+
+
+def test_valores_mysql_usa_executemany():
+    cursor = mock.Mock()
+    with mock.patch.object(cargaMasiva, "es_postgresql", return_value=False):
+        enviados = cargaMasiva.insertar_filas(cursor, None, "Zona", ("id", "nombre"), [(1, 'a"b'), (2, None)], "valores")
+
+    cursor.executemany.assert_called_once_with("INSERT INTO Zona (id, nombre) VALUES (%s, %s)", [(1, 'a"b'), (2, None)])
+    # (1,"a""b"), y (2,),
+    assert enviados == len('1,"a""b"') + 3 + len('2,') + 3
@@ -0,0 +1,47 @@
+# Cronometrado por sentencia sin base de datos: conexión falsa de tipo mysql-connector.
+import metricas
+from conexiones import sentencias_cronometradas, tipo_sentencia
+
+
+class _CursorFalso:
+    rowcount = 3
+
+    def execute(self, sql, parametros=None):
+        pass
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class _ConexionFalsa:
+    def cursor(self):
+        return _CursorFalso()
+
+
+def test_tipo_sentencia():
+    assert tipo_sentencia("\n    SELECT Z.nombre FROM ResumenZona RZ JOIN Zona Z") == "SELECT ResumenZona"
+    assert tipo_sentencia("INSERT INTO ResumenUsuario (id_usuario) SELECT 1") == "INSERT ResumenUsuario"
+    assert tipo_sentencia("UPDATE Zona Z JOIN (SELECT 1) D") == "UPDATE Zona"
+    assert tipo_sentencia("select (select max(id) from Reporte)") == "SELECT Reporte"
+    assert tipo_sentencia("COMMIT") == "COMMIT"
+
+
+def test_una_observacion_por_sentencia():
+    metricas.reiniciar()
+    conn = _ConexionFalsa()
+    with sentencias_cronometradas(conn, analisis="prueba", motor="MySQL"):
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO ResumenZona SELECT 1")
+        cursor.execute("SELECT * FROM Zona WHERE id > 1")
+        assert cursor.fetchall() == [(1,)] and cursor.rowcount == 3
+        cursor.close()
+    # Fuera del bloque, la conexión vuelve a dar cursores normales
+    assert isinstance(conn.cursor(), _CursorFalso)
+
+    cuentas = {dict(etiquetas)["sentencia"]: h["cuenta"] for (nombre, etiquetas), h in metricas._histogramas.items()
+               if nombre == "sentencia_segundos" and dict(etiquetas)["analisis"] == "prueba"}
+    assert cuentas == {"INSERT ResumenZona": 1, "SELECT Zona": 1}
+    metricas.reiniciar()
@@ -0,0 +1,60 @@
+# correlacion_ventana frente a la semántica del join original, sobre SQLite en memoria
+# (filas_en_streaming usa el cursor normal con cualquier conexión que no sea psycopg2).
+import random
+import sqlite3
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from correlacion import VENTANA_CORRELACION, correlacion_ventana
+
+ESQUEMA = """
+CREATE TABLE Zona (id INTEGER PRIMARY KEY, nombre TEXT);
+CREATE TABLE Reporte (id INTEGER PRIMARY KEY, id_zona INT, fechaHora TIMESTAMP);
+CREATE TABLE Alerta (id INTEGER PRIMARY KEY, id_reporte INT);
+CREATE TABLE Sensor (id INTEGER PRIMARY KEY, id_zona INT, tipo TEXT);
+CREATE TABLE RegistroSensor (id INTEGER PRIMARY KEY, id_sensor INT, fecha TIMESTAMP);
+"""
+
+
+def _base(rng):
+    conn = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.executescript(ESQUEMA)
+    inicio = datetime(2025, 1, 1)
+    fecha = lambda: None if rng.random() < 0.05 else inicio + timedelta(hours=rng.randrange(24 * 60))
+    # Zonas 1..6 existen (dos con el mismo nombre); la 7 no; también hay NULL
+    zonas_usadas = [1, 2, 3, 4, 5, 6, 7, None]
+    conn.executemany("INSERT INTO Zona VALUES (?, ?)", [(z, f"Z{min(z, 5)}") for z in range(1, 7)])
+    conn.executemany("INSERT INTO Reporte VALUES (?, ?, ?)",
+                     [(i, rng.choice(zonas_usadas), fecha()) for i in range(1, 401)])
+    conn.executemany("INSERT INTO Alerta VALUES (?, ?)", [(i, rng.randrange(1, 401)) for i in range(1, 301)])
+    conn.executemany("INSERT INTO Sensor VALUES (?, ?, ?)",
+                     [(i, rng.choice(zonas_usadas), rng.choice(["Ruido", "Aire", "Luz"])) for i in range(1, 41)])
+    conn.executemany("INSERT INTO RegistroSensor VALUES (?, ?, ?)",
+                     [(i, rng.randrange(1, 41), fecha()) for i in range(1, 1501)])
+    return conn
+
+
+def _join_original(conn):
+    """COUNT(DISTINCT R.id) por (Z.nombre, S.tipo) con R.fechaHora BETWEEN RS.fecha - 2 días AND RS.fecha."""
+    nombres = dict(conn.execute("SELECT id, nombre FROM Zona"))
+    con_alerta = {r for (r,) in conn.execute("SELECT id_reporte FROM Alerta")}
+    reportes = [(i, z, f) for i, z, f in conn.execute("SELECT id, id_zona, fechaHora FROM Reporte") if i in con_alerta]
+    registros = conn.execute(
+        "SELECT S.id_zona, S.tipo, RS.fecha FROM RegistroSensor RS JOIN Sensor S ON RS.id_sensor = S.id").fetchall()
+    distintos = defaultdict(set)
+    for id_zona, tipo, fecha in registros:
+        if id_zona not in nombres or fecha is None:
+            continue
+        for id_reporte, zona_reporte, fecha_reporte in reportes:
+            if zona_reporte == id_zona and fecha_reporte is not None \
+                    and fecha - VENTANA_CORRELACION <= fecha_reporte <= fecha:
+                distintos[(nombres[id_zona], tipo)].add(id_reporte)
+    return {clave: len(ids) for clave, ids in distintos.items()}
+
+
+def test_igual_que_el_join_con_nulos_y_zonas_inexistentes():
+    for semilla in range(5):
+        conn = _base(random.Random(semilla))
+        esperado = _join_original(conn)
+        obtenido = correlacion_ventana(conn, limite=len(esperado) + 10)
+        assert {(zona, tipo): total for zona, tipo, total in obtenido} == esperado
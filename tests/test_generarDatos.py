@@ -0,0 +1,37 @@
+# Coherencia de las FKs deducidas por hash en generarDatos, sin base de datos.
+import pickle
+from collections import Counter
+from datetime import datetime
+
+from generarDatos import COLUMNAS, construir_pools, crear_plan, filas_de_bloques, generar_tabla
+
+
+def _plan():
+    ids = {"Zona": range(11, 61), "Sensor": range(1, 2001), "RegistroSensor": range(1, 6001),
+           "Indicador": range(101, 6101), "Usuario": range(1, 2), "Reporte": range(1, 2)}
+    return crear_plan(ids, semilla=7, fecha_referencia=datetime(2025, 6, 1), tam_bloque=700)
+
+
+def _tabla(tabla, plan, pools):
+    return [dict(zip(COLUMNAS[tabla], fila)) for fila in filas_de_bloques(generar_tabla(tabla, plan, pools))]
+
+
+def test_indicador_hereda_la_zona_del_sensor_de_su_registro():
+    plan = _plan()
+    pools = construir_pools(7)
+    zona = {s["id"]: s["id_zona"] for s in _tabla("Sensor", plan, pools)}
+    sensor = {r["id"]: r["id_sensor"] for r in _tabla("RegistroSensor", plan, pools)}
+    for indicador in _tabla("Indicador", plan, pools):
+        assert indicador["id_zona"] == zona[sensor[indicador["id_registro_sensor"]]]
+
+    # Todas las zonas reciben sensores, sin concentrarse en unas pocas
+    reparto = Counter(zona.values())
+    assert set(reparto) == set(plan["ids"]["Zona"])
+    assert max(reparto.values()) < 3 * len(zona) / len(reparto)
+
+
+def test_el_plan_no_crece_con_los_sensores():
+    pequeno = _plan()
+    grande = crear_plan({**pequeno["ids"], "Sensor": range(1, 10_000_001)}, semilla=7,
+                        fecha_referencia=datetime(2025, 6, 1))
+    assert len(pickle.dumps(grande)) - len(pickle.dumps(pequeno)) < 100
@@ -0,0 +1,29 @@
+# funcionConjunta de principio a fin sin base de datos: consulta_federada devuelve
+# lo que devolverían los drivers (SUM como Decimal) y el resultado se escribe a JSON.
+import json
+from decimal import Decimal
+from unittest import mock
+
+import obtenerDatosImportantes as odi
+
+
+def _parciales(sql, motores=None, sentencia="federada", antes=None):
+    assert sql is odi.SQL_ZONA_MAS_CRITICA_RESUMEN
+    assert antes is odi.actualizar_resumenes
+    return {
+        "PostgreSQL": [("Centro", Decimal("5")), ("Norte", Decimal("2"))],
+        "MySQL": [("Centro", Decimal("1")), ("Sur", Decimal("7"))],
+        "MariaDB": [("Norte", Decimal("3"))],
+    }
+
+
+def test_funcion_conjunta_resumen_se_escribe_a_json(tmp_path):
+    with mock.patch.object(odi, "consulta_federada", _parciales):
+        conjunta = odi.funcionConjunta(k=2, metodo="resumen")
+
+    ruta = tmp_path / "datosDeLasTresBases.json"
+    odi._escribir_json(str(ruta), conjunta)
+    assert json.loads(ruta.read_text(encoding="utf-8")) == [
+        {"zona_mas_critica": "Sur", "reportes_alta_prioridad_total": 7},
+        {"zona_mas_critica": "Centro", "reportes_alta_prioridad_total": 6},
+    ]